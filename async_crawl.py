@@ -0,0 +1,127 @@
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from crawl_frontier import UrlQueue
+from metrics import METRICS
+from rate_limit import HostBudget
+from url_utils import normalize_url
+
+
+class AsyncCrawlEngine:
+    """CleanCursorDocsScraper 用の並行取得エンジン
+
+    最大 concurrency 件のリクエストを同時に送信しつつ、ホストごとに
+    HostBudget（毎秒リクエスト数・最大同時接続数）で流量を制御する。
+    HTMLの解析は取得用とは別のスレッドプールに渡すため、
+    BeautifulSoup の処理中もネットワーク側は次のページを取得できる。
+
+    結果の確定（ファイル保存・リンクのキュー追加）はディスパッチ順に行うため、
+    訪問順・scraped_data の順序・出力ファイルは逐次版と完全に一致する。
+    """
+
+    def __init__(self, scraper, concurrency=8, requests_per_second=None,
+                 host_concurrency=None, parse_workers=1):
+        self.scraper = scraper
+        self.concurrency = concurrency
+        self.requests_per_second = requests_per_second
+        self.host_concurrency = host_concurrency or concurrency
+        self.parse_workers = parse_workers
+        self.host_budgets = {}
+
+    async def _load_robots(self, url):
+        """URLのホストの robots.txt が未取得なら、イベントループを止めないよう別のスレッドで取得する"""
+        robots = self.scraper.robots
+        if robots is not None and not robots.is_loaded(url):
+            await asyncio.get_running_loop().run_in_executor(None, robots.is_allowed, url)
+
+    def _budget_for(self, url):
+        """URLのホストに対応する HostBudget を返す
+
+        robots.txt の Crawl-delay が指定されたホストは、毎秒リクエスト数を 1 / Crawl-delay 以下にする
+        （robots.txt は呼び出す前に _load_robots で取得しておく）。
+        """
+        host = urlparse(url).netloc
+        budget = self.host_budgets.get(host)
+        if budget is None:
+            requests_per_second = self.requests_per_second
+            delay = self.scraper.crawl_delay(url)
+            if delay:
+                requests_per_second = min(requests_per_second or float("inf"), 1.0 / delay)
+            budget = HostBudget(requests_per_second, self.host_concurrency)
+            self.host_budgets[host] = budget
+        return budget
+
+    async def _fetch_and_process(self, url, fetch_pool, parse_pool):
+        """1ページを取得して解析する（例外は呼び出し側で確定時に扱う）"""
+        loop = asyncio.get_running_loop()
+        print(f"スクレイピング中: {url}")
+        try:
+            await self._load_robots(url)
+            async with self._budget_for(url):
+                response = await loop.run_in_executor(fetch_pool, self.scraper.fetch_page, url)
+            page_info, links = await loop.run_in_executor(
+                parse_pool, self.scraper.process_page, url, response
+            )
+            return page_info, links, None
+        except Exception as e:
+            return None, set(), e
+
+    async def run(self, start_url, max_pages):
+        """クロールを実行し、処理したページ数を返す"""
+        scraper = self.scraper
+        urls_to_visit = UrlQueue(visited=scraper.visited_urls)
+        await self._load_robots(start_url)  # 開始ホストの robots.txt はここで取得しておく
+        if scraper.is_allowed(start_url):
+            urls_to_visit.add(normalize_url(start_url))
+        in_flight = deque()  # (url, task) をディスパッチ順に保持
+        pages_scraped = 0
+        dispatched = 0
+
+        # 取得スレッドの数だけ同じホストへの接続を keep-alive で保持できるようにする
+        scraper.http_client.ensure_pool_size(self.concurrency)
+        fetch_pool = ThreadPoolExecutor(max_workers=self.concurrency)
+        parse_pool = ThreadPoolExecutor(max_workers=self.parse_workers)
+        try:
+            while True:
+                # キューの先頭から、上限まで先行してリクエストを発行する
+                while urls_to_visit and dispatched < max_pages and len(in_flight) < self.concurrency:
+                    url = urls_to_visit.pop()  # 訪問済みとして記録される
+                    task = asyncio.ensure_future(self._fetch_and_process(url, fetch_pool, parse_pool))
+                    in_flight.append((url, task))
+                    dispatched += 1
+
+                if not in_flight:
+                    break
+
+                # 先頭のページから順に結果を確定する
+                url, task = in_flight.popleft()
+                page_info, found_links, error = await task
+                pages_scraped += 1
+
+                if error is not None:
+                    print(f"エラー: {url} - {error}")
+                    METRICS.counter("docs_pages_total").inc(result="error")
+                else:
+                    try:
+                        scraper.store_page(url, page_info)
+                    except Exception as e:
+                        print(f"エラー: {url} - {e}")
+                        METRICS.counter("docs_pages_total").inc(result="error")
+                        found_links = set()
+
+                for link in found_links:
+                    # 登録済みのリンク（サイドバーなど）は robots.txt の判定を省略する
+                    if link in urls_to_visit:
+                        continue
+                    await self._load_robots(link)
+                    if scraper.is_allowed(link):
+                        urls_to_visit.add(link)
+
+                print(f"進捗: {pages_scraped}/{max_pages} ページ完了")
+        finally:
+            fetch_pool.shutdown(wait=True)
+            parse_pool.shutdown(wait=True)
+
+        return pages_scraped
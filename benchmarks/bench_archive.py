@@ -0,0 +1,119 @@
+"""取得したレスポンスのアーカイブ（warc_archive）からの再解析を、ネットワークからのクロールと比較する
+
+1. ローカルのドキュメントサーバー（応答遅延あり）を CleanCursorDocsScraper(archive=True) でクロールする
+2. アーカイブだけから、プロセス数を変えて出力を作り直す（reprocess_archive）
+3. ページのマークダウン・pages.jsonl・統合ドキュメントがクロール時と一致することを確認する
+4. 索引による1ページの読み出し時間と、圧縮率を表示する
+5. 索引に記録される前に中断したレコードが、開き直したときに切り捨てられることを確認する
+
+出力が一致しない場合や確認に失敗した場合は終了コード1で終了する。
+
+    python -m benchmarks.bench_archive --pages 200 --latency 0.02 --workers 1 2 4
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from cursor_docs_scraper_clean import ARCHIVE_DIR, CleanCursorDocsScraper
+from warc_archive import WarcArchive
+
+
+def output_files(output_dir):
+    return sorted(name for name in os.listdir(output_dir) if name.endswith((".md", ".jsonl")))
+
+
+def differing_files(expected_dir, actual_dir):
+    expected, actual = output_files(expected_dir), output_files(actual_dir)
+    if expected != actual:
+        return sorted(set(expected) ^ set(actual))
+    _, mismatch, errors = filecmp.cmpfiles(expected_dir, actual_dir, expected, shallow=False)
+    return mismatch + errors
+
+
+def check_recovery(archive_dir):
+    """セグメントと索引の末尾に途中までのレコードを書き足し、開き直して切り捨てられるか確認する"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        copy = os.path.join(work_dir, "archive")
+        shutil.copytree(archive_dir, copy)
+        archive = WarcArchive(copy)
+        count = len(archive)
+        url = next(iter(archive.index))
+        response = archive.get(url)
+        archive.close()
+        segment = max(name for name in os.listdir(copy) if name.endswith(".warc.gz"))
+        with open(os.path.join(copy, segment), "ab") as f:
+            f.write(b"\x1f\x8b partial record")
+        with open(os.path.join(copy, "index.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"url": "partial')
+        archive = WarcArchive(copy)
+        archive.append(url + "?copy", response)
+        ok = len(archive) == count + 1 and archive.get(url + "?copy").content == response.content
+        ok = ok and sum(1 for _ in archive.map_records(lambda record: record.status_code, workers=1)) == count + 1
+        archive.close()
+        return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200, help="合成サイトのページ数")
+    parser.add_argument("--latency", type=float, default=0.02, help="1リクエストあたりの応答遅延（秒）")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="再解析のプロセス数")
+    parser.add_argument("--reads", type=int, default=1000, help="索引による読み出しの回数")
+    args = parser.parse_args()
+
+    failures = 0
+    site = build_docs_site(pages=args.pages)
+    with tempfile.TemporaryDirectory() as work_dir:
+        crawl_dir = os.path.join(work_dir, "crawl")
+        with LocalDocsServer(site, latency=args.latency) as server:
+            scraper = CleanCursorDocsScraper(base_url=server.base_url, output_dir=crawl_dir, wait_time=0,
+                                             use_cache=False, archive=True)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                scraper.scrape_docs(max_pages=args.pages)
+            crawl_time = time.perf_counter() - start
+            base_url = server.base_url
+        scraper.archive.close()
+        pages = len(scraper.scraped_data)
+        print(f"クロール: {pages} ページ {crawl_time:6.2f}s  アーカイブ {scraper.archive.format_summary()}")
+
+        for workers in args.workers:
+            output_dir = os.path.join(work_dir, f"reprocess-{workers}")
+            shutil.copytree(os.path.join(crawl_dir, ARCHIVE_DIR), os.path.join(output_dir, ARCHIVE_DIR))
+            rebuilt = CleanCursorDocsScraper(base_url=base_url, output_dir=output_dir, use_cache=False,
+                                             respect_robots=False)
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rebuilt.reprocess_archive(workers=workers)
+            elapsed = time.perf_counter() - start
+            differing = differing_files(crawl_dir, output_dir)
+            failures += len(differing)
+            print(f"  再解析（{workers} プロセス）: {elapsed:6.2f}s {pages / elapsed:7.1f} p/s"
+                  + (f"  出力の不一致: {', '.join(differing)}" if differing else "  出力はクロール時と一致"))
+
+        archive = WarcArchive(os.path.join(crawl_dir, ARCHIVE_DIR))
+        urls = random.Random(0).choices(list(archive.index), k=args.reads)
+        start = time.perf_counter()
+        for url in urls:
+            archive.get(url)
+        print(f"  索引による読み出し: {(time.perf_counter() - start) * 1e6 / args.reads:6.1f} µs/ページ")
+        archive.close()
+
+        recovered = check_recovery(os.path.join(crawl_dir, ARCHIVE_DIR))
+        failures += not recovered
+        print(f"  中断したレコードの切り捨て: {'OK' if recovered else 'NG'}")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""逐次取得と並行取得（AsyncCrawlEngine）の壁時計時間を比較する
+
+ローカルのドキュメントサーバーに人工的な遅延を入れて同じサイトを2回クロールし、
+所要時間と、cursor_docs_clean/*.md 相当の出力がバイト単位で一致することを確認する。
+
+    python -m benchmarks.bench_concurrent_scrape --pages 60 --latency 0.05
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import tempfile
+import time
+
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+
+
+def run_scrape(base_url, output_dir, pages, wait_time, concurrency, requests_per_second):
+    scraper = CleanCursorDocsScraper(base_url=base_url, output_dir=output_dir, wait_time=wait_time)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_docs(
+            start_url=f"{base_url}/welcome",
+            max_pages=pages,
+            concurrency=concurrency,
+            requests_per_second=requests_per_second,
+        )
+    return time.perf_counter() - start, len(scraper.scraped_data)
+
+
+def compare_outputs(dir_a, dir_b):
+    """2つの出力ディレクトリの .md ファイルが完全一致するか確認する"""
+    names_a = sorted(n for n in os.listdir(dir_a) if n.endswith(".md"))
+    names_b = sorted(n for n in os.listdir(dir_b) if n.endswith(".md"))
+    if names_a != names_b:
+        return False, len(names_a)
+    _, mismatch, errors = filecmp.cmpfiles(dir_a, dir_b, names_a, shallow=False)
+    return not mismatch and not errors, len(names_a)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05, help="1リクエストあたりの応答遅延（秒）")
+    parser.add_argument("--wait-time", type=float, default=0.02, help="逐次版のページ間待機時間（秒）")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rps", type=float, default=50.0, help="並行版のホストあたり毎秒リクエスト数")
+    args = parser.parse_args()
+
+    site = build_docs_site(pages=args.pages)
+    with LocalDocsServer(site, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        serial_dir = os.path.join(tmp, "serial")
+        concurrent_dir = os.path.join(tmp, "concurrent")
+
+        serial_time, serial_pages = run_scrape(
+            server.base_url, serial_dir, args.pages, args.wait_time, 1, None
+        )
+        concurrent_time, concurrent_pages = run_scrape(
+            server.base_url, concurrent_dir, args.pages, args.wait_time, args.concurrency, args.rps
+        )
+        identical, file_count = compare_outputs(serial_dir, concurrent_dir)
+
+    print(f"ページ数: {serial_pages} / {concurrent_pages}  (遅延 {args.latency * 1000:.0f} ms)")
+    print(f"逐次:   {serial_time:7.2f} s  ({serial_pages / serial_time:6.1f} pages/s)")
+    print(f"並行:   {concurrent_time:7.2f} s  ({concurrent_pages / concurrent_time:6.1f} pages/s, "
+          f"concurrency={args.concurrency}, rps={args.rps})")
+    print(f"高速化: {serial_time / concurrent_time:.1f}x")
+    print(f"出力一致: {'OK' if identical else 'NG'} ({file_count} files)")
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,115 @@
+"""クロール全体の重複除去（ContentDeduplicator）の効果と SimHashIndex の検索速度を計測する
+
+1. 同じページを別のURL（/ja/... の言語版）で配信し、一部のページには1語だけ違う旧版
+   （.../old）もあるサイトをクロールし、重複除去なし・完全一致のみ・類似ページも含む場合の
+   保存ページ数、統合ドキュメントの大きさ、所要時間を比較する
+2. ランダムな SimHash を N 件登録した索引で、近い値（数ビット違い）と無関係な値を検索し、
+   総当たりとの検索時間を比較する。総当たりで見つかる値を索引が見落とした場合は終了コード1
+
+    python -m benchmarks.bench_dedup --pages 60 --aliases 20 --index-size 10000 100000
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+from dedup import SimHashIndex
+
+
+def build_site_with_duplicates(pages, aliases):
+    """言語版（完全一致）と旧版（1語違い）のURLを含む合成サイトを作る"""
+    site = build_docs_site(pages=pages)
+    links = []
+    for i in range(1, aliases + 1):
+        body = site[f"/docs/page-{i}"]
+        site[f"/ja/docs/page-{i}"] = body
+        site[f"/docs/page-{i}/old"] = body.replace(b" the ", b" a ", 1)
+        links += [f"/ja/docs/page-{i}", f"/docs/page-{i}/old"]
+    anchors = "".join(f'<li><a href="{path}">Other version {path}</a></li>' for path in links)
+    site["/welcome"] = site["/welcome"].replace(b"</article>", f"<ul>{anchors}</ul></article>".encode("utf-8"))
+    return site
+
+
+def run_scrape(base_url, max_pages, **options):
+    with tempfile.TemporaryDirectory() as output_dir:
+        scraper = CleanCursorDocsScraper(base_url=base_url, output_dir=output_dir, wait_time=0,
+                                         use_cache=False, **options)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            scraper.scrape_docs(max_pages=max_pages)
+        elapsed = time.perf_counter() - start
+        combined = os.path.getsize(os.path.join(output_dir, "cursor_documentation_complete.md"))
+        files = sum(1 for name in os.listdir(output_dir) if name.endswith(".md")) - 1
+    return scraper, elapsed, combined, files
+
+
+def flip_bits(value, bits, rng):
+    for position in rng.sample(range(64), bits):
+        value ^= 1 << position
+    return value
+
+
+def bench_index(size, max_distance, queries, rng):
+    values = [rng.getrandbits(64) for _ in range(size)]
+    index = SimHashIndex(max_distance)
+    for position, value in enumerate(values):
+        index.add(value, position)
+    targets = [flip_bits(rng.choice(values), rng.randint(0, max_distance), rng) for _ in range(queries // 2)]
+    targets += [rng.getrandbits(64) for _ in range(queries - len(targets))]
+
+    start = time.perf_counter()
+    found = [index.find(target) is not None for target in targets]
+    index_time = time.perf_counter() - start
+
+    pairwise_targets = targets[:max(1, queries // 20)]
+    start = time.perf_counter()
+    expected = [any(bin(target ^ value).count("1") <= max_distance for value in values) for target in pairwise_targets]
+    pairwise_time = (time.perf_counter() - start) / len(pairwise_targets) * len(targets)
+    missed = sum(1 for want, got in zip(expected, found) if want and not got)
+    return index_time, pairwise_time, sum(found), missed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=60, help="合成サイトのページ数")
+    parser.add_argument("--aliases", type=int, default=20, help="言語版・旧版を用意するページ数")
+    parser.add_argument("--index-size", type=int, nargs="+", default=[10000, 100000], help="索引に登録する SimHash の数")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--max-distance", type=int, default=3)
+    args = parser.parse_args()
+
+    site = build_site_with_duplicates(args.pages, args.aliases)
+    max_pages = len(site)
+    print(f"サイト: {max_pages} URL（うち言語版 {args.aliases}、旧版 {args.aliases}）")
+    with LocalDocsServer(site) as server:
+        for label, options in (
+            ("重複除去なし", {"dedup": False}),
+            ("完全一致", {"dedup": True}),
+            ("類似も除去", {"dedup": True, "near_duplicates": True}),
+        ):
+            scraper, elapsed, combined, files = run_scrape(server.base_url, max_pages, **options)
+            summary = scraper.deduplicator.format_summary() if scraper.deduplicator else ""
+            print(f"  {label:<8} 保存 {files:>4} ページ  統合ドキュメント {combined / 1024:7.1f} KB  "
+                  f"{elapsed:5.2f} s  {summary}")
+
+    failures = 0
+    rng = random.Random(0)
+    print(f"SimHash の検索（ハミング距離 {args.max_distance} 以下、{args.queries} 件）")
+    for size in args.index_size:
+        index_time, pairwise_time, found, missed = bench_index(size, args.max_distance, args.queries, rng)
+        failures += missed
+        print(f"  {size:>9,} 件: 索引 {index_time * 1e6 / args.queries:8.1f} µs/件  "
+              f"総当たり {pairwise_time * 1e6 / args.queries:10.1f} µs/件  見つかった {found} 件  見落とし {missed} 件")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""crawler.py の1プロセスのクロールと、distributed_crawl の分散クロールを比較する
+
+ホストごとにローカルのドキュメントサーバーを起動し（1つは別のホストと同じ内容のミラー）、
+各ホストのトップページから他のホストのページへのリンクを張る。全ホストを初期URLにして
+他のホストへのリンクも辿るクロールを、1プロセス（crawler.crawl）とワーカー数を変えた
+分散クロールで実行し、所要時間・転送したリンク数・シャードごとの件数を表示する。
+保存されたページの本文（URLの行を除く）の集合が1プロセスと一致しない場合は終了コード1で終了する。
+
+    python -m benchmarks.bench_distributed --hosts 8 --pages 20 --workers 1 2 4 --latency 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import crawler
+import distributed_crawl
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from crawl_frontier import CrawlFrontier
+from dedup import ContentDeduplicator
+from robots import RobotsCache
+
+
+def saved_bodies(output_dir):
+    """保存されたテキストファイルの本文（先頭の URL の行を除く）の多重集合"""
+    bodies = Counter()
+    for name in os.listdir(output_dir):
+        if name.endswith(".txt"):
+            with open(os.path.join(output_dir, name), encoding="utf-8") as f:
+                bodies[f.read().split("\n", 2)[-1]] += 1
+    return bodies
+
+
+def run_single(seeds, pages, wait, output_dir):
+    crawler.deduplicator = ContentDeduplicator()
+    frontier = CrawlFrontier(os.path.join(output_dir, "frontier.sqlite"))
+    robots = RobotsCache(http_client=crawler.http_client)
+    for url in seeds:
+        frontier.add(url, 0)
+    allowed_hosts = {url.split("/")[2] for url in seeds}
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawler.crawl(frontier, robots, output_dir, max_depth=pages, wait_time=wait, allowed_hosts=allowed_hosts)
+    finally:
+        frontier.close()
+    return time.perf_counter() - start
+
+
+def run_distributed(seeds, pages, wait, output_dir, workers):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        coordinator = distributed_crawl.run_distributed(seeds, workers, output_dir, max_depth=pages, wait_time=wait,
+                                                        follow_seed_hosts=True)
+    return time.perf_counter() - start, coordinator
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, default=8, help="ホスト数（うち1つはミラー）")
+    parser.add_argument("--pages", type=int, default=20, help="ホストあたりのページ数")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="分散クロールのワーカー数")
+    parser.add_argument("--latency", type=float, default=0.05, help="1リクエストあたりの応答遅延（秒）")
+    parser.add_argument("--wait", type=float, default=0.05, help="同じホストへの取得間の待機時間（秒）")
+    args = parser.parse_args()
+
+    sites = [build_docs_site(args.pages, seed=i) for i in range(args.hosts - 1)]
+    sites.append(sites[0])  # ミラー（重複除去がワーカー間で共有されることを確認する）
+    failures = 0
+    with contextlib.ExitStack() as stack:
+        servers = [stack.enter_context(LocalDocsServer(dict(site), latency=args.latency)) for site in sites]
+        for i, server in enumerate(servers):
+            # トップページから次のホストのページへのリンクを張る（他のシャードへのリンクになる）
+            target = servers[(i + 1) % len(servers)].base_url
+            anchors = "".join(f'<li><a href="{target}/docs/page-{k}">Other site {k}</a></li>' for k in range(1, 6))
+            server.site["/welcome"] = server.site["/welcome"].replace(b"</article>", f"<ul>{anchors}</ul></article>".encode("utf-8"))
+        seeds = [f"{server.base_url}/welcome" for server in servers]
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            single_time = run_single(seeds, args.pages, args.wait, output_dir)
+            expected = saved_bodies(output_dir)
+        pages = sum(expected.values())
+        print(f"{args.hosts} ホスト（保存 {pages} ページ）")
+        print(f"  1プロセス       {single_time:6.2f}s {pages / single_time:7.1f} p/s")
+
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as output_dir:
+                elapsed, coordinator = run_distributed(seeds, args.pages, args.wait, output_dir, workers)
+                bodies = saved_bodies(output_dir)
+            differing = sum((expected - bodies).values()) + sum((bodies - expected).values())
+            failures += differing
+            print(f"  ワーカー {workers:>2} 個   {elapsed:6.2f}s {sum(bodies.values()) / elapsed:7.1f} p/s "
+                  f"({single_time / elapsed:4.1f}x)" + (f"  出力の不一致 {differing} 件" if differing else ""))
+            print("    " + coordinator.format_stats().replace("\n", "\n    "))
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
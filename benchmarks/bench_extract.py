@@ -0,0 +1,237 @@
+"""extract_structured_content（1回走査）と変更前の実装を比較する
+
+1. 回帰コーパス: ネストしたリスト・pre 内の code などの小さなHTMLについて、
+   期待するマークダウンと一致することを確認する
+2. 出力の一致: 要素の入れ子がないページ（pre 内の code を pre に置き換えたもの）で、
+   変更前の実装と出力が一致することを確認する
+3. 速度: 1 MB 以上の大きなページで、ページあたりの抽出時間を比較する
+
+いずれかの確認に失敗すると終了コード1で終了する。
+
+    python -m benchmarks.bench_extract --large-pages 3 --large-size-mb 1.5
+"""
+import argparse
+import random
+import re
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_parsers import BASE_URL, build_corpus, load_corpus
+from benchmarks.local_docs_server import PHRASES, WORDS
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+from html_parsing import parse_html
+
+# (説明, HTML, 期待するセクションの内容)
+REGRESSION_CASES = [
+    (
+        "pre 内の code は1回だけ出力する",
+        "<h2>Install section</h2><pre><code>npm install cursor-cli</code></pre>",
+        "```\nnpm install cursor-cli\n```\n\n",
+    ),
+    (
+        "ネストしたリストは字下げして1回だけ出力する",
+        "<h2>Nested list</h2><ul><li>First item text<ul><li>Nested item one</li>"
+        "<li>Nested item two</li></ul></li><li>Second item text</li></ul>",
+        "• First item text\n  • Nested item one\n  • Nested item two\n• Second item text\n\n",
+    ),
+    (
+        "リスト内の段落やコードは項目のテキストとしてだけ出力する",
+        "<h2>List with blocks</h2><ul><li><p>Paragraph inside a list item</p></li>"
+        "<li>Run <code>cursor --version</code> now</li></ul>",
+        "• Paragraph inside a list item\n• Run cursor --version now\n\n",
+    ),
+    (
+        "段落内のインラインコードを別のコードブロックにしない",
+        "<h2>Inline code</h2><p>Open the command palette with <code>Cmd+Shift+P</code> first.</p>",
+        "Open the command palette with Cmd+Shift+P first.\n\n",
+    ),
+    (
+        "引用内の段落を重複して出力しない",
+        "<h2>Quote</h2><blockquote><p>Quoted paragraph text here</p></blockquote>",
+        "> Quoted paragraph text here\n\n",
+    ),
+    (
+        "短すぎる段落の中のコードは従来通りコードブロックとして出力する",
+        "<h2>Short paragraph</h2><p><code>cursor .</code> <code>--help flag</code></p>",
+        "```\n--help flag\n```\n\n",
+    ),
+    (
+        "li の外に直接置かれたネストしたリスト",
+        "<h2>Loose nesting</h2><ol><li>Outer item</li><ul><li>Inner item</li></ul></ol>",
+        "• Outer item\n  • Inner item\n\n",
+    ),
+]
+
+
+# --- 変更前の実装 ---------------------------------------------------------
+
+def legacy_clean_text_content(text):
+    unwanted_phrases = [
+        'Search...', 'Ask AI', 'Sign in', 'Download',
+        'Navigation', 'Documentation', 'Guides',
+        'Website', 'Forum', 'Support', 'Was this page helpful?',
+        'Yes', 'No', 'On this page', 'Cursor home page',
+        'Assistant', 'Responses are generated using AI and may contain mistakes.',
+        'x github website', 'Product', 'Pricing', 'Downloads',
+        'Docs', 'Company', 'Careers', 'About', 'Security',
+        'Privacy', 'Resources', 'Terms', 'Changelog', 'Twitter', 'GitHub'
+    ]
+    for phrase in unwanted_phrases:
+        text = text.replace(phrase, '')
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+    return text.strip()
+
+
+def legacy_extract_structured_content(content_element):
+    """変更前の extract_structured_content（find_all と processed_elements による実装）"""
+    clean = legacy_clean_text_content
+    sections = []
+    current_section = {"title": "", "content": "", "level": 1}
+    processed_elements = set()
+
+    for element in content_element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'pre', 'code', 'blockquote']):
+        if element in processed_elements:
+            continue
+        if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+            if current_section["title"] or current_section["content"]:
+                if current_section["content"].strip():
+                    sections.append(current_section)
+            level = int(element.name[1])
+            title = clean(element.get_text())
+            if len(title) > 2 and not title.startswith('​'):
+                current_section = {"title": title, "level": level, "content": ""}
+            processed_elements.add(element)
+        elif element.name == 'p':
+            text = clean(element.get_text())
+            if len(text) > 20:
+                current_section["content"] += text + "\n\n"
+            processed_elements.add(element)
+        elif element.name in ['ul', 'ol']:
+            list_items = []
+            for li in element.find_all('li'):
+                item_text = clean(li.get_text())
+                if len(item_text) > 5:
+                    list_items.append(f"• {item_text}")
+            if list_items:
+                current_section["content"] += "\n".join(list_items) + "\n\n"
+            processed_elements.add(element)
+        elif element.name in ['pre', 'code']:
+            code_text = element.get_text().strip()
+            if len(code_text) > 10:
+                current_section["content"] += f"```\n{code_text}\n```\n\n"
+            processed_elements.add(element)
+        elif element.name == 'blockquote':
+            quote_text = clean(element.get_text())
+            if len(quote_text) > 10:
+                current_section["content"] += f"> {quote_text}\n\n"
+            processed_elements.add(element)
+
+    if current_section["title"] or current_section["content"]:
+        if current_section["content"].strip():
+            sections.append(current_section)
+
+    unique_sections = []
+    seen_content = set()
+    for section in sections:
+        content_key = (section["title"], section["content"][:100])
+        if content_key not in seen_content:
+            seen_content.add(content_key)
+            unique_sections.append(section)
+    return unique_sections
+
+
+# --------------------------------------------------------------------------
+
+def flatten_nested_blocks(body):
+    """pre 内の code を取り除き、変更前の実装でも重複が起きないページにする"""
+    return body.replace(b"<pre><code>", b"<pre>").replace(b"</code></pre>", b"</pre>")
+
+
+def build_large_page(size_bytes, seed=0):
+    """ネストしたリストや pre 内の code を含む大きなドキュメントページを作成する"""
+    rng = random.Random(seed)
+
+    def sentence(words=14):
+        return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+    parts = ["<html><body><main><article><h1>Large page</h1>"]
+    length = 0
+    while length < size_bytes:
+        block = [f"<h2>{rng.choice(PHRASES)}</h2>", f"<p>{sentence()} {sentence()}</p>"]
+        nested = "".join(f"<li>{sentence(5)}</li>" for _ in range(3))
+        items = "".join(f"<li>{sentence(6)}<ul>{nested}</ul></li>" for _ in range(4))
+        block.append(f"<ul>{items}</ul>")
+        block.append(f"<pre><code>const value = cursor.open('{rng.choice(WORDS)}');\nreturn value;</code></pre>")
+        block.append(f"<blockquote><p>{sentence(8)}</p></blockquote>")
+        chunk = "".join(block)
+        parts.append(chunk)
+        length += len(chunk)
+    parts.append("</article></main></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+def run_regression(scraper):
+    failures = 0
+    for description, html, expected in REGRESSION_CASES:
+        soup = parse_html(f"<main>{html}</main>".encode("utf-8"))
+        sections = scraper.extract_structured_content(soup.find("main"))
+        content = sections[0]["content"] if sections else ""
+        ok = content == expected
+        failures += not ok
+        print(f"  {'OK ' if ok else 'NG '} {description}")
+        if not ok:
+            print(f"      期待: {expected!r}\n      結果: {content!r}")
+    return failures
+
+
+def main_content(scraper, body):
+    return scraper.extract_clean_content(parse_html(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="保存済みページ（*.html）のディレクトリ")
+    parser.add_argument("--pages", type=int, default=100, help="合成サイトのページ数")
+    parser.add_argument("--large-pages", type=int, default=3, help="大きなページの数")
+    parser.add_argument("--large-size-mb", type=float, default=1.5, help="大きなページ1つのサイズ")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        scraper = CleanCursorDocsScraper(base_url=BASE_URL, output_dir=output_dir, use_cache=False)
+
+        print("回帰コーパス:")
+        failures = run_regression(scraper)
+
+        corpus = load_corpus(args.corpus) if args.corpus else build_corpus(args.pages, 12)
+        differing = 0
+        for url, body in corpus:
+            flat = flatten_nested_blocks(body)
+            new = scraper.extract_structured_content(main_content(scraper, body))
+            legacy = legacy_extract_structured_content(main_content(scraper, flat))
+            differing += new != legacy
+        failures += differing
+        print(f"変更前の実装との出力の不一致: {differing} / {len(corpus)} ページ")
+
+        size = int(args.large_size_mb * 1024 * 1024)
+        pages = [build_large_page(size, seed) for seed in range(args.large_pages)]
+        print(f"大きなページ: {len(pages)} ページ × {len(pages[0]) / (1024 * 1024):.1f} MB")
+        for label, extract in (
+            ("変更前", legacy_extract_structured_content),
+            ("1回走査", scraper.extract_structured_content),
+        ):
+            elapsed = 0.0
+            for body in pages:
+                content = main_content(scraper, body)
+                start = time.perf_counter()
+                extract(content)
+                elapsed += time.perf_counter() - start
+            print(f"  {label:<8} {elapsed / len(pages):7.2f} s/ページ")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""フロンティアへのリンク追加のコストを、変更前の deque の走査と UrlQueue で比較する
+
+すべてのページがサイドバーのリンク（既知のURL）と新しいURLを含むドキュメントサイトを
+想定し、1ページ取り出すごとにリンクを追加していく。キュー内のURL数がしきい値に
+達するたびに、直前の区間のリンク1件あたりの追加時間を表示する。UrlQueue では
+キューが 100k 件になっても追加時間が一定であることを確認する。
+
+変更前の実装はキューの長さに比例して遅くなるため、--legacy-max 件までで打ち切る。
+URLの正規化の例がすべて期待通りであることも確認する（違反があれば終了コード1）。
+
+    python -m benchmarks.bench_frontier --urls 100000
+"""
+import argparse
+import sys
+import time
+from collections import deque
+
+from crawl_frontier import UrlQueue
+from url_utils import normalize_url
+
+BASE_URL = "https://docs.cursor.com"
+
+# (入力, 正規化後のURL)
+NORMALIZE_CASES = [
+    ("https://docs.cursor.com/context#rules", "https://docs.cursor.com/context"),
+    ("https://docs.cursor.com/context/", "https://docs.cursor.com/context"),
+    ("https://docs.cursor.com", "https://docs.cursor.com/"),
+    ("https://Docs.Cursor.COM/Context", "https://docs.cursor.com/Context"),
+    ("https://docs.cursor.com:443/context", "https://docs.cursor.com/context"),
+    ("http://localhost:8080/a/", "http://localhost:8080/a"),
+    ("https://docs.cursor.com/search?q=x&lang=ja", "https://docs.cursor.com/search?lang=ja&q=x"),
+    ("https://docs.cursor.com/search?tag=b&tag=a", "https://docs.cursor.com/search?tag=b&tag=a"),
+    ("https://docs.cursor.com/a%2Fb?x=%E3%81%82", "https://docs.cursor.com/a%2Fb?x=%E3%81%82"),
+]
+
+
+class LegacyQueue:
+    """変更前のフロンティア（deque と訪問済みURLの set、追加時にキューを走査する）"""
+
+    def __init__(self):
+        self.visited = set()
+        self._queue = deque()
+
+    def add(self, url):
+        if url not in self.visited and url not in self._queue:
+            self._queue.append(url)
+            return True
+        return False
+
+    def pop(self):
+        url = self._queue.popleft()
+        self.visited.add(url)
+        return url
+
+    def __len__(self):
+        return len(self._queue)
+
+
+def simulate(queue, sidebar, new_per_page, checkpoints):
+    """ページを取り出してリンクを追加し、チェックポイントごとに (キューの長さ, µs/リンク) を返す"""
+    sidebar_links = [f"{BASE_URL}/docs/page-{i}" for i in range(sidebar)]
+    next_id = 0
+    results = []
+    pending = list(checkpoints)
+    added_links = 0
+    elapsed = 0.0
+    queue.add(f"{BASE_URL}/docs/page-0")
+    while queue and pending:
+        queue.pop()
+        links = sidebar_links + [f"{BASE_URL}/docs/page-{next_id + i}" for i in range(new_per_page)]
+        next_id += new_per_page
+        start = time.perf_counter()
+        for link in links:
+            queue.add(link)
+        elapsed += time.perf_counter() - start
+        added_links += len(links)
+        if len(queue) >= pending[0]:
+            results.append((len(queue), elapsed * 1e6 / added_links))
+            pending.pop(0)
+            added_links = 0
+            elapsed = 0.0
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, default=100000, help="計測するキューの長さの上限")
+    parser.add_argument("--sidebar", type=int, default=200, help="全ページに含まれるサイドバーのリンク数")
+    parser.add_argument("--new-per-page", type=int, default=20, help="1ページあたりの新しいリンク数")
+    parser.add_argument("--legacy-max", type=int, default=20000, help="変更前の実装を計測するキューの長さの上限")
+    args = parser.parse_args()
+
+    failures = 0
+    for url, expected in NORMALIZE_CASES:
+        result = normalize_url(url)
+        if result != expected:
+            failures += 1
+            print(f"NG  {url} -> {result}（期待: {expected}）")
+    print(f"URLの正規化: {len(NORMALIZE_CASES) - failures} / {len(NORMALIZE_CASES)} OK")
+
+    urls = [f"HTTPS://Docs.Cursor.com/docs/page-{i}/?b=1&a=2#s" for i in range(100000)]
+    start = time.perf_counter()
+    for url in urls:
+        normalize_url(url)
+    print(f"normalize_url: {(time.perf_counter() - start) * 1e6 / len(urls):.2f} µs/URL")
+
+    checkpoints = [n for n in (1000, 5000, 10000, 25000, 50000, 100000, 250000, 1000000) if n <= args.urls]
+    print(f"リンクの追加（サイドバー {args.sidebar} 件 + 新しいリンク {args.new_per_page} 件/ページ）")
+    print(f"  {'キューの長さ':>10}  {'変更前':>12}  {'UrlQueue':>12}")
+    legacy = dict(simulate(LegacyQueue(), args.sidebar, args.new_per_page,
+                           [n for n in checkpoints if n <= args.legacy_max]))
+    current = simulate(UrlQueue(), args.sidebar, args.new_per_page, checkpoints)
+    legacy_lengths = sorted(legacy)
+    for index, (length, cost) in enumerate(current):
+        legacy_cost = legacy[legacy_lengths[index]] if index < len(legacy_lengths) else None
+        legacy_text = f"{legacy_cost:9.2f} µs" if legacy_cost is not None else f"{'-':>12}"
+        print(f"  {length:>10,}  {legacy_text}  {cost:9.2f} µs")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
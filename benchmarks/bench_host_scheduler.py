@@ -0,0 +1,112 @@
+"""crawler.py のクロールを、全体での待機（変更前）とホストごとのスケジューラーで比較する
+
+ホスト数を変えてローカルのドキュメントサーバーを複数起動し（ポートごとに別のホスト）、
+同じ待機時間で crawler.crawl を実行して、全体のスループットとホストごとのスループットを表示する。
+ホストごとのスケジューラーでは、同じホストへの取得の間隔（前回の取得の終了から次の取得の
+開始まで）が待機時間以上であることも確認する（違反があれば終了コード1）。
+
+    python -m benchmarks.bench_host_scheduler --hosts 1 2 5 10 --pages 10 --wait 0.2
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlsplit
+
+import crawler
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from crawl_frontier import CrawlFrontier
+from robots import RobotsCache
+
+
+class GlobalSleepScheduler:
+    """変更前のクロール（キューの先頭から取り出し、ページごとに wait 秒待機する）"""
+
+    def __init__(self, frontier, wait):
+        self.frontier = frontier
+        self.wait = wait
+
+    def next(self):
+        return self.frontier.next()
+
+    def record(self, url, started, ok=True):
+        time.sleep(self.wait)
+
+
+def run_crawl(servers, pages, wait, legacy, output_dir):
+    """クロールを実行し、(所要時間, ホスト → [(開始, 終了)]) を返す"""
+    fetches = {}
+    scrape = crawler.scrape_and_find_links
+
+    def timed_scrape(url, *args):
+        start = time.monotonic()
+        try:
+            return scrape(url, *args)
+        finally:
+            fetches.setdefault(urlsplit(url).netloc, []).append((start, time.monotonic()))
+
+    frontier = CrawlFrontier(os.path.join(output_dir, "frontier.sqlite"))
+    robots = RobotsCache(http_client=crawler.http_client)
+    for server in servers:
+        frontier.add(f"{server.base_url}/welcome", 0)
+    scheduler = GlobalSleepScheduler(frontier, wait) if legacy else None
+
+    crawler.scrape_and_find_links = timed_scrape
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            crawler.crawl(frontier, robots, output_dir, max_depth=pages, wait_time=wait, scheduler=scheduler)
+    finally:
+        crawler.scrape_and_find_links = scrape
+        frontier.close()
+    return time.perf_counter() - start, fetches
+
+
+def politeness_violations(fetches, wait):
+    """同じホストへの取得の間隔が wait 未満だった回数"""
+    violations = 0
+    for intervals in fetches.values():
+        for (_, previous_end), (start, _) in zip(intervals, intervals[1:]):
+            if start - previous_end < wait - 0.005:
+                violations += 1
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 2, 5, 10], help="ホスト数")
+    parser.add_argument("--pages", type=int, default=10, help="ホストあたりのページ数")
+    parser.add_argument("--wait", type=float, default=0.2, help="同じホストへの取得間の待機時間（秒）")
+    parser.add_argument("--latency", type=float, default=0.01, help="1リクエストあたりの応答遅延（秒）")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'ホスト数':>8}  {'方式':<12} {'ページ':>6} {'時間':>8} {'全体':>12} {'ホストあたり':>14} {'最短間隔':>10}")
+    for host_count in args.hosts:
+        site = build_docs_site(pages=args.pages)
+        with contextlib.ExitStack() as stack:
+            servers = [stack.enter_context(LocalDocsServer(site, latency=args.latency)) for _ in range(host_count)]
+            for legacy in (True, False):
+                with tempfile.TemporaryDirectory() as output_dir:
+                    elapsed, fetches = run_crawl(servers, args.pages, args.wait, legacy, output_dir)
+                pages = sum(len(intervals) for intervals in fetches.values())
+                per_host = [len(intervals) / (intervals[-1][1] - intervals[0][0])
+                            for intervals in fetches.values() if len(intervals) > 1]
+                gaps = [start - previous_end for intervals in fetches.values()
+                        for (_, previous_end), (start, _) in zip(intervals, intervals[1:])]
+                violations = 0 if legacy else politeness_violations(fetches, args.wait)
+                failures += violations
+                label = "全体で待機" if legacy else "ホストごと"
+                print(f"{host_count:>8}  {label:<10} {pages:>6} {elapsed:7.2f}s {pages / elapsed:8.2f} p/s "
+                      f"{sum(per_host) / len(per_host):10.2f} p/s {min(gaps) * 1000:8.0f} ms"
+                      + (f"  間隔の違反 {violations} 件" if violations else ""))
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
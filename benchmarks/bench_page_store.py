@@ -0,0 +1,92 @@
+"""ページ情報をメモリのリストに保持する方式と PageStore の、メモリ使用量を比較する
+
+合成したページ情報を大量に追加して統合ドキュメントを作成し、保持しているメモリ量と
+メモリ確保量のピーク（tracemalloc）、所要時間を表示する。両方式の統合ドキュメントが
+一致することも確認する（不一致なら終了コード1）。
+
+    python -m benchmarks.bench_page_store --pages 20000
+"""
+import argparse
+import contextlib
+import filecmp
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.local_docs_server import PHRASES, WORDS
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+
+
+def build_page_info(rng, index, sections=8):
+    def sentence(words=20):
+        return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+    return {
+        "url": f"https://docs.cursor.com/docs/page-{index}",
+        "title": f"{rng.choice(PHRASES)} {index}",
+        "sections": [
+            {"title": f"{rng.choice(PHRASES)} {s}", "level": 2,
+             "content": "\n\n".join(sentence() for _ in range(4)) + "\n\n"}
+            for s in range(sections)
+        ],
+    }
+
+
+class ListStore(list):
+    """変更前の scraped_data（ページ情報をすべてメモリに保持するリスト）"""
+
+    def __init__(self, create_anchor):
+        super().__init__()
+        self.create_anchor = create_anchor
+
+    def append(self, page_info, anchor=""):
+        super().append(page_info)
+
+    def toc(self):
+        return [(page["title"], self.create_anchor(page["title"])) for page in self]
+
+
+def run(output_dir, pages, use_list):
+    scraper = CleanCursorDocsScraper(output_dir=output_dir, use_cache=False)
+    if use_list:
+        scraper.scraped_data = ListStore(scraper.create_anchor)
+    rng = random.Random(0)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for index in range(pages):
+        page_info = build_page_info(rng, index)
+        scraper.scraped_data.append(page_info, scraper.create_anchor(page_info["title"]))
+    retained, _ = tracemalloc.get_traced_memory()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.create_combined_documentation()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return retained, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dirs = {}
+        for label, use_list in (("リスト（変更前）", True), ("PageStore", False)):
+            dirs[label] = os.path.join(tmp, "list" if use_list else "store")
+            retained, peak, elapsed = run(dirs[label], args.pages, use_list)
+            print(f"{label:<12} 保持 {retained / (1024 * 1024):8.1f} MB  ピーク {peak / (1024 * 1024):8.1f} MB  "
+                  f"{elapsed:6.2f} s  ({args.pages:,} ページ)")
+        same = filecmp.cmp(*(os.path.join(d, "cursor_documentation_complete.md") for d in dirs.values()),
+                           shallow=False)
+        print(f"統合ドキュメントの一致: {'OK' if same else 'NG'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
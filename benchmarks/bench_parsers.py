@@ -0,0 +1,148 @@
+"""HTMLパーサーのバックエンドごとに、解析・抽出の時間とメモリ使用量を比較する
+
+保存済みのドキュメントページ（--corpus で指定したディレクトリの *.html）または
+合成ドキュメントサイトのページを、インストール済みの各バックエンドで
+デコード前の bytes から解析し、extract_page_info でマークダウンまで変換する。
+ページあたりの解析・抽出時間と、メモリ使用量（RSS）のピークの増加を表示し、
+抽出したマークダウンがバックエンド間で一致することを確認する（不一致があれば終了コード1）。
+lxml などの C の拡張モジュールが確保するメモリは tracemalloc では計測できないため、
+メモリはバックエンドごとに新しいプロセスでページを1つずつファイルから読み込んで処理し、
+処理前からの RSS のピークの増加を比較する。
+
+    python -m benchmarks.bench_parsers --pages 100 --paragraphs 40
+    python -m benchmarks.bench_parsers --corpus saved_pages/
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmarks.bench_replay import peak_rss_mb
+from benchmarks.local_docs_server import build_docs_site
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+from html_parsing import available_parsers, parse_html
+
+BASE_URL = "https://docs.cursor.com"
+
+
+def iter_corpus(corpus_dir):
+    """ディレクトリ内の *.html を (URL, bytes) として1ページずつ読み込む"""
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, "rb") as f:
+            name = os.path.splitext(os.path.basename(path))[0]
+            yield f"{BASE_URL}/{name}", f.read()
+
+
+def load_corpus(corpus_dir):
+    """ディレクトリ内の *.html を (URL, bytes) のリストとして読み込む"""
+    return list(iter_corpus(corpus_dir))
+
+
+def save_corpus(corpus, corpus_dir):
+    """コーパスを *.html として保存する（load_corpus で読み込める）"""
+    os.makedirs(corpus_dir, exist_ok=True)
+    for url, body in corpus:
+        name = url[len(BASE_URL):].strip("/").replace("/", "_") or "index"
+        with open(os.path.join(corpus_dir, f"{name}.html"), "wb") as f:
+            f.write(body)
+
+
+def build_corpus(pages, paragraphs, seed=0):
+    """合成サイトのページに、Shift_JIS で保存されたページを少し混ぜたコーパスを作る"""
+    site = build_docs_site(pages=pages, paragraphs=paragraphs, seed=seed)
+    corpus = []
+    for index, (path, body) in enumerate(site.items()):
+        if index % 10 == 5:
+            # meta タグで文字コードを宣言した日本語ページ
+            html = body.decode("utf-8")
+            html = html.replace('<meta charset="utf-8">', '<meta charset="shift_jis">')
+            html = html.replace("<h1>", "<h1>日本語のページ ")
+            body = html.encode("shift_jis")
+        corpus.append((BASE_URL + path, body))
+    return corpus
+
+
+def run_backend(scraper, parser, corpus):
+    """1つのバックエンドでコーパス全体を処理し、(出力, 解析時間, 抽出時間) を返す"""
+    outputs = []
+    parse_time = 0.0
+    extract_time = 0.0
+    for url, body in corpus:
+        start = time.perf_counter()
+        soup = parse_html(body, parser)
+        parsed = time.perf_counter()
+        page_info = scraper.extract_page_info(soup, url)
+        extract_time += time.perf_counter() - parsed
+        parse_time += parsed - start
+        outputs.append(scraper.format_page_markdown(url, page_info) if page_info else "")
+    return outputs, parse_time, extract_time
+
+
+def _measure_rss(parser, corpus_dir):
+    """（新しいプロセスで実行）コーパスを1ページずつ処理したときの RSS のピークの増加（MB）を返す"""
+    with tempfile.TemporaryDirectory() as output_dir:
+        scraper = CleanCursorDocsScraper(base_url=BASE_URL, output_dir=output_dir, use_cache=False)
+        # バックエンドのモジュールの読み込みは増加に含めない
+        scraper.extract_page_info(parse_html(b"<html><body><main><p>x</p></main></body></html>", parser), BASE_URL)
+        baseline = peak_rss_mb()
+        for url, body in iter_corpus(corpus_dir):
+            scraper.extract_page_info(parse_html(body, parser), url)
+        return peak_rss_mb() - baseline
+
+
+def measure_rss(parser, corpus_dir):
+    """バックエンドごとに新しいプロセス（spawn）で RSS のピークの増加を計測する"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_measure_rss, parser, corpus_dir).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="保存済みページ（*.html）のディレクトリ")
+    parser.add_argument("--pages", type=int, default=100, help="合成サイトのページ数")
+    parser.add_argument("--paragraphs", type=int, default=40, help="合成ページあたりの段落数")
+    parser.add_argument("--save-corpus", metavar="DIR", help="合成したコーパスを *.html として保存する")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = load_corpus(args.corpus)
+    else:
+        corpus = build_corpus(args.pages, args.paragraphs)
+    if args.save_corpus:
+        save_corpus(corpus, args.save_corpus)
+    total_mb = sum(len(body) for _, body in corpus) / (1024 * 1024)
+    print(f"コーパス: {len(corpus)} ページ / {total_mb:.1f} MB")
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        corpus_dir = args.corpus or args.save_corpus
+        if not corpus_dir:
+            # メモリの計測用のプロセスはファイルから読み込む
+            corpus_dir = os.path.join(output_dir, "corpus")
+            save_corpus(corpus, corpus_dir)
+        scraper = CleanCursorDocsScraper(base_url=BASE_URL, output_dir=output_dir, use_cache=False)
+        reference = None
+        mismatches = 0
+        for backend in available_parsers():
+            outputs, parse_time, extract_time = run_backend(scraper, backend, corpus)
+            peak_mb = measure_rss(backend, corpus_dir)
+            differing = 0
+            if reference is None:
+                reference = outputs
+            else:
+                differing = sum(1 for a, b in zip(reference, outputs) if a != b)
+                mismatches += differing
+            pages = len(corpus)
+            print(f"{backend:<12} 解析 {parse_time * 1000 / pages:7.2f} ms/ページ  "
+                  f"抽出 {extract_time * 1000 / pages:7.2f} ms/ページ  "
+                  f"({total_mb / (parse_time + extract_time):5.2f} MB/s)  "
+                  f"RSS のピークの増加 {peak_mb:6.1f} MB  出力の不一致 {differing} ページ")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""crawler.py のクロールを、逐次実行（crawl）とパイプライン（crawl_pipelined）で比較する
+
+ホスト数を変えてローカルのドキュメントサーバーを複数起動し（ポートごとに別のホスト）、
+同じ待機時間・応答遅延でクロールして、所要時間・スループットと段ごとの統計を表示する。
+保存されたテキストファイルが逐次実行と一致しない場合は終了コード1で終了する。
+
+    python -m benchmarks.bench_pipeline --hosts 1 4 --pages 30 --paragraphs 40 --latency 0.05 --wait 0.05
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+import crawler
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from crawl_frontier import CrawlFrontier
+from dedup import ContentDeduplicator
+from robots import RobotsCache
+
+
+def run_crawl(servers, pages, wait, output_dir, pipelined, fetchers, parsers):
+    """クロールを実行し、(所要時間, 保存したファイル名 → 内容, パイプライン) を返す"""
+    crawler.deduplicator = ContentDeduplicator()
+    frontier = CrawlFrontier(os.path.join(output_dir, "frontier.sqlite"))
+    robots = RobotsCache(http_client=crawler.http_client)
+    for server in servers:
+        frontier.add(f"{server.base_url}/welcome", 0)
+
+    pipeline = None
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if pipelined:
+                pipeline = crawler.crawl_pipelined(frontier, robots, output_dir, max_depth=pages, wait_time=wait,
+                                                   fetchers=fetchers, parsers=parsers)
+            else:
+                crawler.crawl(frontier, robots, output_dir, max_depth=pages, wait_time=wait)
+    finally:
+        frontier.close()
+    elapsed = time.perf_counter() - start
+
+    files = {}
+    for name in os.listdir(output_dir):
+        if name.endswith(".txt"):
+            with open(os.path.join(output_dir, name), encoding="utf-8") as f:
+                files[name] = f.read()
+    return elapsed, files, pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hosts", type=int, nargs="+", default=[1, 4], help="ホスト数")
+    parser.add_argument("--pages", type=int, default=30, help="ホストあたりのページ数")
+    parser.add_argument("--paragraphs", type=int, default=40, help="1ページあたりの段落数（解析の重さ）")
+    parser.add_argument("--latency", type=float, default=0.05, help="1リクエストあたりの応答遅延（秒）")
+    parser.add_argument("--wait", type=float, default=0.05, help="同じホストへの取得間の待機時間（秒）")
+    parser.add_argument("--fetchers", type=int, default=4, help="取得スレッド数")
+    parser.add_argument("--parsers", type=int, default=None, help="解析プロセス数（既定: CPU数）")
+    args = parser.parse_args()
+
+    failures = 0
+    for host_count in args.hosts:
+        with contextlib.ExitStack() as stack:
+            # ホストごとに内容の違うサイトにする（同じ内容だと重複除去で保存されるホストが順序で変わる）
+            servers = [stack.enter_context(LocalDocsServer(build_docs_site(args.pages, paragraphs=args.paragraphs, seed=i),
+                                                           latency=args.latency))
+                       for i in range(host_count)]
+            results = {}
+            for pipelined in (False, True):
+                with tempfile.TemporaryDirectory() as output_dir:
+                    results[pipelined] = run_crawl(servers, args.pages, args.wait, output_dir, pipelined,
+                                                   args.fetchers, args.parsers)
+
+        (serial_time, serial_files, _), (pipeline_time, pipeline_files, pipeline) = results[False], results[True]
+        differing = len(set(serial_files.items()) ^ set(pipeline_files.items()))
+        failures += differing
+        pages = len(serial_files)
+        print(f"ホスト {host_count} 件（{pages} ページ）: 逐次 {serial_time:6.2f}s ({pages / serial_time:6.1f} p/s)  "
+              f"パイプライン {pipeline_time:6.2f}s ({len(pipeline_files) / pipeline_time:6.1f} p/s)  "
+              f"{serial_time / pipeline_time:4.1f}x" + (f"  出力の不一致 {differing} 件" if differing else ""))
+        print("  " + pipeline.format_stats().replace("\n", "\n  "))
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
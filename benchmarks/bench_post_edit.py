@@ -0,0 +1,72 @@
+"""翻訳後の修正（clean_artifacts）の1回走査方式と、ルールごとの str.replace 方式を比較する
+
+翻訳済みの合成文書に両方式で修正ルールを適用し、所要時間・文書のコピー量・
+メモリ確保量のピーク（tracemalloc）と、出力が異なる行数を表示する。
+
+    python -m benchmarks.bench_post_edit --size-mb 20
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.bench_translation_engine import build_document
+from final_japanese_translator import FinalJapaneseTranslator
+from glossary import FIXES_TIER
+
+
+def legacy_clean_artifacts(fixes, content, copies=None):
+    """変更前の clean_artifacts（ルールごとに文書全体を str.replace する）
+
+    copies にリストを渡すと、str.replace が新しい文字列を作るたびにその長さを追加する。
+    """
+    for wrong, correct in fixes.items():
+        replaced = content.replace(wrong, correct)
+        if copies is not None and replaced is not content:
+            copies.append(len(replaced))
+        content = replaced
+    return content
+
+
+def measure(func, content):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(content)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    translator = FinalJapaneseTranslator()
+    fixes = translator.load_glossary().tables[FIXES_TIER]
+    content = translator.comprehensive_translate(build_document(int(args.size_mb * 1024 * 1024)))
+    size_mb = len(content.encode("utf-8")) / (1024 * 1024)
+    print(f"文書サイズ: {size_mb:.1f} MB（翻訳済み） / 修正ルール数: {len(fixes)}")
+
+    copies = []
+    legacy, legacy_time, legacy_peak = measure(lambda text: legacy_clean_artifacts(fixes, text, copies), content)
+    fused, fused_time, fused_peak = measure(translator.clean_artifacts, content)
+    translator.fixed_point_fixes = True
+    fixed, fixed_time, fixed_peak = measure(translator.clean_artifacts, content)
+
+    for label, elapsed, peak in (
+        ("ルールごとの str.replace", legacy_time, legacy_peak),
+        ("1回走査", fused_time, fused_peak),
+        ("1回走査（不動点まで）", fixed_time, fixed_peak),
+    ):
+        print(f"{label:<24} {elapsed:7.2f} s  ピーク {peak / (1024 * 1024):8.1f} MB")
+    copied_mb = sum(copies) * len(content.encode("utf-8")) / len(content) / (1024 * 1024)
+    print(f"文書のコピー: str.replace {len(copies)} 回（約 {copied_mb:.0f} MB） / 1回走査 1 回")
+
+    for label, result in (("1回走査", fused), ("1回走査（不動点まで）", fixed)):
+        differing = sum(1 for a, b in zip(result.splitlines(), legacy.splitlines()) if a != b)
+        print(f"従来方式と出力が異なる行（{label}）: {differing:,} 行")
+
+
+if __name__ == "__main__":
+    main()
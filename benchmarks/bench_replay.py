@@ -0,0 +1,334 @@
+"""スクレイピング → 統合ドキュメント → 翻訳 の全体を、ローカルのサーバーに再生したサイトで計測する
+
+合成サイト（ページのサイズと応答遅延は対数正規分布）または記録したアーカイブ
+（CleanCursorDocsScraper(archive=True) / crawler.py --archive の archive/）をローカルのサーバーで配信し、
+次の3つの段を順に実行する。各段は別のプロセスで実行し、そのプロセスのメモリ使用量のピーク（RSS）を記録する。
+
+- scrape: CleanCursorDocsScraper.scrape_docs（統合ドキュメントの作成は次の段で計測する）
+- combine: create_combined_documentation（scrape の pages.jsonl から作成する）
+- translate: FinalJapaneseTranslator.process_file（統合ドキュメントを翻訳する。用語集の読み込みは含めない）
+
+段ごとに ページ/秒・MB/秒（scrape は取得した本文、combine は書き込んだ統合ドキュメント、
+translate は入力の統合ドキュメントのサイズ）、ページあたりの処理時間の p50 / p99、RSS のピークを表示し、
+--output の JSON ファイルに保存する（コミットごとに保存して --compare で比較する）。
+段が失敗した場合（保存したページがない、翻訳の出力がない）や、--max-slowdown を超えて
+ページ/秒が下がった段がある場合は終了コード1で終了する。
+
+    python -m benchmarks.bench_replay --pages 300 --latency 0.02 --output replay.json
+    python -m benchmarks.bench_replay --corpus cursor_docs_clean/archive --latency 0.05
+    python -m benchmarks.bench_replay --output replay-new.json --compare replay.json --max-slowdown 0.2
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.local_docs_server import LocalDocsServer, build_docs_site
+from cursor_docs_scraper_clean import CleanCursorDocsScraper
+from final_japanese_translator import FinalJapaneseTranslator
+from page_store import PageStore
+from warc_archive import WarcArchive
+
+STAGES = ("scrape", "combine", "translate")
+COMBINED_FILE = "cursor_documentation_complete.md"
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, q):
+    """最近傍順位法による分位点（values が空なら 0）"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def peak_rss_mb():
+    """このプロセスのメモリ使用量（RSS）のピーク（MB）
+
+    Linux の ru_maxrss は exec 前のピーク（spawn したプロセスでは fork した親プロセスの RSS）を
+    引き継ぐため、/proc/self/status の VmHWM（exec 後のピーク）を使う。
+    """
+    try:
+        with open("/proc/self/status", "r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024  # KB
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024  # macOS はバイト、Linux は KB
+
+
+def stage_result(pages, seconds, size_bytes, page_seconds):
+    mb = size_bytes / (1024 * 1024)
+    return {
+        "pages": pages,
+        "seconds": round(seconds, 4),
+        "pages_per_sec": round(pages / seconds, 2) if seconds else 0.0,
+        "mb": round(mb, 3),
+        "mb_per_sec": round(mb / seconds, 3) if seconds else 0.0,
+        "latency_p50_ms": round(percentile(page_seconds, 0.50) * 1000, 3),
+        "latency_p99_ms": round(percentile(page_seconds, 0.99) * 1000, 3),
+    }
+
+
+def run_scrape(base_url, start_path, output_dir, max_pages, concurrency):
+    """scrape の段（ページあたりの時間は取得・解析・保存の合計で、待機時間は含めない）"""
+    scraper = CleanCursorDocsScraper(base_url=base_url, output_dir=output_dir, wait_time=0, use_cache=False)
+    page_seconds = {}
+    downloaded = [0]
+    lock = threading.Lock()
+
+    def timed(method):
+        def wrapper(url, *args):
+            start = time.perf_counter()
+            try:
+                return method(url, *args)
+            finally:
+                elapsed = time.perf_counter() - start
+                with lock:
+                    page_seconds[url] = page_seconds.get(url, 0.0) + elapsed
+        return wrapper
+
+    fetch_page = scraper.fetch_page
+
+    def fetch_and_count(url):
+        response = fetch_page(url)
+        with lock:
+            downloaded[0] += len(response.content)
+        return response
+
+    scraper.fetch_page = timed(fetch_and_count)
+    scraper.process_page = timed(scraper.process_page)
+    scraper.store_page = timed(scraper.store_page)
+    scraper.create_combined_documentation = lambda: None  # 統合ドキュメントは combine の段で計測する
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.scrape_docs(start_url=base_url + start_path, max_pages=max_pages, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    scraper.scraped_data.close()
+    result = stage_result(len(page_seconds), elapsed, downloaded[0], list(page_seconds.values()))
+    result["saved_pages"] = len(scraper.scraped_data)
+    return result
+
+
+class _TimedPages:
+    """PageStore を包み、統合ドキュメントに1ページを書き込むごとの時間（読み出しを含む）を記録する"""
+
+    def __init__(self, store):
+        self.store = store
+        self.page_seconds = []
+
+    def toc(self):
+        return self.store.toc()
+
+    def __len__(self):
+        return len(self.store)
+
+    def __iter__(self):
+        start = time.perf_counter()
+        for page in self.store:
+            yield page
+            now = time.perf_counter()
+            self.page_seconds.append(now - start)
+            start = now
+
+
+def run_combine(pages_path, output_dir):
+    """combine の段"""
+    scraper = CleanCursorDocsScraper(output_dir=output_dir, use_cache=False, respect_robots=False)
+    pages = _TimedPages(PageStore(pages_path, truncate=False))
+    scraper.scraped_data = pages
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        scraper.create_combined_documentation()
+    elapsed = time.perf_counter() - start
+    return stage_result(len(pages), elapsed, os.path.getsize(os.path.join(output_dir, COMBINED_FILE)),
+                        pages.page_seconds)
+
+
+def run_translate(input_path, output_path, cache_dir, pages):
+    """translate の段（ページあたりの時間は、統合ドキュメントの ## 見出しから次の ## 見出しまで）"""
+    translator = FinalJapaneseTranslator(cache_dir=cache_dir)
+    translator.input_file = input_path
+    translator.output_file = output_path
+    translator.load_glossary()
+    page_seconds = [0.0]  # 先頭はタイトルと説明
+    translate_segment = translator.translate_segment
+
+    def timed(kind, segment, counts=None, finalize=True):
+        if segment.startswith("## "):
+            page_seconds.append(0.0)
+        start = time.perf_counter()
+        translated = translate_segment(kind, segment, counts, finalize)
+        page_seconds[-1] += time.perf_counter() - start
+        return translated
+
+    translator.translate_segment = timed
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        ok = translator.process_file()
+    elapsed = time.perf_counter() - start
+    result = stage_result(pages, elapsed, os.path.getsize(input_path), page_seconds[1:])
+    result["startup_ms"] = round(translator.startup_stats["load_ms"] + translator.startup_stats["matcher_ms"], 3)
+    result["output_mb"] = round(os.path.getsize(output_path) / (1024 * 1024), 3) if ok else 0.0
+    return result
+
+
+def _run_in_child(function, args):
+    result = function(*args)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_stage(function, *args):
+    """段を新しいプロセス（spawn）で実行し、結果に RSS のピークを加えて返す"""
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(_run_in_child, function, args).result()
+
+
+def load_archive_site(directory):
+    """アーカイブの最新のレスポンスを パス → 本文 の辞書にし、(サイト, 最初のパス) を返す
+
+    サーバーは Content-Type を utf-8 の HTML として配信するため、UTF-8 のサイトを記録したものを使う。
+    ページ内の絶対URL（記録した元のホスト）のリンクは辿らない。
+    """
+    archive = WarcArchive(directory)
+    site = {}
+    try:
+        for url in archive.index:
+            site.setdefault(urlsplit(url).path or "/", archive.get(url).content)
+    finally:
+        archive.close()
+    return site, next(iter(site), "/")
+
+
+def git_commit():
+    """(コミットのハッシュ値, 未コミットの変更があるか)（git がなければ (None, None)）"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def format_stage(name, result):
+    line = (f"{name:<10} {result['pages']:>6} ページ {result['seconds']:8.2f}s {result['pages_per_sec']:9.1f} p/s "
+            f"{result['mb_per_sec']:8.2f} MB/s  p50 {result['latency_p50_ms']:8.2f} ms  "
+            f"p99 {result['latency_p99_ms']:8.2f} ms  RSS {result['peak_rss_mb']:7.1f} MB")
+    if "startup_ms" in result:
+        line += f"  (用語集の読み込み {result['startup_ms']:.1f} ms)"
+    return line
+
+
+def compare(baseline, results, max_slowdown=None):
+    """基準の結果と比較して表示し、ページ/秒が max_slowdown を超えて下がった段の数を返す"""
+    print(f"\n比較: {baseline.get('commit')} → {results.get('commit')}")
+    if baseline.get("params") != results["params"] or baseline.get("cpus") != results["cpus"]:
+        print("  注意: 計測の条件（引数・CPU数）が異なります")
+    regressions = 0
+    for name in STAGES:
+        old, new = baseline["stages"].get(name), results["stages"].get(name)
+        if not old or not new:
+            continue
+        changes = []
+        for key, label in (("pages_per_sec", "p/s"), ("mb_per_sec", "MB/s"), ("latency_p50_ms", "p50"),
+                           ("latency_p99_ms", "p99"), ("peak_rss_mb", "RSS")):
+            change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+            changes.append(f"{label} {old[key]:g} → {new[key]:g} ({change:+.0%})")
+        print(f"  {name:<10} " + "  ".join(changes))
+        if max_slowdown is not None and old["pages_per_sec"] and \
+                new["pages_per_sec"] < old["pages_per_sec"] * (1 - max_slowdown):
+            print(f"  {name}: ページ/秒が {max_slowdown:.0%} を超えて低下しました")
+            regressions += 1
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", type=int, default=300, help="合成サイトのページ数（取得する最大ページ数）")
+    parser.add_argument("--paragraphs", type=int, default=12, help="1ページあたりの段落数の中央値")
+    parser.add_argument("--size-sigma", type=float, default=0.8, help="ページサイズの対数正規分布の sigma（0 で一定）")
+    parser.add_argument("--latency", type=float, default=0.02, help="応答遅延の中央値（秒）")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="応答遅延の対数正規分布の sigma（0 で一定）")
+    parser.add_argument("--concurrency", type=int, default=1, help="scrape_docs の並行取得数")
+    parser.add_argument("--corpus", help="合成サイトの代わりに配信するアーカイブのディレクトリ（archive/）")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="replay_results.json", help="結果を保存する JSON ファイル")
+    parser.add_argument("--compare", help="比較する以前の結果の JSON ファイル")
+    parser.add_argument("--max-slowdown", type=float, default=None,
+                        help="--compare でページ/秒の低下がこの割合を超えたら終了コード1にする（例: 0.2）")
+    args = parser.parse_args()
+
+    if args.corpus:
+        site, start_path = load_archive_site(args.corpus)
+    else:
+        site = build_docs_site(args.pages, paragraphs=args.paragraphs, seed=args.seed, size_sigma=args.size_sigma)
+        start_path = "/welcome"
+    corpus_bytes = sum(len(body) for body in site.values())
+    print(f"コーパス: {len(site)} ページ {corpus_bytes / (1024 * 1024):.1f} MB"
+          f"（{'アーカイブ ' + args.corpus if args.corpus else '合成'}）  応答遅延 中央値 {args.latency * 1000:.0f} ms")
+
+    stages = {}
+    with tempfile.TemporaryDirectory() as work_dir:
+        scrape_dir = os.path.join(work_dir, "scrape")
+        combine_dir = os.path.join(work_dir, "combine")
+        with LocalDocsServer(site, latency=args.latency, latency_sigma=args.latency_sigma, seed=args.seed) as server:
+            stages["scrape"] = run_stage(run_scrape, server.base_url, start_path, scrape_dir, len(site),
+                                         args.concurrency)
+        stages["combine"] = run_stage(run_combine, os.path.join(scrape_dir, "pages.jsonl"), combine_dir)
+        stages["translate"] = run_stage(run_translate, os.path.join(combine_dir, COMBINED_FILE),
+                                        os.path.join(work_dir, "translated.md"), os.path.join(work_dir, "glossary_cache"),
+                                        stages["combine"]["pages"])
+    for name in STAGES:
+        print(format_stage(name, stages[name]))
+
+    commit, dirty = git_commit()
+    params = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "max_slowdown")}
+    results = {
+        "benchmark": "replay",
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "params": params,
+        "corpus": {"pages": len(site), "mb": round(corpus_bytes / (1024 * 1024), 3)},
+        "stages": stages,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    print(f"結果を保存しました: {args.output}")
+
+    failures = 0
+    if not stages["scrape"]["saved_pages"] or not stages["translate"]["output_mb"]:
+        print("失敗: 保存したページまたは翻訳の出力がありません")
+        failures += 1
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            failures += compare(json.load(f), results, args.max_slowdown)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
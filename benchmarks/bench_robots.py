@@ -0,0 +1,167 @@
+"""robots.txt によるリンクの判定を、変更前の実装（ルールごとの re.match）と RobotsRules で比較する
+
+1. 判定の確認: Allow / Disallow の優先順位（長い方が優先）、* と $、User-agent の
+   グループ、Crawl-delay について、期待通りの判定になることを確認する
+2. 出力の一致: Disallow だけの robots.txt では、変更前の実装と判定が一致することを確認する
+3. 速度: 数千件のリンクを含むページのリンクを、ルール数を変えて判定する時間を比較する
+   （変更前の実装はルール数が re モジュールのキャッシュ（512件）を超えると、照合のたびに
+   正規表現をコンパイルし直すため極端に遅くなる）
+
+いずれかの確認に失敗すると終了コード1で終了する。
+
+    python -m benchmarks.bench_robots --links 5000 --rules 10 100 400
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from urllib.parse import urlparse
+
+from robots import RobotsCache, RobotsRules
+
+HOST = "https://docs.cursor.com"
+
+ROBOTS_TXT = """
+User-agent: *
+Disallow: /private
+Allow: /private/public
+Disallow: /*.pdf$
+Disallow: /search?
+Crawl-delay: 2
+
+User-agent: crawler_txt
+Disallow: /
+Allow: /docs
+
+User-agent: python
+User-agent: bot
+Disallow: /
+"""
+
+# (User-agent, パス, 許可されるか)
+DECISION_CASES = [
+    ("python-requests/2.31", "/docs/intro", True),
+    ("python-requests/2.31", "/private", False),
+    ("python-requests/2.31", "/private/public/page", True),
+    ("python-requests/2.31", "/manual.pdf", False),
+    ("python-requests/2.31", "/manual.pdf.html", True),
+    ("python-requests/2.31", "/search?q=rules", False),
+    ("python-requests/2.31", "/search", True),
+    ("crawler_txt/1.0", "/docs/intro", True),
+    ("crawler_txt/1.0", "/private/public/page", False),
+    ("Crawler_TXT/1.0", "/docs/intro", True),
+    # 製品名は部分一致では選ばない（python / bot のグループは python-requests / mybot に適用しない）
+    ("mybot/1.0", "/docs/intro", True),
+    ("python/3.11", "/docs/intro", False),
+]
+
+
+# --- 変更前の実装 ---------------------------------------------------------
+
+def legacy_rules(robots_txt):
+    rules = []
+    for line in robots_txt.splitlines():
+        line = line.strip()
+        if line.lower().startswith("disallow:"):
+            path = line[len("disallow:"):].strip()
+            if path:
+                rules.append(re.escape(path).replace('\\*', '.*').replace('\\$', '$'))
+    return rules
+
+
+def legacy_is_allowed(url, disallowed_rules_by_domain):
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc
+    path_with_query = parsed_url.path + (f"?{parsed_url.query}" if parsed_url.query else "")
+    if path_with_query == "":
+        path_with_query = "/"
+    for pattern in disallowed_rules_by_domain.get(domain, []):
+        if re.match(pattern, path_with_query):
+            return False
+    return True
+
+
+# --------------------------------------------------------------------------
+
+class StaticRobotsCache(RobotsCache):
+    """robots.txt を取得せずに、指定した本文を使う RobotsCache"""
+
+    def __init__(self, robots_txt, user_agent="*"):
+        super().__init__(path=None, user_agent=user_agent)
+        self.robots_txt = robots_txt
+
+    def _fetch(self, origin):
+        return 200, self.robots_txt
+
+
+def build_robots_txt(rules, rng, allow=False):
+    lines = ["User-agent: *"]
+    for i in range(rules):
+        section = rng.choice(["docs", "api", "guides", "blog"])
+        path = rng.choice([f"/{section}/draft-{i}", f"/{section}/*/tmp-{i}", f"/*.{i}.json$"])
+        lines.append(f"{'Allow' if allow and i % 4 == 0 else 'Disallow'}: {path}")
+    return "\n".join(lines) + "\n"
+
+
+def build_links(count, rules, rng):
+    links = []
+    for i in range(count):
+        section = rng.choice(["docs", "api", "guides", "blog"])
+        kind = rng.random()
+        if kind < 0.1:
+            path = f"/{section}/draft-{rng.randrange(rules)}"
+        elif kind < 0.2:
+            path = f"/{section}/x/tmp-{rng.randrange(rules)}"
+        else:
+            path = f"/{section}/page-{i}"
+        links.append(f"{HOST}{path}?ref={i % 7}" if i % 5 == 0 else f"{HOST}{path}")
+    return links
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--links", type=int, default=5000, help="1ページあたりのリンク数")
+    parser.add_argument("--rules", type=int, nargs="+", default=[10, 100, 400], help="robots.txt のルール数")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    failures = 0
+    for user_agent, path, expected in DECISION_CASES:
+        allowed = RobotsRules.from_text(ROBOTS_TXT, user_agent).is_allowed(path)
+        if allowed != expected:
+            failures += 1
+            print(f"NG  {user_agent} {path}: {allowed}（期待: {expected}）")
+    delay = RobotsRules.from_text(ROBOTS_TXT, "python-requests/2.31").crawl_delay
+    if delay != 2.0:
+        failures += 1
+        print(f"NG  Crawl-delay: {delay}")
+    print(f"判定の確認: {len(DECISION_CASES) + 1 - failures} / {len(DECISION_CASES) + 1} OK")
+
+    print(f"リンクの判定（{args.links:,} 件/ページ）")
+    for rules in args.rules:
+        robots_txt = build_robots_txt(rules, rng)
+        links = build_links(args.links, rules, rng)
+        legacy = {urlparse(HOST).netloc: legacy_rules(robots_txt)}
+        robots = StaticRobotsCache(robots_txt)
+
+        differing = sum(1 for link in links if legacy_is_allowed(link, legacy) != robots.is_allowed(link))
+        failures += differing
+
+        timings = []
+        for check in (lambda link: legacy_is_allowed(link, legacy), robots.is_allowed):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                for link in links:
+                    check(link)
+            timings.append((time.perf_counter() - start) * 1000 / args.repeat)
+        print(f"  ルール {rules:>5} 件: 変更前 {timings[0]:8.2f} ms/ページ  RobotsRules {timings[1]:7.2f} ms/ページ "
+              f"({timings[0] / timings[1]:6.1f}x)  判定の不一致 {differing} 件")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
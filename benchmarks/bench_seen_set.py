@@ -0,0 +1,102 @@
+"""訪問済みURLの集合（set / fingerprint / bloom）のメモリ使用量と処理速度を比較する
+
+バックエンドごとに別のプロセスで N 件のURLを追加し、常駐メモリ（RSS）の増加量、
+追加と検索のスループット、未追加のURLを含むと誤判定した割合を表示する。
+URLは実際のドキュメントサイトに近い長さ（約60文字）の文字列をその場で生成する。
+fingerprint で誤判定が起きた場合や、bloom の誤判定率が error_rate の2倍を超えた場合は
+終了コード1で終了する。
+
+    python -m benchmarks.bench_seen_set --urls 1000000 10000000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from seen_set import SEEN_SET_KINDS, make_seen_set
+
+
+def make_url(index):
+    return f"https://docs.cursor.com/docs/section-{index % 1000}/page-{index}?lang=ja"
+
+
+def resident_bytes():
+    """現在の常駐メモリ（RSS）のバイト数"""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def run_worker(kind, urls, error_rate, lookups):
+    """1つのバックエンドを計測して結果を JSON で出力する（子プロセスで実行する）"""
+    before = resident_bytes()
+    seen = make_seen_set(kind, error_rate=error_rate)
+
+    start = time.perf_counter()
+    for index in range(urls):
+        seen.add(make_url(index))
+    add_time = time.perf_counter() - start
+    memory = resident_bytes() - before
+
+    start = time.perf_counter()
+    missing = sum(1 for index in range(0, urls, max(1, urls // lookups)) if make_url(index) not in seen)
+    false_positives = sum(1 for index in range(urls, urls + lookups) if make_url(index) in seen)
+    lookup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for index in range(urls):
+        make_url(index)
+    generate_time = time.perf_counter() - start
+
+    print(json.dumps({
+        "kind": kind, "urls": urls, "memory": memory, "length": len(seen),
+        "add_time": add_time, "lookup_time": lookup_time, "lookups": 2 * lookups,
+        "generate_time": generate_time, "missing": missing, "false_positives": false_positives,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--urls", type=int, nargs="+", default=[1000000, 10000000], help="追加するURL数")
+    parser.add_argument("--kinds", nargs="+", choices=SEEN_SET_KINDS, default=list(SEEN_SET_KINDS))
+    parser.add_argument("--error-rate", type=float, default=0.001, help="bloom の誤判定率")
+    parser.add_argument("--lookups", type=int, default=100000, help="検索する追加済み・未追加のURL数（それぞれ）")
+    parser.add_argument("--worker", nargs=2, metavar=("KIND", "URLS"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker[0], int(args.worker[1]), args.error_rate, args.lookups)
+        return
+
+    failures = 0
+    print(f"{'URL数':>12}  {'方式':<12} {'メモリ':>10} {'バイト/URL':>10} {'追加':>14} {'検索':>14} {'誤判定率':>9}")
+    for urls in args.urls:
+        for kind in args.kinds:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_seen_set", "--worker", kind, str(urls),
+                 "--error-rate", str(args.error_rate), "--lookups", str(args.lookups)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            # URL文字列の生成にかかった時間を除いた追加の時間
+            add_rate = urls / max(result["add_time"] - result["generate_time"], 1e-9)
+            lookup_rate = result["lookups"] / result["lookup_time"]
+            fp_rate = result["false_positives"] / args.lookups
+            print(f"{urls:>12,}  {kind:<12} {result['memory'] / (1024 * 1024):7.1f} MB "
+                  f"{result['memory'] / urls:10.1f} {add_rate / 1e6:8.2f} M件/s "
+                  f"{lookup_rate / 1e6:8.2f} M件/s {fp_rate:9.4%}")
+            if result["missing"]:
+                print(f"  NG  追加したURLのうち {result['missing']} 件を含まないと判定しました")
+                failures += 1
+            if kind == "fingerprint" and result["false_positives"]:
+                failures += 1
+            if kind == "bloom" and fp_rate > 2 * args.error_rate:
+                failures += 1
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""コード・URLを除外したセグメント単位の翻訳と、文書全体の翻訳を比較する
+
+コードブロック・インラインコード・**URL:** の行を含む合成マークダウン文書を作成し、
+マッチャーが走査する文字数と所要時間を比較する。あわせて、翻訳後もコードブロック・
+インラインコード・URL が原文のまま残っていることを確認する。
+回帰ケース（固定の入力と期待する翻訳結果）は comprehensive_translate と translate_stream の
+両方で確認する。違反や不一致があれば終了コード1で終了する。
+
+    python -m benchmarks.bench_segmenter --size-mb 20
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_translation_engine import BASIC_TRANSLATIONS, FILLER
+from final_japanese_translator import FinalJapaneseTranslator
+from markdown_segments import CODE, iter_segments, iter_spans
+
+# コード中に現れやすい、辞書にも含まれる語
+CODE_WORDS = ["Code", "Files", "Auto", "Tab", "Agent", "Mode", "Terminal", "Settings"]
+
+# (説明, 入力のマークダウン, 期待する翻訳結果)
+REGRESSION_CASES = [
+    (
+        "段落の語を翻訳する",
+        "Open the settings to change the model.\n\n",
+        "Open the 設定 to change the model.\n\n",
+    ),
+    (
+        "コードブロック内の語は空行をまたいでも翻訳しない",
+        "```\nconst settings = openSettings('Agent Mode');\n\nrun(settings)\n```\n\n",
+        "```\nconst settings = openSettings('Agent Mode');\n\nrun(settings)\n```\n\n",
+    ),
+    (
+        "段落内のインラインコードは翻訳しない",
+        "Press `Cmd+K` to open the settings and use Agent mode.\n\n",
+        "Press `Cmd+K` to open the 設定 and use エージェントモード.\n\n",
+    ),
+    (
+        "リスト項目内のインラインコードは翻訳しない",
+        "• Press `Tab` to open the settings\n• Run `cursor settings` in the terminal\n\n",
+        "• Press `Tab` to open the 設定\n• Run `cursor settings` in the ターミナル\n\n",
+    ),
+    (
+        "**URL:** の行は翻訳しない",
+        "## Settings\n\n**URL:** https://docs.cursor.com/settings/agent\n\n",
+        "## 設定\n\n**URL:** https://docs.cursor.com/settings/agent\n\n",
+    ),
+    (
+        "段落内のURLは翻訳しない",
+        "See https://docs.cursor.com/settings for the settings of the agent.\n\n",
+        "See https://docs.cursor.com/settings for the 設定 of the エージェント.\n\n",
+    ),
+    (
+        "閉じられなかったコードブロックは文書の終わりまでコードとして扱う",
+        "Open the settings.\n\n```\nconst settings = 1;\n\nOpen the settings\n",
+        "Open the 設定.\n\n```\nconst settings = 1;\n\nOpen the settings\n",
+    ),
+]
+
+
+def _code_block(rng):
+    lines = []
+    for _ in range(rng.randint(3, 12)):
+        name = rng.choice(CODE_WORDS)
+        lines.append(f"const {name.lower()}{name} = await cursor.{name}('{rng.choice(CODE_WORDS)} {name}');")
+        if rng.random() < 0.2:
+            lines.append("")
+    return "```\n" + "\n".join(lines) + "\n```"
+
+
+def build_page_document(size_bytes, seed=0, unit_bytes=1024 * 1024):
+    """create_combined_documentation の出力に似た合成文書を作成する"""
+    rng = random.Random(seed)
+    terms = list(BASIC_TRANSLATIONS)
+    blocks = []
+    length = 0
+    page = 0
+    while length < min(size_bytes, unit_bytes):
+        page += 1
+        blocks.append(f"## {rng.choice(terms)} {page}")
+        blocks.append(f"**URL:** https://docs.cursor.com/{rng.choice(CODE_WORDS).lower()}/{page}")
+        blocks.append("---")
+        for _ in range(rng.randint(3, 8)):
+            roll = rng.random()
+            if roll < 0.35:
+                blocks.append(_code_block(rng))
+            elif roll < 0.5:
+                blocks.append("\n".join(
+                    f"• Press `{rng.choice(CODE_WORDS)}` to open {rng.choice(terms)}" for _ in range(3)
+                ))
+            else:
+                words = [rng.choice(terms) if rng.random() < 0.2 else rng.choice(FILLER)
+                         for _ in range(rng.randint(8, 30))]
+                blocks.append(" ".join(words) + f". See https://docs.cursor.com/{rng.choice(terms).lower()}.")
+        length = sum(len(block) + 2 for block in blocks)
+    unit = "\n\n".join(blocks) + "\n\n"
+    repeat = max(1, round(size_bytes / len(unit.encode("utf-8"))))
+    return unit * repeat
+
+
+def scanned_chars(content):
+    """マッチャーに渡される文字数を返す"""
+    return sum(
+        end - start
+        for kind, segment in iter_segments(content.splitlines(True))
+        for translatable, start, end in iter_spans(kind, segment)
+        if translatable
+    )
+
+
+def check_untouched(source, translated):
+    """コードブロックと翻訳しない部分が原文のまま残っているかを確認し、違反の数を返す"""
+    source_segments = list(iter_segments(source.splitlines(True)))
+    translated_segments = list(iter_segments(translated.splitlines(True)))
+    if len(source_segments) != len(translated_segments):
+        print(f"セグメント数が異なります: {len(source_segments)} != {len(translated_segments)}")
+        return 1
+    violations = 0
+    for (kind, before), (_, after) in zip(source_segments, translated_segments):
+        if kind == CODE:
+            violations += before != after
+            continue
+        protected = [before[start:end] for translatable, start, end in iter_spans(kind, before) if not translatable]
+        kept = [after[start:end] for translatable, start, end in iter_spans(kind, after) if not translatable]
+        violations += protected != kept
+    return violations
+
+
+def run_regression(translator):
+    """REGRESSION_CASES を文書全体（comprehensive_translate）とファイル（translate_stream）で翻訳し、不一致の数を返す"""
+    failures = 0
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = os.path.join(work_dir, "input.md")
+        output_path = os.path.join(work_dir, "output.md")
+        for description, source, expected in REGRESSION_CASES:
+            with open(input_path, "w", encoding="utf-8") as f:
+                f.write(source)
+            translator.translate_stream(input_path, output_path)
+            with open(output_path, encoding="utf-8") as f:
+                streamed = f.read()
+            results = [translator.comprehensive_translate(source), streamed]
+            ok = all(result == expected for result in results)
+            failures += not ok
+            print(f"  {'OK ' if ok else 'NG '} {description}")
+            if not ok:
+                print(f"      期待: {expected!r}")
+                for name, result in zip(("comprehensive_translate", "translate_stream"), results):
+                    print(f"      {name}: {result!r}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=20.0)
+    args = parser.parse_args()
+
+    content = build_page_document(int(args.size_mb * 1024 * 1024))
+    size_mb = len(content.encode("utf-8")) / (1024 * 1024)
+    translator = FinalJapaneseTranslator()
+    engine = translator.get_engine()
+
+    print("回帰ケース:")
+    failures = run_regression(translator)
+
+    scanned = scanned_chars(content)
+    print(f"文書サイズ: {size_mb:.1f} MB / 走査する文字数: {scanned:,} / {len(content):,}"
+          f"（{scanned / len(content) * 100:.1f}%）")
+
+    start = time.perf_counter()
+    whole = engine.translate(content)
+    whole_time = time.perf_counter() - start
+    print(f"文書全体を翻訳:       {whole_time:8.2f} s  ({size_mb / whole_time:6.1f} MB/s)")
+
+    start = time.perf_counter()
+    segmented = translator.comprehensive_translate(content)
+    segmented_time = time.perf_counter() - start
+    print(f"セグメント単位で翻訳: {segmented_time:8.2f} s  ({size_mb / segmented_time:6.1f} MB/s)")
+
+    print(f"コード・URLの変更（文書全体を翻訳）: {check_untouched(content, whole):,} セグメント")
+    violations = check_untouched(content, segmented)
+    print(f"コード・URLの変更（セグメント単位）: {violations:,} セグメント")
+    if violations or failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
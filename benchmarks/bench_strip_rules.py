@@ -0,0 +1,66 @@
+"""不要な要素の除去について、1回走査の StripRuleSet とセレクタごとの soup.select を比較する
+
+コーパスの各ページを解析し、除去ルール（CleanCursorDocsScraper 用と crawler.py 用）を
+両方式で適用して、ページあたりの時間と、除去後の文書が一致することを確認する
+（不一致があれば終了コード1）。
+
+    python -m benchmarks.bench_strip_rules --pages 100 --paragraphs 40
+"""
+import argparse
+import sys
+import time
+
+from benchmarks.bench_parsers import build_corpus, load_corpus
+from html_parsing import DEFAULT_PARSER, parse_html
+from strip_rules import CURSOR_DOCS_SELECTORS, GENERIC_SELECTORS, StripRuleSet
+
+
+def legacy_remove(soup, selectors):
+    """変更前の方式（セレクタごとに文書全体を soup.select する）"""
+    for selector in selectors:
+        for element in soup.select(selector):
+            element.decompose()
+
+
+def measure(corpus, parser, strip):
+    """各ページを解析して strip(soup) を適用し、(合計時間, 除去後のHTMLのリスト) を返す"""
+    elapsed = 0.0
+    results = []
+    for _, body in corpus:
+        soup = parse_html(body, parser)
+        start = time.perf_counter()
+        strip(soup)
+        elapsed += time.perf_counter() - start
+        results.append(str(soup))
+    return elapsed, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="保存済みページ（*.html）のディレクトリ")
+    parser.add_argument("--pages", type=int, default=100, help="合成サイトのページ数")
+    parser.add_argument("--paragraphs", type=int, default=40, help="合成ページあたりの段落数")
+    parser.add_argument("--parser", default=DEFAULT_PARSER, help="HTMLパーサーのバックエンド")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus) if args.corpus else build_corpus(args.pages, args.paragraphs)
+    pages = len(corpus)
+    print(f"コーパス: {pages} ページ / パーサー: {args.parser}")
+
+    mismatches = 0
+    for label, selectors in (("CleanCursorDocsScraper", CURSOR_DOCS_SELECTORS), ("crawler.py", GENERIC_SELECTORS)):
+        rules = StripRuleSet(selectors)
+        legacy_time, legacy_html = measure(corpus, args.parser, lambda soup: legacy_remove(soup, selectors))
+        fused_time, fused_html = measure(corpus, args.parser, rules.apply)
+        differing = sum(1 for a, b in zip(legacy_html, fused_html) if a != b)
+        mismatches += differing
+        print(f"{label}（{len(selectors)} セレクタ）")
+        print(f"  セレクタごとの select: {legacy_time * 1000 / pages:7.3f} ms/ページ")
+        print(f"  1回走査:               {fused_time * 1000 / pages:7.3f} ms/ページ"
+              f"  ({legacy_time / fused_time:.1f}x)  結果の不一致 {differing} ページ")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
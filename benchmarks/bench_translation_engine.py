@@ -0,0 +1,103 @@
+"""翻訳エンジン（1回走査）と従来の辞書ごとの re.sub 方式の速度を比較する
+
+合成したマークダウン文書（既定 50 MB）に対して両方式で翻訳を実行し、
+所要時間・スループットと、出力が異なる行数を表示する。
+
+    python -m benchmarks.bench_translation_engine --size-mb 50
+"""
+import argparse
+import random
+import re
+import tempfile
+import time
+
+import glossary
+from final_japanese_translator import FinalJapaneseTranslator
+
+_TABLES = glossary.Glossary.load().tables
+BASIC_TRANSLATIONS = _TABLES["basic"]
+COMPOUND_TRANSLATIONS = _TABLES["compound"]
+SENTENCE_TRANSLATIONS = _TABLES["sentence"]
+
+FILLER = [
+    "the", "your", "with", "and", "to", "of", "in", "for", "when", "you", "can",
+    "use", "editor", "project", "workspace", "open", "select", "press", "enable",
+    "configure", "file", "this", "that", "will", "from", "into", "each", "new",
+]
+
+
+def legacy_comprehensive_translate(content):
+    """変更前の comprehensive_translate（辞書の項目ごとに文書全体を re.sub する）"""
+    translated = content
+    for english, japanese in sorted(COMPOUND_TRANSLATIONS.items(), key=len, reverse=True):
+        translated = re.compile(re.escape(english), re.IGNORECASE).sub(japanese, translated)
+    for english, japanese in sorted(SENTENCE_TRANSLATIONS.items(), key=len, reverse=True):
+        translated = re.compile(re.escape(english), re.IGNORECASE).sub(japanese, translated)
+    for english, japanese in BASIC_TRANSLATIONS.items():
+        pattern = re.compile(r'\b' + re.escape(english) + r'\b', re.IGNORECASE)
+        translated = pattern.sub(japanese, translated)
+    return translated
+
+
+def build_document(size_bytes, seed=0, unit_bytes=1024 * 1024):
+    """辞書の語と一般的な英単語を混ぜた合成マークダウン文書を作成する"""
+    rng = random.Random(seed)
+    terms = list(BASIC_TRANSLATIONS) + list(COMPOUND_TRANSLATIONS) + list(SENTENCE_TRANSLATIONS)
+    lines = []
+    length = 0
+    while length < min(size_bytes, unit_bytes):
+        if rng.random() < 0.1:
+            line = "## " + " ".join(rng.choice(terms) for _ in range(rng.randint(1, 3)))
+        else:
+            words = [rng.choice(terms) if rng.random() < 0.2 else rng.choice(FILLER)
+                     for _ in range(rng.randint(8, 30))]
+            line = " ".join(words) + "."
+        lines.append(line)
+        lines.append("")
+        length += len(line.encode("utf-8")) + 2
+    unit = "\n".join(lines) + "\n"
+    repeat = max(1, round(size_bytes / len(unit.encode("utf-8"))))
+    return unit * repeat
+
+
+def timed(func, content):
+    start = time.perf_counter()
+    result = func(content)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=50.0)
+    parser.add_argument("--skip-legacy", action="store_true", help="従来方式の計測を省略する")
+    args = parser.parse_args()
+
+    content = build_document(int(args.size_mb * 1024 * 1024))
+    size_mb = len(content.encode("utf-8")) / (1024 * 1024)
+    rules = len(BASIC_TRANSLATIONS) + len(COMPOUND_TRANSLATIONS) + len(SENTENCE_TRANSLATIONS)
+    print(f"文書サイズ: {size_mb:.1f} MB / 辞書項目数: {rules}")
+
+    # 起動コスト: キャッシュなしの構築と、ディスクキャッシュからの復元を比較する
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for label in ("構築（キャッシュなし）", "復元（ディスクキャッシュ）"):
+            glossary._matcher_cache.clear()
+            re.purge()  # 別プロセスでの起動と同じ条件にする
+            translator = FinalJapaneseTranslator(cache_dir=cache_dir)
+            translator.get_engine()
+            print(f"マッチャー{label}: {translator.format_startup_stats()}")
+
+    engine_result, engine_time = timed(translator.comprehensive_translate, content)
+    print(f"1回走査エンジン: {engine_time:8.2f} s  ({size_mb / engine_time:6.1f} MB/s)")
+
+    if not args.skip_legacy:
+        legacy_result, legacy_time = timed(legacy_comprehensive_translate, content)
+        print(f"従来方式:       {legacy_time:8.2f} s  ({size_mb / legacy_time:6.1f} MB/s)")
+        print(f"高速化:         {legacy_time / engine_time:8.1f}x")
+        differing = sum(
+            1 for a, b in zip(engine_result.splitlines(), legacy_result.splitlines()) if a != b
+        )
+        print(f"出力が異なる行: {differing:,} 行（同じ位置では辞書順ではなく最長一致を選ぶことによる差分）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""ベンチマーク用のローカルHTTPドキュメントサーバー
+
+docs.cursor.com に似た構造の合成ドキュメントサイトを 127.0.0.1 上で配信する。
+応答ごとに人工的な遅延を入れられるので、ネットワーク待ちを含むクロールの
+壁時計時間をオフラインで再現できる。
+
+    with LocalDocsServer(build_docs_site(pages=50), latency=0.05) as server:
+        scraper = CleanCursorDocsScraper(base_url=server.base_url, ...)
+"""
+import hashlib
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = [
+    "Cursor", "Agent", "Mode", "Context", "Files", "Folders", "Code", "Terminal",
+    "Keyboard", "Shortcuts", "Models", "Rules", "Tab", "Custom", "Settings",
+    "editor", "project", "workspace", "changes", "feature", "request", "the",
+    "your", "with", "and", "to", "of", "in", "for", "when", "you", "can", "use",
+    "Codebase", "Indexing", "Background", "Agents", "Plans", "Usage", "Members",
+]
+
+PHRASES = [
+    "Cursor is an AI code editor", "Getting Started", "Keyboard Shortcuts",
+    "Custom API Keys", "Working with Context", "Large Codebases",
+    "Use the links below", "to learn more about", "what Cursor can do",
+]
+
+
+def _sentence(rng, words=14):
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.5:
+        text += " " + rng.choice(PHRASES)
+    return text[0].upper() + text[1:] + "."
+
+
+def build_page(rng, index, page_paths, links_per_page=5, paragraphs=6):
+    """1ページ分のHTMLを生成する"""
+    title = f"{rng.choice(PHRASES)} {index}"
+    links = [page_paths[(index + k) % len(page_paths)] for k in range(1, links_per_page + 1)]
+    nav_links = "".join(f'<li><a href="{path}">{path}</a></li>' for path in page_paths[:20])
+
+    body = [f"<h1>{title}</h1>"]
+    for p in range(paragraphs):
+        if p % 3 == 0:
+            body.append(f"<h2>{rng.choice(PHRASES)} section {p}</h2>")
+        body.append(f"<p>{_sentence(rng)} {_sentence(rng)}</p>")
+        if p % 2 == 1:
+            items = "".join(f"<li>{_sentence(rng, 6)}</li>" for _ in range(3))
+            body.append(f"<ul>{items}</ul>")
+        if p % 4 == 2:
+            body.append(f"<pre><code>const files = await cursor.open('{title}', {p});\nreturn files;</code></pre>")
+    related = "".join(f'<li><a href="{path}">Related page {path}</a></li>' for path in links)
+    body.append(f"<h2>Related</h2><ul>{related}</ul>")
+
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>{title}</title><style>body {{ margin: 0 }}</style></head><body>"
+        f"<header><a href=\"/welcome\">Cursor home page</a></header>"
+        f"<nav class=\"sidebar-nav\"><ul>{nav_links}</ul></nav>"
+        f"<main><article>{''.join(body)}</article></main>"
+        "<footer><p>Was this page helpful? Yes No</p></footer>"
+        "<script>window.analytics = {};</script></body></html>"
+    )
+
+
+def build_docs_site(pages=50, links_per_page=5, paragraphs=6, seed=0, size_sigma=0.0):
+    """パス -> HTML本文（bytes）の辞書として合成サイトを生成する
+
+    size_sigma > 0 の場合、ページごとの段落数を paragraphs を中央値とする対数正規分布にする
+    （少数の大きなページを含む、実際のサイトに近いサイズの分布）。
+    """
+    rng = random.Random(seed)
+    page_paths = ["/welcome"] + [f"/docs/page-{i}" for i in range(1, pages)]
+    site = {}
+    for i, path in enumerate(page_paths):
+        count = paragraphs
+        if size_sigma > 0:
+            count = max(1, round(paragraphs * rng.lognormvariate(0, size_sigma)))
+        site[path] = build_page(rng, i, page_paths, links_per_page, count).encode("utf-8")
+    return site
+
+
+class LocalDocsServer:
+    """合成サイトを別スレッドで配信するHTTPサーバー（with 文で起動・停止する）
+
+    latency_sigma > 0 の場合、応答遅延を latency を中央値とする対数正規分布にする。
+    """
+
+    def __init__(self, site, latency=0.0, host="127.0.0.1", port=0, latency_sigma=0.0, seed=0):
+        self.site = site
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self._rng = random.Random(seed)
+        self.request_count = 0
+        self.not_modified_count = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # keep-alive 時にヘッダーと本文の書き込みが Nagle で遅延しないようにする
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+            def do_GET(self):
+                with server._lock:
+                    server.request_count += 1
+                    latency = server.latency
+                    if latency and server.latency_sigma > 0:
+                        latency *= server._rng.lognormvariate(0, server.latency_sigma)
+                if latency:
+                    time.sleep(latency)
+                body = server.site.get(self.path.split("?")[0])
+                if body is None:
+                    self.send_error(404)
+                    return
+                etag = '"%s"' % hashlib.sha1(body).hexdigest()[:16]
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified_count += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
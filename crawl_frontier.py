@@ -0,0 +1,261 @@
+from collections import deque
+import os
+import sqlite3
+import time
+from urllib.parse import urlsplit
+
+from url_utils import url_fingerprint
+
+# URLの状態
+QUEUED = 0
+IN_FLIGHT = 1
+DONE = 2
+FAILED = 3
+STATE_NAMES = {QUEUED: "queued", IN_FLIGHT: "in_flight", DONE: "done", FAILED: "failed"}
+
+
+class CrawlFrontier:
+    """クロール対象のURLと状態（queued / in_flight / done / failed）を保存するSQLiteのフロンティア
+
+    URLは追加した順に取り出す（幅優先）。next(host) でホストを指定すると、そのホストの
+    URLのうち最も古いものを取り出す（ホストごとのキューとして使える）。状態の変更は checkpoint_every 件ごと、
+    または checkpoint_seconds 秒ごとにまとめてコミットする。中断後に同じファイルを
+    開くと、処理中（in_flight）だったURLをキューに戻して続きから再開できる
+    （最後のチェックポイント以降に処理したページは再取得される）。
+
+    完了したURLは compact() で64ビットのフィンガープリントだけの表に移し、
+    長いクロールでもファイルが肥大化しないようにする。
+    """
+
+    def __init__(self, path, checkpoint_every=20, checkpoint_seconds=5.0, seen_set=None):
+        """seen_set に FingerprintSet や ScalableBloomFilter を渡すと、登録済みのURLを
+        メモリ上でも管理し、未登録のURLの判定で SQLite を検索しないようにする"""
+        self.path = path
+        self.seen_set = seen_set
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_seconds = checkpoint_seconds
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS urls (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL UNIQUE,
+                depth INTEGER NOT NULL,
+                state INTEGER NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT,
+                updated REAL
+            );
+            CREATE INDEX IF NOT EXISTS urls_state ON urls (state, seq);
+            CREATE TABLE IF NOT EXISTS done_fingerprints (fingerprint INTEGER PRIMARY KEY) WITHOUT ROWID;
+            """
+        )
+        self._add_host_column()
+        # 前回の実行で処理中のまま中断されたURLをキューに戻す
+        self.resumed = self.connection.execute(
+            "UPDATE urls SET state = ? WHERE state = ?", (QUEUED, IN_FLIGHT)
+        ).rowcount
+        self.connection.commit()
+
+        # キューにあるURLのホストごとの件数（ホストを選ぶたびに SQLite を集計しないようにする）
+        self.queued_by_host = {}
+        self._count_queued()
+
+        if seen_set is not None:
+            for url, in self.connection.execute("SELECT url FROM urls"):
+                seen_set.add(url)
+            for fingerprint, in self.connection.execute("SELECT fingerprint FROM done_fingerprints"):
+                seen_set.add_fingerprint(fingerprint)
+
+    def _add_host_column(self):
+        """ホストの列がない（ホストごとのキューに対応する前の）ファイルに列を追加する"""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(urls)")]
+        if "host" not in columns:
+            with self.connection:
+                self.connection.execute("ALTER TABLE urls ADD COLUMN host TEXT")
+                rows = self.connection.execute("SELECT seq, url FROM urls").fetchall()
+                self.connection.executemany(
+                    "UPDATE urls SET host = ? WHERE seq = ?", ((urlsplit(url).netloc, seq) for seq, url in rows)
+                )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS urls_host ON urls (state, host, seq)")
+
+    def _count_queued(self):
+        self.queued_by_host = dict(self.connection.execute(
+            "SELECT host, COUNT(*) FROM urls WHERE state = ? GROUP BY host", (QUEUED,)
+        ).fetchall())
+
+    def queued_hosts(self):
+        """キューにURLが残っているホストのリスト"""
+        return [host for host, count in self.queued_by_host.items() if count]
+
+    def seen(self, url):
+        """URLが追加済み（完了して圧縮済みのものを含む）かを返す"""
+        if self.seen_set is not None:
+            if url not in self.seen_set:
+                return False
+            if self.seen_set.exact:
+                return True
+            # ブルームフィルタの誤判定でないことを SQLite で確認する
+        row = self.connection.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone()
+        if row is not None:
+            return True
+        return self.connection.execute(
+            "SELECT 1 FROM done_fingerprints WHERE fingerprint = ?", (url_fingerprint(url),)
+        ).fetchone() is not None
+
+    def add(self, url, depth):
+        """未登録のURLをキューに追加し、追加したかどうかを返す"""
+        if self.seen(url):
+            return False
+        host = urlsplit(url).netloc
+        self.connection.execute(
+            "INSERT INTO urls (url, depth, state, updated, host) VALUES (?, ?, ?, ?, ?)",
+            (url, depth, QUEUED, time.time(), host),
+        )
+        self.queued_by_host[host] = self.queued_by_host.get(host, 0) + 1
+        if self.seen_set is not None:
+            self.seen_set.add(url)
+        self._changed()
+        return True
+
+    def next(self, host=None):
+        """キューの先頭のURL（host を指定した場合はそのホストの先頭）を処理中にして
+        (URL, 深さ) を返す（空なら None）"""
+        if host is None:
+            row = self.connection.execute(
+                "SELECT seq, url, depth, host FROM urls WHERE state = ? ORDER BY seq LIMIT 1", (QUEUED,)
+            ).fetchone()
+        else:
+            row = self.connection.execute(
+                "SELECT seq, url, depth, host FROM urls WHERE state = ? AND host = ? ORDER BY seq LIMIT 1",
+                (QUEUED, host),
+            ).fetchone()
+        if row is None:
+            return None
+        seq, url, depth, host = row
+        self.queued_by_host[host] -= 1
+        self.connection.execute(
+            "UPDATE urls SET state = ?, attempts = attempts + 1, updated = ? WHERE seq = ?",
+            (IN_FLIGHT, time.time(), seq),
+        )
+        self._changed()
+        return url, depth
+
+    def mark_done(self, url):
+        self._set_state(url, DONE)
+
+    def mark_failed(self, url, error=None):
+        self._set_state(url, FAILED, str(error) if error is not None else None)
+
+    def requeue_failed(self, max_attempts=3):
+        """失敗したURLのうち試行回数が max_attempts 未満のものをキューに戻し、件数を返す"""
+        count = self.connection.execute(
+            "UPDATE urls SET state = ? WHERE state = ? AND attempts < ?", (QUEUED, FAILED, max_attempts)
+        ).rowcount
+        self._count_queued()
+        self.checkpoint()
+        return count
+
+    def _set_state(self, url, state, error=None):
+        self.connection.execute(
+            "UPDATE urls SET state = ?, error = ?, updated = ? WHERE url = ?",
+            (state, error, time.time(), url),
+        )
+        self._changed()
+
+    def _changed(self):
+        self._pending += 1
+        if (self._pending >= self.checkpoint_every
+                or time.monotonic() - self._last_checkpoint >= self.checkpoint_seconds):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """未コミットの変更をファイルに書き込む"""
+        self.connection.commit()
+        self._pending = 0
+        self._last_checkpoint = time.monotonic()
+
+    def compact(self):
+        """完了したURLをフィンガープリントの表に移し、移した件数を返す"""
+        self.checkpoint()
+        rows = self.connection.execute("SELECT url FROM urls WHERE state = ?", (DONE,)).fetchall()
+        if not rows:
+            return 0
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO done_fingerprints (fingerprint) VALUES (?)",
+                ((url_fingerprint(url),) for url, in rows),
+            )
+            self.connection.execute("DELETE FROM urls WHERE state = ?", (DONE,))
+        self.connection.execute("VACUUM")
+        return len(rows)
+
+    def counts(self):
+        """状態ごとのURL数と、圧縮済みの完了URL数を返す"""
+        counts = {name: 0 for name in STATE_NAMES.values()}
+        for state, count in self.connection.execute("SELECT state, COUNT(*) FROM urls GROUP BY state"):
+            counts[STATE_NAMES[state]] = count
+        counts["compacted"] = self.connection.execute("SELECT COUNT(*) FROM done_fingerprints").fetchone()[0]
+        return counts
+
+    def format_counts(self):
+        counts = self.counts()
+        return ", ".join(f"{name} {count:,}" for name, count in counts.items())
+
+    def close(self):
+        self.checkpoint()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class UrlQueue:
+    """メモリ上のフロンティア（訪問待ちのURLの順序付きキューと、訪問済みURLの集合）
+
+    キュー内のURLも集合で管理するため、リンクを追加するたびにキューを先頭から
+    走査する必要がなく、追加・取り出しとも O(1) で行える。URLは追加した順に取り出す
+    （幅優先）。URLの正規化は呼び出し側で行う（url_utils.normalize_url）。
+
+        queue = UrlQueue(visited=scraper.visited_urls)
+        queue.add(start_url)
+        while queue:
+            url = queue.pop()  # 取り出したURLは visited に追加される
+    """
+
+    def __init__(self, visited=None):
+        self.visited = visited if visited is not None else set()
+        self._queue = deque()
+        self._queued = set()
+
+    def add(self, url):
+        """訪問済みでもキュー内でもないURLを末尾に追加し、追加したかどうかを返す"""
+        if url in self._queued or url in self.visited:
+            return False
+        self._queue.append(url)
+        self._queued.add(url)
+        return True
+
+    def pop(self):
+        """先頭のURLを取り出し、訪問済みとして記録する"""
+        url = self._queue.popleft()
+        self._queued.discard(url)
+        self.visited.add(url)
+        return url
+
+    def __contains__(self, url):
+        return url in self._queued or url in self.visited
+
+    def __len__(self):
+        return len(self._queue)
@@ -0,0 +1,292 @@
+"""crawler.py のクロールを取得・解析・保存の段に分けて並行に実行するパイプライン
+
+    フロンティア → [取得キュー] → 取得スレッド × fetchers
+                → [解析キュー] → 解析ワーカー × parsers（別プロセス）
+                → [保存キュー] → 保存スレッド → フロンティアに完了とリンクを記録
+
+各段の間のキューには上限があり、後ろの段が詰まると前の段は空きができるまで待つ。
+run を呼んだスレッド（コーディネーター）は処理中のURLが max_in_flight 件に達すると
+フロンティアからの取り出しを止めるため、解析が追いつかないままフロンティアだけが進むことはない。
+フロンティア（SQLite）とスケジューラーを操作するのはコーディネーターだけである。
+
+ホストごとの待機時間は HostScheduler が守る。同じホストのページは同時に1件だけ取得し、
+取得が終わった時刻から待機時間を数えるので、解析・保存の間に次のページの待機が進む。
+
+段ごとの処理件数・スループット・稼働率・キューの長さは format_stats で表示できる
+（稼働率が100%に近い段のワーカーを増やし、キューが常に空の段は減らす）。
+"""
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlsplit
+
+from metrics import METRICS
+
+STAGES = ("fetch", "parse", "write")
+
+_STOP = object()
+
+
+def _ignore_interrupt():
+    """解析プロセスでは Ctrl+C を無視する（中断の処理はコーディネーターが行う）"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class StageStats:
+    """段ごとの処理件数・処理時間と、入力キューの長さ"""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy_time = 0.0  # ワーカーが処理していた時間の合計
+        self.blocked_time = 0.0  # 次の段のキューが満杯で待った時間の合計
+        self.queue_samples = 0
+        self.queue_total = 0
+        self.queue_max = 0
+        self._lock = threading.Lock()
+
+    def record(self, elapsed, ok=True):
+        with self._lock:
+            self.items += 1
+            self.errors += not ok
+            self.busy_time += elapsed
+
+    def record_blocked(self, elapsed):
+        with self._lock:
+            self.blocked_time += elapsed
+
+    def sample_queue(self, depth):
+        """入力キューにアイテムを入れたときのキューの長さを記録する"""
+        with self._lock:
+            self.queue_samples += 1
+            self.queue_total += depth
+            self.queue_max = max(self.queue_max, depth)
+
+
+class CrawlPipeline:
+    """取得・解析・保存を別々のワーカーで並行に実行するクロール
+
+    - fetch(url): ページを取得し、extract に渡す値のタプルを返す（取得スレッドで実行）
+    - extract(url, depth, *payload): (テキスト, リンク) を返す（解析プロセスで実行するため、
+      モジュールの関数か functools.partial であること）
+    - save(url, text): テキストを保存する（保存スレッドで実行）
+
+    use_processes=False の場合は解析もスレッドで実行する（extract が pickle できない場合など）。
+    """
+
+    def __init__(self, fetch, extract, save, fetchers=4, parsers=None, queue_size=None,
+                 max_in_flight=None, use_processes=True):
+        self.fetch = fetch
+        self.extract = extract
+        self.save = save
+        self.fetchers = fetchers
+        self.parsers = parsers or os.cpu_count() or 1
+        self.queue_size = queue_size or 2 * max(fetchers, self.parsers)
+        self.max_in_flight = max_in_flight or fetchers + self.parsers + 2 * self.queue_size
+        self.use_processes = use_processes
+        self.stats = {
+            "fetch": StageStats("fetch", fetchers),
+            "parse": StageStats("parse", self.parsers),
+            "write": StageStats("write", 1),
+        }
+        self.elapsed = 0.0
+
+    def _put(self, stage_queue, item, stage, sender=None):
+        """次の段のキューにアイテムを入れる（満杯なら空くまで待ち、待った時間を送り側に記録する）"""
+        started = time.monotonic()
+        stage_queue.put(item)
+        if sender is not None:
+            sender.record_blocked(time.monotonic() - started)
+        self.stats[stage].sample_queue(stage_queue.qsize())
+
+    def _fetch_worker(self):
+        stats = self.stats["fetch"]
+        while True:
+            item = self.fetch_queue.get()
+            if item is _STOP:
+                break
+            url, depth = item
+            started = time.monotonic()
+            try:
+                payload = self.fetch(url)
+            except Exception as e:
+                finished = time.monotonic()
+                stats.record(finished - started, ok=False)
+                self.events.put(("fetched", url, started, finished, False))
+                self.events.put(("failed", url, "fetch", e))
+                continue
+            finished = time.monotonic()
+            stats.record(finished - started)
+            self.events.put(("fetched", url, started, finished, True))
+            self._put(self.parse_queue, (url, depth, payload), "parse", stats)
+
+    def _parse_worker(self, pool):
+        stats = self.stats["parse"]
+        while True:
+            item = self.parse_queue.get()
+            if item is _STOP:
+                break
+            url, depth, payload = item
+            started = time.monotonic()
+            try:
+                if pool is None:
+                    text, links = self.extract(url, depth, *payload)
+                else:
+                    text, links = pool.submit(self.extract, url, depth, *payload).result()
+            except Exception as e:
+                stats.record(time.monotonic() - started, ok=False)
+                self.events.put(("failed", url, "parse", e))
+                continue
+            stats.record(time.monotonic() - started)
+            self._put(self.write_queue, (url, depth, text, links), "write", stats)
+
+    def _write_worker(self):
+        stats = self.stats["write"]
+        while True:
+            item = self.write_queue.get()
+            if item is _STOP:
+                break
+            url, depth, text, links = item
+            started = time.monotonic()
+            try:
+                self.save(url, text)
+            except Exception as e:
+                stats.record(time.monotonic() - started, ok=False)
+                self.events.put(("failed", url, "write", e))
+                continue
+            stats.record(time.monotonic() - started)
+            self.events.put(("done", url, depth, links))
+
+    def run(self, frontier, scheduler, enqueue_links, max_depth, compact_every=None):
+        """フロンティアが空になるまでクロールし、完了したページ数を返す
+
+        enqueue_links(url, depth, links) は保存が終わったページごとにコーディネーターで呼ばれる。
+        中断（KeyboardInterrupt）された場合も、保存まで終わったページは完了として記録する。
+        取得キューに残っていたURLは処理中のまま残り、次回の再開時にキューに戻される。
+        """
+        self.fetch_queue = queue.Queue(self.queue_size)
+        self.parse_queue = queue.Queue(self.queue_size)
+        self.write_queue = queue.Queue(self.queue_size)
+        self.events = queue.Queue()
+
+        pool = None
+        if self.use_processes:
+            pool = ProcessPoolExecutor(max_workers=self.parsers, initializer=_ignore_interrupt)
+        workers = {
+            "fetch": [threading.Thread(target=self._fetch_worker, daemon=True) for _ in range(self.fetchers)],
+            "parse": [threading.Thread(target=self._parse_worker, args=(pool,), daemon=True)
+                      for _ in range(self.parsers)],
+            "write": [threading.Thread(target=self._write_worker, daemon=True)],
+        }
+        for threads in workers.values():
+            for thread in threads:
+                thread.start()
+
+        in_flight = {}  # 処理中のURL → ホスト
+        busy_hosts = set()  # 取得中のホスト（同じホストのページは同時に1件だけ取得する）
+        progress = {"done": 0, "since_compact": 0}
+
+        def handle(event):
+            kind, url = event[0], event[1]
+            if kind == "fetched":
+                _, _, started, finished, ok = event
+                scheduler.record(url, started, ok, finished)
+                busy_hosts.discard(in_flight.get(url))
+            elif kind == "failed":
+                _, _, stage, error = event
+                if stage == "fetch":
+                    print(f"Error fetching {url}: {error}")
+                else:
+                    print(f"An error occurred while processing {url}: {error}")
+                METRICS.counter("crawler_pages_total").inc(result="error")
+                frontier.mark_failed(url, error)
+                in_flight.pop(url, None)
+            else:
+                _, _, depth, links = event
+                frontier.mark_done(url)
+                in_flight.pop(url, None)
+                progress["done"] += 1
+                progress["since_compact"] += 1
+                enqueue_links(url, depth, links)
+
+        started = time.monotonic()
+        try:
+            while True:
+                # 上限まで、アクセスできるホストのURLを取得キューに入れる
+                while len(in_flight) < self.max_in_flight:
+                    item = scheduler.next(block=False, exclude=busy_hosts)
+                    if item is None:
+                        break
+                    url, depth = item
+                    if depth > max_depth:
+                        print(f"Skipping {url} (depth exceeded)")
+                        frontier.mark_done(url)
+                        continue
+                    print(f"Depth {depth}: Scraping {url}")
+                    host = urlsplit(url).netloc
+                    busy_hosts.add(host)
+                    in_flight[url] = host
+                    self._put(self.fetch_queue, (url, depth), "fetch")
+
+                if not in_flight and scheduler.ready_in() is None:
+                    break
+
+                # 次のイベントを待つ（処理中のURLに空きがあれば、次のホストの待機が終わるまで）
+                timeout = None
+                if len(in_flight) < self.max_in_flight:
+                    timeout = scheduler.ready_in(exclude=busy_hosts)
+                try:
+                    handle(self.events.get(timeout=timeout))
+                    while True:
+                        handle(self.events.get_nowait())
+                except queue.Empty:
+                    pass
+
+                # 完了したURLが増えたらフィンガープリントに圧縮する
+                if compact_every and progress["since_compact"] >= compact_every:
+                    frontier.compact()
+                    progress["since_compact"] = 0
+        finally:
+            # 取得前のURLは破棄し（処理中のまま残る）、取得済みのページは保存まで終わらせる
+            try:
+                while True:
+                    self.fetch_queue.get_nowait()
+            except queue.Empty:
+                pass
+            for stage_queue, stage in ((self.fetch_queue, "fetch"), (self.parse_queue, "parse"),
+                                       (self.write_queue, "write")):
+                for _ in workers[stage]:
+                    stage_queue.put(_STOP)
+                for thread in workers[stage]:
+                    thread.join()
+            if pool is not None:
+                pool.shutdown(wait=True)
+            try:
+                while True:
+                    event = self.events.get_nowait()
+                    if event[0] == "done":
+                        handle(event)
+            except queue.Empty:
+                pass
+            self.elapsed = time.monotonic() - started
+
+        return progress["done"]
+
+    def format_stats(self):
+        """段ごとのワーカー数・件数・スループット・稼働率・キューの長さを表形式の文字列にする"""
+        elapsed = self.elapsed or 1e-9
+        lines = [f"{'stage':<6} {'workers':>7} {'items':>7} {'errors':>6} {'items/s':>8} "
+                 f"{'busy':>6} {'blocked':>8} {'avg queue':>9} {'max queue':>9}"]
+        for name in STAGES:
+            stats = self.stats[name]
+            average_queue = stats.queue_total / stats.queue_samples if stats.queue_samples else 0.0
+            lines.append(f"{name:<6} {stats.workers:>7} {stats.items:>7,} {stats.errors:>6,} "
+                         f"{stats.items / elapsed:>8.1f} "
+                         f"{stats.busy_time / (elapsed * stats.workers) * 100:>5.0f}% "
+                         f"{stats.blocked_time:>7.1f}s {average_queue:>9.1f} {stats.queue_max:>9}")
+        return "\n".join(lines)
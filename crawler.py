@@ -1,153 +1,85 @@
+import argparse
+import functools
 import requests
-from bs4 import BeautifulSoup
+import sys
 from urllib.parse import urljoin, urlparse
 import time
-from collections import deque
 import os
 import re
 
+from crawl_frontier import CrawlFrontier
+from crawl_pipeline import CrawlPipeline
+from dedup import ContentDeduplicator
+from host_scheduler import HostScheduler, PolitenessPolicy
+from html_parsing import parse_html, response_charset
+from http_client import get_default_client
+from metrics import METRICS, MetricsReporter, add_metrics_arguments
+from profiling import profiled
+from robots import RobotsCache
+from seen_set import FingerprintSet, ScalableBloomFilter
+from strip_rules import GENERIC_SELECTORS, compile_strip_rules
+from url_utils import normalize_url
+from warc_archive import WarcArchive
+
 # クロール設定
 # START_URL = "https://" # コードから直接指定する START_URL は削除またはコメントアウト
 # DOMAIN = urlparse(START_URL).netloc # DOMAIN の決定方法も変更が必要
 
 MAX_DEPTH = 2 # リンクを辿る最大の深さ
-WAIT_TIME = 1 # 各ページ取得間の待機時間（秒）。サーバー負荷軽減のため必須！
+HTML_PARSER = None # HTMLパーサー（None の場合は lxml、未インストールなら html.parser）
+
+# --- 不要な要素の削除ルール ---
+# 対象サイトのHTML構造に合わせて、ドメインごとに削除する要素のセレクタを指定してください
+# （ヘッダー、フッター、ナビゲーション、サイドバーなど）。指定のないドメインには GENERIC_SELECTORS を使います。
+# 例: SITE_STRIP_SELECTORS = {"www.nip-ltd.co.jp": GENERIC_SELECTORS + ('.breadcrumb', '#side')}
+SITE_STRIP_SELECTORS = {}
+WAIT_TIME = 1 # 同じホストへのページ取得間の待機時間（秒）。サーバー負荷軽減のため必須！
+# ホストごとの待機時間（秒）。指定のないホストには WAIT_TIME を使う
+# 例: HOST_WAIT_TIMES = {"www.nip-ltd.co.jp": 3}
+HOST_WAIT_TIMES = {}
 OUTPUT_DIR = "scraped_text" # 抽出したテキストを保存するディレクトリ
-# ROBOTS_TXT_URL = f"https://{DOMAIN}/robots.txt" # DOMAIN が決まってから設定
+ROBOTS_CACHE_FILE = "robots_cache.json" # OUTPUT_DIR 内に robots.txt をキャッシュする（ROBOTS_CACHE_TTL の間は再取得しない）
+ARCHIVE_DIR = "archive" # --archive で取得したレスポンスを保存する OUTPUT_DIR 内のディレクトリ
 
 # --- 追加: URLリストファイルのパス ---
 URL_LIST_FILE = "urls.txt" # ここでURLリストファイルのパスを指定します
 
-# 既に訪れたURLを記録するためのセット
-visited_urls = set()
-# 探索待ちのURLとその深さを格納するキュー
-urls_to_visit = deque() # 初期状態では空のキューを作成
+# --- クロール状態（フロンティア）の保存 ---
+FRONTIER_FILE = "frontier.sqlite" # OUTPUT_DIR 内に保存する。中断後は同じファイルから再開する
+CHECKPOINT_EVERY = 20 # この件数の状態変更ごとにフロンティアをディスクに書き込む
+COMPACT_EVERY = 10000 # 完了したURLがこの件数たまるごとにフィンガープリントへ圧縮する
+
+# 全リクエストで共有するHTTPクライアント（keep-alive・圧縮・リトライ・計測）
+http_client = get_default_client()
+
+# 保存したページのテキストのハッシュ値（同じ内容のページを重複して保存しない）
+deduplicator = ContentDeduplicator()
+
+# 取得したレスポンスのアーカイブ（--archive 指定時に main で作成する）
+page_archive = None
+
+# ドメイン → コンパイル済みの不要な要素の削除ルール
+_strip_rules_by_domain = {}
 
-# robots.txt の Disallow ルールを格納するリスト
-disallowed_paths_by_domain = {} # ドメインごとに Disallow ルールを格納するように変更
+# --profile で計測する関数
+PROFILED_FUNCTIONS = ("scrape_and_find_links", "fetch_page", "extract_page", "save_text")
 
-# 出力ディレクトリを作成
-if not os.path.exists(OUTPUT_DIR):
-    os.makedirs(OUTPUT_DIR)
+# 計測値（metrics.METRICS）
+_EXTRACT_SECONDS = METRICS.histogram("crawler_extract_seconds", "解析したページからのテキスト・リンクの抽出にかかった時間")
+_PAGES = METRICS.counter("crawler_pages_total", "処理したページ数（result: saved / duplicate / error）")
+_OUTPUT_BYTES = METRICS.counter("crawler_output_bytes_total", "保存したテキストファイルのバイト数")
 
-# --- 修正: URLリストファイルからURLを読み込む ---
-print(f"Loading URLs from {URL_LIST_FILE}...")
-initial_urls = []
-try:
-    with open(URL_LIST_FILE, "r", encoding="utf-8") as f:
+
+def load_url_list(path):
+    """URLリストファイルから初期URLを読み込む（空行と # で始まる行は無視する）"""
+    initial_urls = []
+    with open(path, "r", encoding="utf-8") as f:
         for line in f:
             line = line.strip()
             # 空行やコメント行を無視
             if line and not line.startswith("#"):
                 initial_urls.append(line)
-except FileNotFoundError:
-    print(f"エラー: URLリストファイル '{URL_LIST_FILE}' が見つかりません。ファイルを作成してください。")
-    exit() # ファイルが見つからなければプログラムを終了
-except Exception as e:
-    print(f"エラー: URLリストファイルの読み込み中にエラーが発生しました: {e}")
-    exit() # 読み込みエラーが発生したらプログラムを終了
-
-if not initial_urls:
-    print(f"エラー: URLリストファイル '{URL_LIST_FILE}' に有効なURLが含まれていません。URLを記述してください。")
-    exit() # 有効なURLがなければプログラムを終了
-
-# 初期URLをキューに追加し、対応するドメインの robots.txt ルールをロードする
-domains_to_load_robots_txt = set()
-for url in initial_urls:
-    urls_to_visit.append((url, 0))
-    try:
-        domain = urlparse(url).netloc
-        if domain:
-            domains_to_load_robots_txt.add(domain)
-    except Exception as e:
-        print(f"Warning: Could not parse domain from URL {url}: {e}")
-
-
-"""# --- robots.txt をドメインごとに読み込む ---
-print("Loading robots.txt for relevant domains...")
-for domain in domains_to_load_robots_txt:
-    robots_txt_url = f"https://{domain}/robots.txt"
-    print(f"Attempting to load robots.txt from {robots_txt_url}...")
-    disallowed_paths = load_robots_txt(robots_txt_url)
-    disallowed_paths_by_domain[domain] = disallowed_paths
-    if disallowed_paths:
-        print(f"Disallowed paths found for {domain}:")
-        for path in disallowed_paths:
-            print(f"- {path}")
-    else:
-        print(f"No Disallow rules found in robots.txt for {domain} or failed to load.")
-"""
-
-def load_robots_txt(robots_url):
-    """robots.txt ファイルを読み込み、Disallow ルールを取得する"""
-    rules = []
-    try:
-        response = requests.get(robots_url, timeout=5)
-        response.raise_for_status()
-        # UTF-8でデコードできない場合は他のエンコーディングも試す
-        try:
-            content = response.content.decode('utf-8')
-        except UnicodeDecodeError:
-            try:
-                content = response.content.decode('shift_jis')
-            except Exception:
-                 content = response.text # requests に自動判定させる
-
-        for line in content.splitlines():
-            line = line.strip()
-            # Allow ディレクティブも考慮する場合はここにロジックを追加する必要がありますが、
-            # シンプルな Disallow 回避のためにここでは Disallow のみ見ます。
-            if line.lower().startswith("disallow:"):
-                path = line[len("disallow:"):].strip()
-                if path:
-                    # robots.txt のパスパターンを正規表現に変換 (簡易的なもの)
-                    # * は任意の文字列、$ は行末にマッチ
-                    # エスケープしてから置換
-                    path_pattern = re.escape(path).replace('\\*', '.*').replace('\\$', '$')
-                    rules.append(path_pattern)
-        return rules
-    except requests.exceptions.RequestException as e:
-        # print(f"Warning: Could not fetch robots.txt from {robots_url}: {e}") # メッセージは上で出力済み
-        return [] # 取得できない場合はルールなしとして続行 (倫理的にはアクセスすべきでない)
-    except Exception as e:
-        # print(f"Warning: Error processing robots.txt from {robots_url}: {e}") # メッセージは上で出力済み
-        return []
-
-# --- robots.txt をドメインごとに読み込む ---
-print("Loading robots.txt for relevant domains...")
-for domain in domains_to_load_robots_txt:
-    robots_txt_url = f"https://{domain}/robots.txt"
-    print(f"Attempting to load robots.txt from {robots_txt_url}...")
-    disallowed_paths = load_robots_txt(robots_txt_url)
-    disallowed_paths_by_domain[domain] = disallowed_paths
-    if disallowed_paths:
-        print(f"Disallowed paths found for {domain}:")
-        for path in disallowed_paths:
-            print(f"- {path}")
-    else:
-        print(f"No Disallow rules found in robots.txt for {domain} or failed to load.")
-
-
-def is_allowed_by_robots_txt(url, disallowed_rules_by_domain):
-    """URLが robots.txt のルールで許可されているかチェックする"""
-    try:
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc
-        path_with_query = parsed_url.path + (f"?{parsed_url.query}" if parsed_url.query else "")
-        if path_with_query == "":
-             path_with_query = "/"
-
-        # そのドメインの robots.txt ルールを取得
-        disallowed_rules = disallowed_rules_by_domain.get(domain, [])
-
-        for pattern in disallowed_rules:
-            if re.match(pattern, path_with_query):
-                return False # 禁止されているパスにマッチした場合
-        return True # 禁止されていない場合
-    except Exception as e:
-        print(f"Error checking robots.txt for {url}: {e}")
-        return True # チェック中にエラーが発生した場合は、安全のため許可するとする
-
+    return initial_urls
 
 def is_same_domain(url, target_domain):
     """URLが指定したドメインと同一かチェックする"""
@@ -159,212 +91,402 @@ def is_same_domain(url, target_domain):
         return False
 
 
-def scrape_and_find_links(url, depth):
+def fetch_page(url):
+    """ページのHTMLを取得し、(デコード前の本文, Content-Type の charset) を返す
+
+    200以外のステータスコードの場合は例外を送出する。
     """
-    指定されたURLのページをスクレイピングし、テキストとリンクを抽出する。
+    response = http_client.get(url, timeout=10) # タイムアウト設定
+    response.raise_for_status() # 200以外のステータスコードで例外発生
+    if page_archive is not None:
+        page_archive.append(url, response) # 抽出ルールを変えたときにアーカイブから作り直せるようにする
+    return response.content, response_charset(response)
+
+
+def strip_rules_for(domain):
+    """ドメインに対応する不要な要素の削除ルール（コンパイル済みのものを再利用する）"""
+    rules = _strip_rules_by_domain.get(domain)
+    if rules is None:
+        rules = _strip_rules_by_domain[domain] = compile_strip_rules(SITE_STRIP_SELECTORS.get(domain, GENERIC_SELECTORS))
+    return rules
+
+
+def extract_page(url, depth, content, encoding=None, max_depth=None):
+    """取得したHTMLを解析し、(テキスト, リンク) を返す
+
+    状態を持たない関数なので、パイプラインでは別プロセスで実行される。
     """
+    max_depth = MAX_DEPTH if max_depth is None else max_depth
+    links = []
+
+    # HTMLを解析
+    soup = parse_html(content, HTML_PARSER, encoding) # デコード前の本文から解析する
+    extract_started = time.perf_counter()
+
+    # --- 不要な要素の削除 ---
+    # 削除するセレクタは SITE_STRIP_SELECTORS でドメインごとに指定する
+    # （script, style 要素も含め、すべてのセレクタを1回の走査で判定する）
+    strip_rules_for(urlparse(url).netloc).apply(soup)
+
+    # --- テキストの抽出 ---
+    # シンプルに、不要要素削除後のページの全てのテキストを抽出する場合
+    text_content = soup.get_text(separator='\n', strip=True)
+
+    # --- 抽出したテキストのクレンジング（オプション）---
+    # 例: 連続する3つ以上の改行を1つにする
+    text_content = re.sub(r'\n{3,}', '\n\n', text_content)
+
+
+    # ページ内のリンクを抽出
+    if depth < max_depth:
+        for link in soup.find_all('a', href=True):
+            absolute_url = urljoin(url, link['href']) # 相対URLを絶対URLに変換
+            # URLを正規化して重複を避ける（フラグメントの除去、ホスト名の小文字化、末尾の / の除去、
+            # クエリパラメータの並べ替え）。クエリパラメータは残す。
+            clean_url = normalize_url(absolute_url)
+
+
+            # 同一ドメイン・robots.txt・重複のチェックとフロンティアへの追加は呼び出し側で行う
+            # ここでは、単にリンク候補としてリストに追加する
+            links.append(clean_url)
+
+    _EXTRACT_SECONDS.observe(time.perf_counter() - extract_started)
+    return text_content, links
 
+
+def save_text(url, text_content, output_dir=None):
+    """抽出したテキストをファイルに保存する（既に保存したページと同じテキストなら保存しない）"""
+    output_dir = output_dir or OUTPUT_DIR
+
+    # 既に保存したページと同じテキストなら保存しない（別のURLで配信された同じページなど）
+    duplicate_of = deduplicator.check_text(url, text_content)
+    if duplicate_of is not None:
+        print(f"Skipping duplicate content {url} (same as {duplicate_of})")
+        _PAGES.inc(result="duplicate")
+        return
+
+    # テキストをファイルに保存
+    # ファイル名はURLから安全な文字を使って生成
+    filename = url.replace("https://", "").replace("http://", "").replace("/", "_").replace("?", "_").replace("=", "_").replace("&", "_").replace(":", "_").replace(".", "_")
+    filename = filename[:200] + ".txt" # 長すぎるファイル名を制限 (ファイルシステムによってはさらに短い方が良い場合も)
+    file_path = os.path.join(output_dir, filename)
+    try:
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(f"URL: {url}\n\n")
+            f.write(text_content)
+        _PAGES.inc(result="saved")
+        _OUTPUT_BYTES.inc(os.path.getsize(file_path))
+        print(f"Saved text to {file_path}")
+    except Exception as e:
+         print(f"Error saving file {file_path}: {e}")
+         _PAGES.inc(result="error")
+
+
+def scrape_and_find_links(url, depth, output_dir=None, max_depth=None):
+    """
+    指定されたURLのページをスクレイピングし、テキストとリンクを抽出する。
+    取得・解析に失敗した場合は例外を送出する（呼び出し側でフロンティアに失敗として記録する）。
+    """
     print(f"Depth {depth}: Scraping {url}")
-    visited_urls.add(url) # 訪れたURLとして記録
 
-    text_content = ""
-    links = []
+    content, encoding = fetch_page(url)
+    text_content, links = extract_page(url, depth, content, encoding, max_depth)
+    save_text(url, text_content, output_dir)
+
+    return text_content, links # 抽出したテキストとリンクを返す（ここではテキストはファイルに保存済みなので、主にリンクが重要）
+
+
+def links_in_scope(url, links, allowed_hosts=()):
+    """見つかったリンクのうち、クロールの対象にするもの（同一ドメインか allowed_hosts のホスト）を返す"""
+    # 現在処理しているURLのドメインを取得
     current_domain = urlparse(url).netloc
+    # リンク先のドメインが現在のドメインと同一かチェック
+    return [link for link in links if is_same_domain(link, current_domain) or urlparse(link).netloc in allowed_hosts]
 
 
-    try:
-        # ページのHTMLを取得
-        response = requests.get(url, timeout=10) # タイムアウト設定
-        response.raise_for_status() # 200以外のステータスコードで例外発生
-
-        # HTMLを解析
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # --- 不要な要素の削除 ---
-        # 対象サイトのHTML構造に合わせて、適切なセレクタを指定してください
-        # 例: ヘッダー、フッター、ナビゲーション、サイドバーなどを削除
-        # 開発者ツールでHTML構造を確認し、削除したい要素のタグ名、id、classなどを特定してください。
-        # nip-ltd.co.jp やその他のサイトに合わせて、ここを編集してください。
-        # 前回のコードにあった重複ブロックは削除済みです。
-        selectors_to_remove = ['header', 'footer', 'nav', 'aside', '.sidebar', '#header', '#footer', '#nav']
-
-        for selector in selectors_to_remove:
-            for element in soup.select(selector):
-                element.extract() # 要素を削除
-
-        # script, style要素などを除外
-        for script_or_style in soup(["script", "style"]):
-            script_or_style.extract()
-
-        # --- テキストの抽出 ---
-        # シンプルに、不要要素削除後のページの全てのテキストを抽出する場合
-        text_content = soup.get_text(separator='\n', strip=True)
-
-        # --- 抽出したテキストのクレンジング（オプション）---
-        # 例: 連続する3つ以上の改行を1つにする
-        text_content = re.sub(r'\n{3,}', '\n\n', text_content)
-
-
-        # テキストをファイルに保存
-        # ファイル名はURLから安全な文字を使って生成
-        filename = url.replace("https://", "").replace("http://", "").replace("/", "_").replace("?", "_").replace("=", "_").replace("&", "_").replace(":", "_").replace(".", "_")
-        filename = filename[:200] + ".txt" # 長すぎるファイル名を制限 (ファイルシステムによってはさらに短い方が良い場合も)
-        file_path = os.path.join(OUTPUT_DIR, filename)
-        try:
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.write(f"URL: {url}\n\n")
-                f.write(text_content)
-            print(f"Saved text to {file_path}")
-        except Exception as e:
-             print(f"Error saving file {file_path}: {e}")
-
-
-        # ページ内のリンクを抽出
-        if depth < MAX_DEPTH:
-            for link in soup.find_all('a', href=True):
-                absolute_url = urljoin(url, link['href']) # 相対URLを絶対URLに変換
-                # URLのフラグメント(#...)を除去して重複を避ける
-                parsed_absolute_url = urlparse(absolute_url)
-                # クエリパラメータは残すかどうかの方針による。ここでは残す。
-                clean_url = parsed_absolute_url.scheme + "://" + parsed_absolute_url.netloc + parsed_absolute_url.path + (f"?{parsed_absolute_url.query}" if parsed_absolute_url.query else "")
-
-
-                # 同一ドメイン内で、かつ robots.txt で許可されており、まだ探索待ち/訪れていないURLをリストに追加
-                # キューに追加する前に重複チェックとrobots.txtチェック、ドメインチェックを行う
-                # チェック済みのURLをvisited_urlsに追加するのは、キューから取り出した後に行う
-                # ここでは、単にリンク候補としてリストに追加する
-                links.append(clean_url)
+def _extract_archived_text(response):
+    """アーカイブのレスポンスからテキストを抽出する（リンクは抽出しない）"""
+    text_content, _ = extract_page(response.url, 0, response.content, response_charset(response), max_depth=0)
+    return text_content
 
 
+def reprocess_archive(archive, output_dir=None, workers=None):
+    """アーカイブに保存したレスポンスからテキストファイルを作り直し、ページ数を返す（サイトには接続しない）
+
+    解析は workers 個のプロセスで並列に行う（既定はCPU数）。
+    """
+    pages = 0
+    for url, text_content in archive.map_records(_extract_archived_text, workers):
+        save_text(url, text_content, output_dir)
+        pages += 1
+    return pages
+
+
+def enqueue_links(frontier, robots, url, depth, links, max_depth, allowed_hosts=()):
+    """見つかったリンクのうち、対象のドメインで robots.txt で許可されたものをフロンティアに追加する"""
+    if depth >= max_depth:
+        return
+    for link in links_in_scope(url, links, allowed_hosts):
+        # robots.txt で許可されているかチェック
+        # 既に訪れたか、キューに入っているかはフロンティアが判定する
+        if robots.is_allowed(link):
+            frontier.add(link, depth + 1)
+
+
+def process_url(frontier, scheduler, url, depth, output_dir=None, max_depth=None):
+    """1件のURLをスクレイピングし、結果をフロンティアとスケジューラーに記録して見つかったリンクを返す
+
+    取得・解析に失敗した場合は失敗として記録し、None を返す。
+    """
+    started = time.monotonic()
+    try:
+        _, found_links = scrape_and_find_links(url, depth, output_dir, max_depth)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
+        _PAGES.inc(result="error")
+        frontier.mark_failed(url, e)
+        scheduler.record(url, started, ok=False)
+        return None
     except Exception as e:
         print(f"An error occurred while processing {url}: {e}")
+        _PAGES.inc(result="error")
+        frontier.mark_failed(url, e)
+        scheduler.record(url, started, ok=False)
+        return None
+    frontier.mark_done(url)
+    scheduler.record(url, started)
+    return found_links
+
+
+def crawl(frontier, robots, output_dir=None, max_depth=None, wait_time=None, compact_every=None, scheduler=None,
+          allowed_hosts=()):
+    """フロンティアが空になるまでクロールし、使用したスケジューラーを返す（robots は RobotsCache）
+
+    同じホストへのアクセスは wait_time（HOST_WAIT_TIMES、robots.txt の Crawl-delay）の間隔を空け、
+    待機中のホストがあっても他のホストのURLは続けて取得する。
+    リンクは同一ドメインのものに加えて、allowed_hosts のホストへのものも辿る。
+    """
+    max_depth = MAX_DEPTH if max_depth is None else max_depth
+    wait_time = WAIT_TIME if wait_time is None else wait_time
+    compact_every = COMPACT_EVERY if compact_every is None else compact_every
+    if scheduler is None:
+        scheduler = HostScheduler(frontier, PolitenessPolicy(wait_time, HOST_WAIT_TIMES, robots))
+    done_since_compact = 0
+
+    while True:
+        # アクセス可能なホストのURLを取り出す（処理中として記録される）
+        # すべてのホストが待機中なら、最も早く待機が終わるホストまで待つ
+        item = scheduler.next()
+        if item is None:
+            break
+        current_url, current_depth = item
+
+        # 最大深さを超えている場合はスキップ
+        if current_depth > max_depth:
+            print(f"Skipping {current_url} (depth exceeded)")
+            frontier.mark_done(current_url) # 今後訪れる必要はないので完了として記録
+            continue
+
+        # ページをスクレイピングし、リンクを取得
+        # 抽出されたテキストは関数内でファイル保存される
+        found_links = process_url(frontier, scheduler, current_url, current_depth, output_dir, max_depth)
+        if found_links is None:
+            found_links = []
+        else:
+            done_since_compact += 1
+
+        # 見つかったリンクをキューに追加（最大深さまで）
+        enqueue_links(frontier, robots, current_url, current_depth, found_links, max_depth, allowed_hosts)
+
+        # 完了したURLが増えたらフィンガープリントに圧縮する
+        if compact_every and done_since_compact >= compact_every:
+            frontier.compact()
+            done_since_compact = 0
+
+    return scheduler
+
+
+def crawl_pipelined(frontier, robots, output_dir=None, max_depth=None, wait_time=None, compact_every=None,
+                    scheduler=None, fetchers=4, parsers=None, allowed_hosts=()):
+    """crawl と同じクロールを、取得・解析・保存のパイプライン（crawl_pipeline.py）で実行する
+
+    取得は fetchers 個のスレッド、解析は parsers 個のプロセス（既定はCPU数）、保存は1個のスレッドで
+    並行に行う。使用したパイプラインを返す（format_stats で段ごとの統計を表示できる）。
+    """
+    max_depth = MAX_DEPTH if max_depth is None else max_depth
+    wait_time = WAIT_TIME if wait_time is None else wait_time
+    compact_every = COMPACT_EVERY if compact_every is None else compact_every
+    if scheduler is None:
+        scheduler = HostScheduler(frontier, PolitenessPolicy(wait_time, HOST_WAIT_TIMES, robots))
+    http_client.ensure_pool_size(fetchers)  # 取得スレッドの数だけ keep-alive の接続を保持する
+    pipeline = CrawlPipeline(
+        fetch_page,
+        functools.partial(extract_page, max_depth=max_depth),
+        functools.partial(save_text, output_dir=output_dir),
+        fetchers=fetchers,
+        parsers=parsers,
+    )
+    pipeline.run(
+        frontier, scheduler,
+        lambda url, depth, links: enqueue_links(frontier, robots, url, depth, links, max_depth, allowed_hosts),
+        max_depth, compact_every,
+    )
+    return pipeline
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URLリストから同一ドメイン内のページを辿ってテキストを保存する")
+    parser.add_argument("--urls", default=URL_LIST_FILE, help="初期URLのリストファイル")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="抽出したテキストの保存先")
+    parser.add_argument("--max-depth", type=int, default=MAX_DEPTH, help="リンクを辿る最大の深さ")
+    parser.add_argument("--wait", type=float, default=WAIT_TIME, help="同じホストへのページ取得間の待機時間（秒）")
+    parser.add_argument("--frontier", default=None,
+                        help=f"クロール状態の保存先（既定: <output-dir>/{FRONTIER_FILE}）")
+    parser.add_argument("--fresh", action="store_true", help="保存済みのクロール状態を破棄して最初からクロールする")
+    parser.add_argument("--retry-failed", action="store_true", help="前回失敗したURLをキューに戻す")
+    parser.add_argument("--compact", action="store_true", help="完了したURLを圧縮して終了する")
+    parser.add_argument("--seen-set", choices=("sqlite", "fingerprint", "bloom"), default="sqlite",
+                        help="登録済みURLの判定方法（sqlite: 毎回 SQLite を検索、fingerprint / bloom: メモリ上の"
+                             "フィンガープリントの表 / ブルームフィルタで判定する）")
+    parser.add_argument("--archive", action="store_true",
+                        help=f"取得したレスポンスを <output-dir>/{ARCHIVE_DIR} に WARC 形式で保存する")
+    parser.add_argument("--reprocess-archive", action="store_true",
+                        help="サイトに接続せず、アーカイブからテキストファイルを作り直して終了する（--parsers 個のプロセス）")
+    parser.add_argument("--follow-seed-hosts", action="store_true",
+                        help="同一ドメインに加えて、URLリストの他のホストへのリンクも辿る")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="取得・解析・保存を別々のワーカーで並行に実行する（解析は別プロセス）")
+    parser.add_argument("--fetchers", type=int, default=4, help="--pipeline での取得スレッド数")
+    parser.add_argument("--parsers", type=int, default=None, help="--pipeline での解析プロセス数（既定: CPU数）")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+
+    # --pipeline の解析プロセスでの呼び出しは計測されない
+    with MetricsReporter(port=args.metrics_port, snapshot_path=args.metrics_file, interval=args.metrics_interval), \
+            profiled(args.profile, [(sys.modules[__name__], name) for name in PROFILED_FUNCTIONS]):
+        run(args)
+
+
+def run(args):
+    """main のコマンドライン引数でクロールを実行する"""
+    global page_archive
+
+    # 出力ディレクトリを作成
+    if not os.path.exists(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    archive_path = os.path.join(args.output_dir, ARCHIVE_DIR)
+    if args.reprocess_archive:
+        archive = WarcArchive(archive_path)
+        started = time.monotonic()
+        pages = reprocess_archive(archive, args.output_dir, args.parsers)
+        archive.close()
+        print(f"Reprocessed {pages:,} pages from {archive_path} in {time.monotonic() - started:.1f} s")
+        print(f"Dedup: {deduplicator.format_summary()}")
+        return
+
+    frontier_path = args.frontier or os.path.join(args.output_dir, FRONTIER_FILE)
+    if args.fresh:
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(frontier_path + suffix):
+                os.remove(frontier_path + suffix)
+    seen_set = None
+    if args.seen_set == "fingerprint":
+        seen_set = FingerprintSet()
+    elif args.seen_set == "bloom":
+        seen_set = ScalableBloomFilter()
+    frontier = CrawlFrontier(frontier_path, checkpoint_every=CHECKPOINT_EVERY, seen_set=seen_set)
+
+    if args.compact:
+        print(f"Compacted {frontier.compact():,} done URLs ({frontier.format_counts()})")
+        frontier.close()
+        return
+
+    # --- 修正: URLリストファイルからURLを読み込む ---
+    print(f"Loading URLs from {args.urls}...")
+    try:
+        initial_urls = load_url_list(args.urls)
+    except FileNotFoundError:
+        print(f"エラー: URLリストファイル '{args.urls}' が見つかりません。ファイルを作成してください。")
+        return # ファイルが見つからなければプログラムを終了
+    except Exception as e:
+        print(f"エラー: URLリストファイルの読み込み中にエラーが発生しました: {e}")
+        return # 読み込みエラーが発生したらプログラムを終了
 
-    return text_content, links # 抽出したテキストとリンクを返す（ここではテキストはファイルに保存済みなので、主にリンクが重要）
+    if not initial_urls:
+        print(f"エラー: URLリストファイル '{args.urls}' に有効なURLが含まれていません。URLを記述してください。")
+        return # 有効なURLがなければプログラムを終了
 
-"""""
-# --- クロール実行部分 ---
-print("Starting crawl...")
-processed_urls_queue = set() # キューに追加済みのURLを記録するためのセット（重複追加防止）
-
-# 初期URLをキューに追加
-for url, depth in urls_to_visit:
-    # 初期URLリストの中に重複やrobots.txtで禁止されているものがある可能性も考慮
-    parsed_initial_url = urlparse(url)
-    initial_domain = parsed_initial_url.netloc
-    if initial_domain and \
-       is_same_domain(url, initial_domain) and \
-       is_allowed_by_robots_txt(url, disallowed_paths_by_domain) and \
-       url not in visited_urls and \
-       url not in processed_urls_queue: # キューにまだ追加されていないかチェック
-        urls_to_visit.append((url, depth))
-        processed_urls_queue.add(url) # キューに追加したURLを記録
-    else:
-         print(f"Skipping initial URL {url} (invalid, disallowed, or duplicate)")
-
-
-while urls_to_visit:
-    current_url, current_depth = urls_to_visit.popleft() # キューからURLを取り出す
-
-    # 既に訪れた URL はスキップ（キューから取り出した時点で最終チェック）
-    if current_url in visited_urls:
-        print(f"Skipping {current_url} (already visited)")
-        continue
-
-    # 最大深さを超えている場合はスキップ
-    if current_depth > MAX_DEPTH:
-         print(f"Skipping {current_url} (depth exceeded)")
-         visited_urls.add(current_url) # 訪れてはいないが、今後訪れる必要はないのでvisitedに追加
-         continue
-
-    # ページをスクレイピングし、リンクを取得
-    # 抽出されたテキストは関数内でファイル保存される
-    _, found_links = scrape_and_find_links(current_url, current_depth)
-
-    # 見つかったリンクをキューに追加（最大深さまで）
-    if current_depth < MAX_DEPTH:
-        current_domain = urlparse(current_url).netloc
-        for link in found_links:
-            # リンク先のドメインが現在のドメインと同一かチェック
-            # robots.txt で許可されているかチェック
-            # 既に訪れたことがあるか、キューに既に入っているかチェック
-            if is_same_domain(link, current_domain) and \
-               is_allowed_by_robots_txt(link, disallowed_paths_by_domain) and \
-               link not in visited_urls and \
-               link not in processed_urls_queue: # キューにまだ追加されていないかチェック
-                 urls_to_visit.append((link, current_depth + 1))
-                 processed_urls_queue.add(link) # キューに追加したURLを記録
-
-
-    # サーバーに負荷をかけないために待機
-    time.sleep(WAIT_TIME)
-
-print("Crawling finished.")"""
-# ... (前略：インポート、設定、関数定義など) ...
-
-# --- クロール実行部分 ---
-print("Starting crawl...")
-processed_urls_queue = set() # キューに追加済みのURLを記録するためのセット（重複追加防止）
-
-# 初期URLをキューに追加
-initial_urls_with_depth = [(url, 0) for url in initial_urls] # 初期URLリストに深さ0を追加
-initial_urls = [] # initial_urls はもう使用しないので空にするか、この行自体削除しても良い
-
-for url, depth in initial_urls_with_depth: # 初期URLリストを処理
-    # 初期URLリストの中に重複やrobots.txtで禁止されているものがある可能性も考慮
-    parsed_initial_url = urlparse(url)
-    initial_domain = parsed_initial_url.netloc
-    if initial_domain and \
-       is_same_domain(url, initial_domain) and \
-       is_allowed_by_robots_txt(url, disallowed_paths_by_domain) and \
-       url not in visited_urls and \
-       url not in processed_urls_queue: # キューにまだ追加されていないかチェック
-        urls_to_visit.append((url, depth))
-        processed_urls_queue.add(url) # キューに追加したURLを記録
-    else:
-         print(f"Skipping initial URL {url} (invalid, disallowed, or duplicate)")
-
-
-# --- 修正: クロール実行ループ ---
-# キューの長さが0より大きい間ループ
-while len(urls_to_visit) > 0:
-    current_url, current_depth = urls_to_visit.popleft() # キューからURLを取り出す
-
-    # 既に訪れた URL はスキップ（キューから取り出した時点で最終チェック）
-    if current_url in visited_urls:
-        print(f"Skipping {current_url} (already visited)")
-        continue
-
-    # 最大深さを超えている場合はスキップ
-    if current_depth > MAX_DEPTH:
-         print(f"Skipping {current_url} (depth exceeded)")
-         visited_urls.add(current_url) # 訪れてはいないが、今後訪れる必要はないのでvisitedに追加
-         continue
-
-    # ページをスクレイピングし、リンクを取得
-    # 抽出されたテキストは関数内でファイル保存される
-    _, found_links = scrape_and_find_links(current_url, current_depth)
-
-    # 見つかったリンクをキューに追加（最大深さまで）
-    if current_depth < MAX_DEPTH:
-        # 現在処理しているURLのドメインを取得
-        current_domain = urlparse(current_url).netloc
-        for link in found_links:
-            # リンク先のドメインが現在のドメインと同一かチェック
-            # robots.txt で許可されているかチェック
-            # 既に訪れたことがあるか、キューに既に入っているかチェック
-            if is_same_domain(link, current_domain) and \
-               is_allowed_by_robots_txt(link, disallowed_paths_by_domain) and \
-               link not in visited_urls and \
-               link not in processed_urls_queue: # キューにまだ追加されていないかチェック
-                 urls_to_visit.append((link, current_depth + 1))
-                 processed_urls_queue.add(link) # キューに追加したURLを記録
-
-
-    # サーバーに負荷をかけないために待機
-    time.sleep(WAIT_TIME)
-
-print("Crawling finished.")
-
-# ... (後略：重複排除・統合のコードなど) ...
\ No newline at end of file
+    # 対応するオリジンの robots.txt を読み込む（キャッシュが有効な間は再取得しない）
+    robots = RobotsCache(os.path.join(args.output_dir, ROBOTS_CACHE_FILE), http_client, verbose=True)
+    origins = {}
+    for url in initial_urls:
+        parsed_url = urlparse(url)
+        if parsed_url.netloc:
+            origins[f"{parsed_url.scheme}://{parsed_url.netloc}"] = None
+
+    print("Loading robots.txt for relevant domains...")
+    for origin in origins:
+        rules = robots.rules_for_origin(origin)
+        if rules.rules:
+            print(f"Rules found for {origin}:")
+            for allow, path in rules.rules:
+                print(f"- {'Allow' if allow else 'Disallow'}: {path}")
+        else:
+            print(f"No rules found in robots.txt for {origin} or failed to load.")
+        if rules.crawl_delay:
+            print(f"Crawl-delay for {origin}: {rules.crawl_delay} s")
+
+    if frontier.resumed:
+        print(f"Resuming crawl: {frontier.resumed} in-flight URLs were requeued")
+    if args.retry_failed:
+        print(f"Requeued {frontier.requeue_failed():,} failed URLs")
+
+    # --- クロール実行部分 ---
+    print("Starting crawl...")
+
+    # 初期URLをキューに追加（再開時は登録済みのURLが無視される）
+    for url in initial_urls:
+        # 初期URLリストの中にrobots.txtで禁止されているものがある可能性も考慮
+        if not urlparse(url).netloc or not robots.is_allowed(url):
+            print(f"Skipping initial URL {url} (invalid or disallowed)")
+            continue
+        frontier.add(normalize_url(url), 0)
+
+    scheduler = HostScheduler(frontier, PolitenessPolicy(args.wait, HOST_WAIT_TIMES, robots))
+    allowed_hosts = {urlparse(url).netloc for url in initial_urls} if args.follow_seed_hosts else ()
+    if args.archive:
+        page_archive = WarcArchive(archive_path)
+    pipeline = None
+    try:
+        if args.pipeline:
+            pipeline = crawl_pipelined(frontier, robots, args.output_dir, args.max_depth, args.wait,
+                                       scheduler=scheduler, fetchers=args.fetchers, parsers=args.parsers,
+                                       allowed_hosts=allowed_hosts)
+        else:
+            crawl(frontier, robots, args.output_dir, args.max_depth, args.wait, scheduler=scheduler,
+                  allowed_hosts=allowed_hosts)
+    except KeyboardInterrupt:
+        print("Interrupted. Run again to resume from the last checkpoint.")
+    finally:
+        print(f"Frontier: {frontier.format_counts()}")
+        frontier.close()
+        robots.save()
+        if page_archive is not None:
+            page_archive.close()
+
+    print("Per-host stats:")
+    print(scheduler.format_stats())
+    if pipeline is not None:
+        print("Pipeline stats:")
+        print(pipeline.format_stats())
+
+    print("Crawling finished.")
+    print(f"HTTP stats: {http_client.format_summary()}")
+    print(f"Dedup: {deduplicator.format_summary()}")
+    if page_archive is not None:
+        print(f"Archive: {page_archive.format_summary()}")
+
+
+if __name__ == "__main__":
+    main()
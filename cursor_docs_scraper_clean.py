@@ -1,42 +1,105 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import CData, NavigableString, Tag
 from urllib.parse import urljoin, urlparse
+import argparse
 import time
 import os
 import re
 import json
-from collections import deque
+import asyncio
+import tempfile
+
+from async_crawl import AsyncCrawlEngine
+from crawl_frontier import UrlQueue
+from dedup import ContentDeduplicator
+from html_parsing import DEFAULT_PARSER, parse_response
+from http_client import get_default_client
+from metrics import COUNT_BUCKETS, METRICS, MetricsReporter, add_metrics_arguments
+from page_cache import PageMetadataCache
+from page_store import PageStore
+from profiling import profiled
+from robots import RobotsCache
+from seen_set import make_seen_set
+from strip_rules import CURSOR_DOCS_SELECTORS, compile_strip_rules
+from url_utils import normalize_url
+from warc_archive import WarcArchive
+
+# 本文から除去する不要なフレーズ（同じ位置で複数が一致する場合は先に書いたものを優先する）
+UNWANTED_PHRASES = [
+    'Search...', 'Ask AI', 'Sign in', 'Download', 
+    'Navigation', 'Documentation', 'Guides', 
+    'Website', 'Forum', 'Support', 'Was this page helpful?',
+    'Yes', 'No', 'On this page', 'Cursor home page',
+    'Assistant', 'Responses are generated using AI and may contain mistakes.',
+    'x github website', 'Product', 'Pricing', 'Downloads',
+    'Docs', 'Company', 'Careers', 'About', 'Security',
+    'Privacy', 'Resources', 'Terms', 'Changelog', 'Twitter', 'GitHub'
+]
+UNWANTED_PHRASE_PATTERN = re.compile("|".join(re.escape(phrase) for phrase in UNWANTED_PHRASES))
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
+# extract_structured_content が出力する要素
+HEADING_TAGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+LIST_TAGS = {'ul', 'ol'}
+CODE_TAGS = {'pre', 'code'}
+# get_text() と同じく、コメントなどを除いたテキストとして扱う文字列の型
+TEXT_STRING_TYPES = (NavigableString, CData)
+
+# 取得したレスポンスを保存するディレクトリ（出力ディレクトリ内）
+ARCHIVE_DIR = "archive"
+
+# --profile で計測するメソッド（並行取得モードでは scrape_page の代わりに取得・解析・保存が呼ばれる）
+PROFILED_METHODS = ("scrape_page", "fetch_page", "process_page", "extract_structured_content", "store_page")
+
+# 計測値（metrics.METRICS）
+_EXTRACT_SECONDS = METRICS.histogram("docs_extract_seconds", "解析したページからのページ情報・リンクの抽出にかかった時間")
+_SECTIONS_PER_PAGE = METRICS.histogram("docs_sections_per_page", "保存したページのセクション数", COUNT_BUCKETS)
+_PAGES = METRICS.counter("docs_pages_total", "処理したページ数（result: saved / duplicate / empty / error）")
+_OUTPUT_BYTES = METRICS.counter("docs_output_bytes_total", "保存したページのファイルのバイト数")
+_PAGE_CACHE_HITS = METRICS.counter("docs_page_cache_hits_total", "前回から変更がなく、解析せずに再利用したページ数")
 
 class CleanCursorDocsScraper:
-    def __init__(self):
-        self.base_url = "https://docs.cursor.com"
-        self.visited_urls = set()
-        self.scraped_data = []
-        self.output_dir = "cursor_docs_clean"
-        self.wait_time = 1  # サーバー負荷軽減のための待機時間
+    def __init__(self, base_url="https://docs.cursor.com", output_dir="cursor_docs_clean", wait_time=1,
+                 http_client=None, use_cache=True, parser=None, strip_selectors=CURSOR_DOCS_SELECTORS,
+                 seen_set="set", respect_robots=True, dedup=True, near_duplicates=False, archive=False,
+                 combine_only=False):
+        self.base_url = base_url
+        self.http_client = http_client or get_default_client()
+        self.parser = parser or DEFAULT_PARSER  # HTMLパーサーのバックエンド（lxml / html.parser など）
+        self.strip_rules = compile_strip_rules(strip_selectors)  # 除去する要素のセレクタ
+        self.extract_options = {"base_url": base_url, "parser": self.parser, "strip_selectors": strip_selectors}
+        self.visited_urls = make_seen_set(seen_set)  # 訪問済みURL（set / fingerprint / bloom）
+        self.output_dir = output_dir
+        self.wait_time = wait_time  # サーバー負荷軽減のための待機時間
         
         # 出力ディレクトリを作成
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
-    
-    def remove_unwanted_elements(self, soup):
-        """不要な要素を除去する"""
-        # 除去する要素のセレクタ
-        unwanted_selectors = [
-            'header', 'footer', 'nav', 'aside', 
-            '.sidebar', '.navigation', '.nav', 
-            'script', 'style', '.search', '.breadcrumb',
-            '.header', '.footer', '[class*="nav"]', 
-            '[class*="menu"]', '[class*="sidebar"]',
-            '[id*="nav"]', '[id*="menu"]', '[id*="sidebar"]',
-            '.cursor-home-page', '.search-container',
-            '.page-navigation', '.table-of-contents'
-        ]
         
-        for selector in unwanted_selectors:
-            for element in soup.select(selector):
-                element.decompose()
+        # スクレイピングしたページ情報（ファイルに追記し、メモリには目次だけを保持する）
+        # combine_only=True の場合は既存の pages.jsonl を消さずに読み込み、統合ドキュメントの作成だけに使う
+        # （訪問済みURLや重複除去の状態は復元しないため、scrape_docs / reprocess_archive は実行できない）
+        self.combine_only = combine_only
+        self.scraped_data = PageStore(os.path.join(self.output_dir, "pages.jsonl"), truncate=not combine_only)
+        
+        # クロール全体での重複ページ・重複セクションの検出（near_duplicates=True で類似ページも）
+        self.deduplicator = ContentDeduplicator(near_duplicates=near_duplicates) if dedup else None
+        
+        # robots.txt のルール（本文は出力ディレクトリにキャッシュする）
+        self.robots = None
+        if respect_robots:
+            self.robots = RobotsCache(os.path.join(self.output_dir, "robots_cache.json"), self.http_client)
+        
+        # 前回のクロール結果（ETag / Last-Modified / page_info）のキャッシュ
+        self.page_cache = None
+        if use_cache:
+            self.page_cache = PageMetadataCache(os.path.join(self.output_dir, "http_cache.json"))
         
+        # 取得したレスポンス（ヘッダーとデコード前の本文）のアーカイブ（reprocess_archive で再解析できる）
+        self.archive = WarcArchive(os.path.join(self.output_dir, ARCHIVE_DIR)) if archive else None
+    
+    def remove_unwanted_elements(self, soup):
+        """不要な要素を除去する（すべてのセレクタを1回の走査で判定する）"""
+        self.strip_rules.apply(soup)
         return soup
     
     def extract_clean_content(self, soup):
@@ -69,47 +132,41 @@ class CleanCursorDocsScraper:
     
     def clean_text_content(self, text):
         """テキストコンテンツをクリーニングする"""
-        # 不要なフレーズを除去
-        unwanted_phrases = [
-            'Search...', 'Ask AI', 'Sign in', 'Download', 
-            'Navigation', 'Documentation', 'Guides', 
-            'Website', 'Forum', 'Support', 'Was this page helpful?',
-            'Yes', 'No', 'On this page', 'Cursor home page',
-            'Assistant', 'Responses are generated using AI and may contain mistakes.',
-            'x github website', 'Product', 'Pricing', 'Downloads',
-            'Docs', 'Company', 'Careers', 'About', 'Security',
-            'Privacy', 'Resources', 'Terms', 'Changelog', 'Twitter', 'GitHub'
-        ]
+        # 不要なフレーズを除去（UNWANTED_PHRASES を1つの正規表現にまとめて1回で置換する）
+        text = UNWANTED_PHRASE_PATTERN.sub('', text)
         
-        for phrase in unwanted_phrases:
-            text = text.replace(phrase, '')
-        
-        # 連続する空白文字を単一のスペースに変換
-        text = re.sub(r'\s+', ' ', text)
-        # 連続する改行を最大2つまでに制限
-        text = re.sub(r'\n{3,}', '\n\n', text)
+        # 連続する空白文字（改行を含む）を単一のスペースに変換
+        text = WHITESPACE_PATTERN.sub(' ', text)
         
         return text.strip()
     
     def extract_structured_content(self, content_element):
-        """構造化されたコンテンツを抽出する"""
+        """構造化されたコンテンツを抽出する
+        
+        要素を文書順に1回だけ走査する。内容を出力した見出し・段落・リスト・コード・
+        引用の子孫は走査しないため、pre 内の code やリスト内の段落が重複して
+        出力されることはない。ネストしたリストは字下げした項目として出力する。
+        """
         sections = []
         current_section = {"title": "", "content": "", "level": 1}
         
-        # 処理済みの要素を追跡
-        processed_elements = set()
+        # 未処理の要素（末尾から取り出すと文書順になるよう逆順に積む）
+        stack = list(reversed(content_element.contents))
         
-        for element in content_element.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'ul', 'ol', 'pre', 'code', 'blockquote']):
-            if element in processed_elements:
+        while stack:
+            element = stack.pop()
+            if not isinstance(element, Tag):
                 continue
+            name = element.name
+            emitted = False
             
-            if element.name in ['h1', 'h2', 'h3', 'h4', 'h5', 'h6']:
+            if name in HEADING_TAGS:
                 # 新しいセクションの開始
                 if current_section["title"] or current_section["content"]:
                     if current_section["content"].strip():  # 空でない場合のみ追加
                         sections.append(current_section)
                 
-                level = int(element.name[1])
+                level = int(name[1])
                 title = self.clean_text_content(element.get_text())
                 
                 # 短すぎるタイトルや記号のみのタイトルをスキップ
@@ -119,37 +176,36 @@ class CleanCursorDocsScraper:
                         "level": level,
                         "content": ""
                     }
-                processed_elements.add(element)
+                emitted = True  # 見出し内の要素は出力しない
             
-            elif element.name == 'p':
+            elif name == 'p':
                 text = self.clean_text_content(element.get_text())
                 if len(text) > 20:  # 短すぎるテキストは除外
                     current_section["content"] += text + "\n\n"
-                processed_elements.add(element)
+                    emitted = True
             
-            elif element.name in ['ul', 'ol']:
+            elif name in LIST_TAGS:
                 # リストを整形
-                list_items = []
-                for li in element.find_all('li'):
-                    item_text = self.clean_text_content(li.get_text())
-                    if len(item_text) > 5:  # 短すぎるアイテムは除外
-                        list_items.append(f"• {item_text}")
-                
+                list_items = self._list_items(element)
                 if list_items:
                     current_section["content"] += "\n".join(list_items) + "\n\n"
-                processed_elements.add(element)
+                    emitted = True
             
-            elif element.name in ['pre', 'code']:
+            elif name in CODE_TAGS:
                 code_text = element.get_text().strip()
                 if len(code_text) > 10:  # 短いコードスニペットは除外
                     current_section["content"] += f"```\n{code_text}\n```\n\n"
-                processed_elements.add(element)
+                    emitted = True
             
-            elif element.name == 'blockquote':
+            elif name == 'blockquote':
                 quote_text = self.clean_text_content(element.get_text())
                 if len(quote_text) > 10:
                     current_section["content"] += f"> {quote_text}\n\n"
-                processed_elements.add(element)
+                    emitted = True
+            
+            if not emitted:
+                # 何も出力しなかった要素は、子要素を続けて走査する
+                stack.extend(reversed(element.contents))
         
         # 最後のセクションを追加
         if current_section["title"] or current_section["content"]:
@@ -168,6 +224,39 @@ class CleanCursorDocsScraper:
         
         return unique_sections
     
+    def _list_items(self, list_element, depth=0):
+        """リストの項目を「• 項目」の行のリストにする（ネストしたリストは字下げする）"""
+        items = []
+        indent = "  " * depth
+        for child in list_element.children:
+            if not isinstance(child, Tag):
+                continue
+            if child.name in LIST_TAGS:
+                # li の外に直接置かれたネストしたリスト
+                items.extend(self._list_items(child, depth + 1))
+                continue
+            if child.name != 'li':
+                continue
+            
+            # 項目自身のテキスト（ネストしたリストを除く）
+            texts = []
+            nested = []
+            for part in child.children:
+                if isinstance(part, Tag):
+                    if part.name in LIST_TAGS:
+                        nested.append(part)
+                    else:
+                        texts.append(part.get_text())
+                elif type(part) in TEXT_STRING_TYPES:
+                    texts.append(part)
+            
+            item_text = self.clean_text_content("".join(texts))
+            if len(item_text) > 5:  # 短すぎるアイテムは除外
+                items.append(f"{indent}• {item_text}")
+            for nested_list in nested:
+                items.extend(self._list_items(nested_list, depth + 1))
+        return items
+    
     def extract_page_info(self, soup, url):
         """ページの情報を抽出する"""
         # ページタイトルを抽出
@@ -192,88 +281,224 @@ class CleanCursorDocsScraper:
         return None
     
     def get_page_links(self, soup, current_url):
-        """ページ内のリンクを抽出する"""
-        links = set()
+        """ページ内のリンクを抽出する（正規化して重複を除き、ページ内の出現順を保つ）"""
+        links = {}
         
         for link in soup.find_all('a', href=True):
             href = link['href']
-            absolute_url = urljoin(current_url, href)
+            # フラグメントの除去・ホスト名の小文字化・末尾の / などを正規化する
+            clean_url = normalize_url(urljoin(current_url, href))
             
             # Cursorドキュメントサイト内のリンクのみを対象とする
-            if absolute_url.startswith(self.base_url):
-                # フラグメント（#）を除去
-                clean_url = absolute_url.split('#')[0]
-                links.add(clean_url)
+            if clean_url.startswith(self.base_url):
+                links[clean_url] = None
         
-        return links
+        return list(links)
     
-    def scrape_page(self, url):
-        """単一ページをスクレイピングする"""
-        print(f"スクレイピング中: {url}")
+    def is_allowed(self, url):
+        """URLへのアクセスが robots.txt で許可されているかを返す"""
+        return self.robots is None or self.robots.is_allowed(url)
+    
+    def crawl_delay(self, url):
+        """robots.txt で指定された Crawl-delay（秒）を返す（指定がなければ None）"""
+        return self.robots.crawl_delay(url) if self.robots else None
+    
+    def fetch_page(self, url):
+        """ページを取得する（キャッシュがあれば条件付きリクエストを送信する）
+        
+        アーカイブする場合、アーカイブにまだないページは条件付きリクエストを送信しない
+        （304 では本文がなく、アーカイブに保存できないため）。
+        """
+        headers = None
+        if self.page_cache and (self.archive is None or url in self.archive):
+            headers = self.page_cache.conditional_headers(url)
+        response = self.http_client.get(url, timeout=10, headers=headers)
+        response.raise_for_status()
+        if self.archive is not None and response.status_code == 200:
+            self.archive.append(url, response)
+        return response
+    
+    def process_page(self, url, response):
+        """取得したレスポンスを解析し、ページ情報とリンクを返す"""
+        # 前回から変わっていないページは解析せずにキャッシュを再利用する
+        cached = self.page_cache.lookup(url, response) if self.page_cache else None
+        
+        # 既に保存したページと同じ本文なら解析しない（そのページのリンクは取得済み）
+        if self.deduplicator:
+            if cached is not None:
+                # 304 では本文がないため、キャッシュに記録した本文のハッシュ値を使う
+                duplicate_of = self.deduplicator.note_body_hash(url, self.page_cache.entries[url].get("content_hash"))
+            else:
+                duplicate_of = self.deduplicator.note_body(url, response.content)
+            if duplicate_of is not None:
+                print(f"重複のためスキップ: {url}（{duplicate_of} と同じ内容）")
+                _PAGES.inc(result="duplicate")
+                return None, []
+        
+        if cached is not None:
+            _PAGE_CACHE_HITS.inc()
+            return cached
         
         try:
-            response = requests.get(url, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # ページ情報を抽出
-            page_info = self.extract_page_info(soup, url)
+            # デコード前の本文から解析する（文字コードはヘッダー・meta タグから判定）
+            soup = parse_response(response, self.parser)
             
-            if page_info and page_info['sections']:  # セクションが存在する場合のみ保存
-                self.scraped_data.append(page_info)
+            with _EXTRACT_SECONDS.time():
+                # ページ情報を抽出
+                page_info = self.extract_page_info(soup, url)
                 
-                # クリーンな形式でファイルに保存
-                filename = url.replace(self.base_url, "").replace("/", "_").strip("_")
-                if not filename:
-                    filename = "index"
-                filename = f"{filename}.md"
-                
-                file_path = os.path.join(self.output_dir, filename)
-                with open(file_path, "w", encoding="utf-8") as f:
-                    f.write(f"# {page_info['title']}\n\n")
-                    f.write(f"**URL:** {url}\n\n")
-                    f.write("---\n\n")
-                    
-                    for section in page_info['sections']:
-                        if section['title']:
-                            # 見出しレベルに応じてマークダウン形式で出力
-                            level = section.get('level', 2)
-                            heading_prefix = '#' * min(level + 1, 6)  # h1は既に使用済みなので+1
-                            f.write(f"{heading_prefix} {section['title']}\n\n")
-                        
-                        if section['content'].strip():
-                            f.write(f"{section['content'].strip()}\n\n")
-                
-                print(f"保存完了: {file_path}")
+                # ページ内のリンクを取得
+                links = self.get_page_links(soup, url)
+        except Exception:
+            if self.deduplicator:
+                self.deduplicator.discard_body(url)
+            raise
+        
+        if self.page_cache:
+            self.page_cache.update(url, response, page_info, links)
+        return page_info, links
+    
+    def page_filename(self, url):
+        """URLから保存用のファイル名を作成する"""
+        filename = url.replace(self.base_url, "").replace("/", "_").strip("_")
+        if not filename:
+            filename = "index"
+        return f"{filename}.md"
+    
+    def format_page_markdown(self, url, page_info):
+        """ページ情報をページ単位のマークダウン文字列にする"""
+        parts = [
+            f"# {page_info['title']}\n\n",
+            f"**URL:** {url}\n\n",
+            "---\n\n",
+        ]
+        
+        for section in page_info['sections']:
+            if section['title']:
+                # 見出しレベルに応じてマークダウン形式で出力
+                level = section.get('level', 2)
+                heading_prefix = '#' * min(level + 1, 6)  # h1は既に使用済みなので+1
+                parts.append(f"{heading_prefix} {section['title']}\n\n")
             
-            # ページ内のリンクを取得
-            links = self.get_page_links(soup, url)
+            if section['content'].strip():
+                parts.append(f"{section['content'].strip()}\n\n")
+        
+        return "".join(parts)
+    
+    def store_page(self, url, page_info):
+        """ページ情報を記録し、クリーンな形式でファイルに保存する（重複したページは保存しない）"""
+        try:
+            self._store_page(url, page_info)
+        finally:
+            # 保存しなかったページ（セクションなし・エラー）の本文のハッシュ値を残さない
+            if self.deduplicator:
+                self.deduplicator.discard_body(url)
+    
+    def _store_page(self, url, page_info):
+        if not page_info or not page_info['sections']:  # セクションが存在する場合のみ保存
+            if page_info is not None:
+                _PAGES.inc(result="empty")
+            return
+        
+        combined_info = page_info
+        if self.deduplicator:
+            # 既に保存したページと同じ内容のページは保存しない
+            duplicate_of = self.deduplicator.check_page(url, page_info)
+            if duplicate_of is not None:
+                print(f"重複のためスキップ: {url}（{duplicate_of} と同じ内容）")
+                _PAGES.inc(result="duplicate")
+                return
+            # 統合ドキュメントには、他のページで既に出てきたセクションを含めない
+            combined_info = self.deduplicator.unique_sections(page_info)
+        
+        if combined_info['sections']:
+            self.scraped_data.append(combined_info, self.create_anchor(page_info['title']))
+        
+        file_path = os.path.join(self.output_dir, self.page_filename(url))
+        markdown = self.format_page_markdown(url, page_info)
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(markdown)
+        
+        _PAGES.inc(result="saved")
+        _SECTIONS_PER_PAGE.observe(len(page_info['sections']))
+        _OUTPUT_BYTES.inc(len(markdown.encode("utf-8")))
+        print(f"保存完了: {file_path}")
+    
+    def scrape_page(self, url):
+        """単一ページをスクレイピングする"""
+        print(f"スクレイピング中: {url}")
+        
+        try:
+            response = self.fetch_page(url)
+            page_info, links = self.process_page(url, response)
+            self.store_page(url, page_info)
             return links
             
         except Exception as e:
             print(f"エラー: {url} - {e}")
+            _PAGES.inc(result="error")
             return set()
     
-    def scrape_docs(self, start_url=None, max_pages=100):
-        """ドキュメント全体をスクレイピングする"""
+    def _check_writable(self):
+        """combine_only=True のスクレイパーでページを保存しようとした場合は ValueError を送出する"""
+        if self.combine_only:
+            raise ValueError("combine_only=True のスクレイパーは保存済みの pages.jsonl から統合ドキュメントを"
+                             "作成するためのもので、クロール・再解析はできません")
+    
+    def scrape_docs(self, start_url=None, max_pages=100, concurrency=1, requests_per_second=None):
+        """ドキュメント全体をスクレイピングする
+        
+        concurrency が 2 以上の場合は asyncio による並行取得モードで実行する。
+        並行モードでは固定の待機時間の代わりにホストごとのレート制限
+        （requests_per_second、未指定時は 1 / wait_time）を適用する。
+        """
+        self._check_writable()
         if start_url is None:
             start_url = f"{self.base_url}/welcome"
         
-        urls_to_visit = deque([start_url])
-        pages_scraped = 0
-        
         print(f"Cursorドキュメントのスクレイピングを開始します...")
         print(f"開始URL: {start_url}")
         print(f"最大ページ数: {max_pages}")
         
+        if concurrency > 1:
+            if requests_per_second is None and self.wait_time > 0:
+                requests_per_second = 1.0 / self.wait_time
+            engine = AsyncCrawlEngine(
+                self,
+                concurrency=concurrency,
+                requests_per_second=requests_per_second
+            )
+            asyncio.run(engine.run(start_url, max_pages))
+        else:
+            self._scrape_docs_serial(start_url, max_pages)
+        
+        # 統合されたマークダウンファイルを作成
+        self.create_combined_documentation()
+        
+        if self.robots:
+            self.robots.save()
+        if self.page_cache:
+            self.page_cache.save()
+            print(f"キャッシュ: 再利用 {self.page_cache.hits} ページ / 取得・解析 {self.page_cache.misses} ページ")
+        if self.deduplicator:
+            print(f"重複除去: {self.deduplicator.format_summary()}")
+        if self.archive is not None:
+            print(f"アーカイブ: {self.archive.format_summary()}")
+        
+        print(f"\nスクレイピング完了!")
+        print(f"総ページ数: {len(self.scraped_data)}")
+        print(f"出力ディレクトリ: {self.output_dir}")
+        print(f"HTTP統計: {self.http_client.format_summary()}")
+    
+    def _scrape_docs_serial(self, start_url, max_pages):
+        """1ページずつ順番にスクレイピングする"""
+        urls_to_visit = UrlQueue(visited=self.visited_urls)
+        if self.is_allowed(start_url):
+            urls_to_visit.add(normalize_url(start_url))
+        pages_scraped = 0
+        
         while urls_to_visit and pages_scraped < max_pages:
-            current_url = urls_to_visit.popleft()
-            
-            if current_url in self.visited_urls:
-                continue
-            
-            self.visited_urls.add(current_url)
+            current_url = urls_to_visit.pop()  # 訪問済みとして記録される
             
             # ページをスクレイピング
             found_links = self.scrape_page(current_url)
@@ -281,23 +506,51 @@ class CleanCursorDocsScraper:
             
             # 新しいリンクをキューに追加
             for link in found_links:
-                if link not in self.visited_urls and link not in urls_to_visit:
-                    urls_to_visit.append(link)
+                # 登録済みのリンク（サイドバーなど）は robots.txt の判定を省略する
+                if link not in urls_to_visit and self.is_allowed(link):
+                    urls_to_visit.add(link)
             
-            # サーバー負荷軽減のための待機
-            time.sleep(self.wait_time)
+            # サーバー負荷軽減のための待機（robots.txt の Crawl-delay の方が長ければそちらに従う）
+            time.sleep(max(self.wait_time, self.crawl_delay(current_url) or 0))
             
             print(f"進捗: {pages_scraped}/{max_pages} ページ完了")
+    
+    def reprocess_archive(self, workers=None, force=False):
+        """アーカイブに保存したレスポンスから、ページのマークダウンと統合ドキュメントを作り直す
         
-        # 統合されたマークダウンファイルを作成
-        self.create_combined_documentation()
+        サイトには接続しない。解析は workers 個のプロセスで並列に行い（既定はCPU数）、
+        保存はアーカイブの順に行う（逐次実行で取得したアーカイブなら、クロール時と同じ出力になる）。
+        アーカイブが空の場合や、ページのキャッシュ（http_cache.json）より記録したページが少ない場合は、
+        統合ドキュメントを欠けたページで置き換えないように ValueError を送出する（force=True で実行する）。
+        """
+        self._check_writable()
+        archive = self.archive
+        if archive is None:
+            archive = WarcArchive(os.path.join(self.output_dir, ARCHIVE_DIR))
+        cached = len(self.page_cache.entries) if self.page_cache else 0
+        if not force and (not len(archive) or len(archive) < cached):
+            raise ValueError(f"アーカイブのページ数（{len(archive)}）がキャッシュのページ数（{cached}）より少ないため、"
+                             "再解析しません（force=True で実行できます）")
+        print(f"アーカイブから再解析します: {len(archive)} ページ")
+        with tempfile.TemporaryDirectory() as work_dir:
+            initargs = (self.extract_options, work_dir)
+            if workers == 1:
+                _init_reprocess_worker(*initargs)
+            records = archive.map_records(_reprocess_record, workers, _init_reprocess_worker, initargs)
+            for url, page_info in records:
+                self.store_page(url, page_info)
         
-        print(f"\nスクレイピング完了!")
+        self.create_combined_documentation()
+        if self.deduplicator:
+            print(f"重複除去: {self.deduplicator.format_summary()}")
         print(f"総ページ数: {len(self.scraped_data)}")
-        print(f"出力ディレクトリ: {self.output_dir}")
     
     def create_combined_documentation(self):
-        """すべてのページを統合したクリーンなドキュメントを作成"""
+        """すべてのページを統合したクリーンなドキュメントを作成
+        
+        ページ情報は scraped_data（PageStore）から1ページずつ読み出すため、
+        ページ数によらずメモリには1ページ分しか保持しない。
+        """
         combined_path = os.path.join(self.output_dir, "cursor_documentation_complete.md")
         
         with open(combined_path, "w", encoding="utf-8") as f:
@@ -307,8 +560,8 @@ class CleanCursorDocsScraper:
             
             # 目次を作成
             f.write("## 目次\n\n")
-            for i, page in enumerate(self.scraped_data, 1):
-                f.write(f"{i}. [{page['title']}](#{self.create_anchor(page['title'])})\n")
+            for i, (title, anchor) in enumerate(self.scraped_data.toc(), 1):
+                f.write(f"{i}. [{title}](#{anchor})\n")
             f.write("\n---\n\n")
             
             # 各ページの内容を追加
@@ -334,14 +587,39 @@ class CleanCursorDocsScraper:
         anchor = re.sub(r'[-\s]+', '-', anchor)
         return anchor.strip('-')
 
+
+# reprocess_archive のワーカープロセスで解析に使うスクレイパー
+_reprocess_scraper = None
+
+
+def _init_reprocess_worker(options, work_dir):
+    """解析だけを行うスクレイパーを作る（キャッシュ・robots.txt・重複除去は使わない）"""
+    global _reprocess_scraper
+    _reprocess_scraper = CleanCursorDocsScraper(
+        output_dir=tempfile.mkdtemp(dir=work_dir), use_cache=False, respect_robots=False, dedup=False, **options
+    )
+
+
+def _reprocess_record(response):
+    """アーカイブのレスポンスを解析して page_info を返す"""
+    page_info, _ = _reprocess_scraper.process_page(response.url, response)
+    return page_info
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Cursorドキュメントをスクレイピングしてクリーンなマークダウンを作成する")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
     scraper = CleanCursorDocsScraper()
     
     # スクレイピング実行
-    scraper.scrape_docs(
-        start_url="https://docs.cursor.com/welcome",
-        max_pages=200  # 必要に応じて調整
-    )
+    with MetricsReporter(port=args.metrics_port, snapshot_path=args.metrics_file, interval=args.metrics_interval), \
+            profiled(args.profile, [(CleanCursorDocsScraper, name) for name in PROFILED_METHODS]):
+        scraper.scrape_docs(
+            start_url="https://docs.cursor.com/welcome",
+            max_pages=200  # 必要に応じて調整
+        )
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
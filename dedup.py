@@ -0,0 +1,185 @@
+"""クロール全体でのページ・セクションの重複除去
+
+ドキュメントサイトでは同じページが複数のURL（末尾の /、クエリパラメータ、言語の
+リダイレクトなど）で配信されることがある。ContentDeduplicator はページの本文を
+正規化したテキストのハッシュ値で完全一致の重複を、SimHash で内容がほぼ同じページを検出する。
+
+SimHash は単語の shingle（連続する数語）のハッシュから作る64ビットの値で、内容が
+近いページほどハミング距離が小さくなる。SimHashIndex は64ビットを max_distance + 1 個の
+ブロックに分けてブロックごとに索引を作る。ハミング距離が max_distance 以下の2つの値は
+少なくとも1つのブロックが完全に一致するため（鳩の巣原理）、全ページとの総当たりをせずに
+候補を見つけられる。
+"""
+import hashlib
+import re
+import threading
+
+from metrics import METRICS
+from page_cache import content_hash
+
+WORD_PATTERN = re.compile(r"\w+")
+
+_DEDUP_HITS = METRICS.counter("dedup_hits_total", "重複として省いた件数（kind: body / exact / near / section）")
+
+
+def normalize_text(text):
+    """大文字・小文字と空白の違いを無視するためにテキストを正規化する"""
+    return " ".join(text.lower().split())
+
+
+def text_hash(text):
+    """正規化したテキストのハッシュ値"""
+    return hashlib.blake2b(normalize_text(text).encode("utf-8"), digest_size=16).hexdigest()
+
+
+def page_text(page_info):
+    """page_info のセクションの見出しと本文をつなげたテキスト"""
+    return "\n".join(f"{section['title']}\n{section['content']}" for section in page_info["sections"])
+
+
+def simhash(text, shingle_size=3):
+    """単語の shingle から64ビットの SimHash を計算する"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) > shingle_size:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+    else:
+        shingles = words
+    if not shingles:
+        return 0
+    hashes = (hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).hexdigest() for shingle in shingles)
+    # 各ハッシュを64文字の2進数にして列ごとに1の数を数え、過半数の列のビットを立てる
+    columns = zip(*(format(int(value, 16), "064b") for value in hashes))
+    half = len(shingles) / 2
+    result = 0
+    for column in columns:
+        result = (result << 1) | (column.count("1") > half)
+    return result
+
+
+class SimHashIndex:
+    """ハミング距離が max_distance 以下の SimHash を探す索引"""
+
+    def __init__(self, max_distance=3):
+        self.max_distance = max_distance
+        blocks = max_distance + 1
+        # 64ビットを blocks 個に分ける（端数は先頭のブロックから1ビットずつ割り当てる）
+        widths = [64 // blocks + (i < 64 % blocks) for i in range(blocks)]
+        self._blocks = []
+        shift = 64
+        for width in widths:
+            shift -= width
+            self._blocks.append((shift, (1 << width) - 1))
+        self._tables = [{} for _ in self._blocks]
+
+    def find(self, value):
+        """value に近い値を登録したときのキーを返す（なければ None）"""
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            for other, key in table.get((value >> shift) & mask, ()):
+                if bin(value ^ other).count("1") <= self.max_distance:
+                    return key
+        return None
+
+    def add(self, value, key):
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            table.setdefault((value >> shift) & mask, []).append((value, key))
+
+
+class ContentDeduplicator:
+    """クロール全体で重複したページとセクションを検出する
+
+    - check_page: 本文が既に保存したページと同じ（near_duplicates=True なら SimHash で
+      ほぼ同じ）ページなら、最初に保存したページのURLを返す
+    - unique_sections: 既に保存したページに同じ内容があるセクションを除いた page_info を返す
+      （min_section_length 文字未満の短いセクションは対象外）
+    - note_body: レスポンス本文が既に保存したページと同じなら、解析する前にそのURLを返す
+      （記録した本文のハッシュ値は check_page でページを保存するときに登録し、
+      保存しなかった場合は discard_body で破棄する）
+    """
+
+    def __init__(self, near_duplicates=False, max_distance=3, min_section_length=200):
+        self.min_section_length = min_section_length
+        self.page_hashes = {}  # 本文のハッシュ値 → URL
+        self.body_hashes = {}  # レスポンス本文のハッシュ値 → URL
+        self.section_hashes = set()
+        self.index = SimHashIndex(max_distance) if near_duplicates else None
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.body_duplicates = 0
+        self.duplicate_sections = 0
+        self._pending_bodies = {}  # URL → 解析中のレスポンス本文のハッシュ値
+        self._lock = threading.Lock()
+
+    def note_body(self, url, body):
+        """レスポンス本文を記録し、既に保存したページと同じ本文ならそのURLを返す"""
+        if not body:
+            return None
+        return self.note_body_hash(url, content_hash(body))
+
+    def note_body_hash(self, url, body_hash):
+        """note_body と同じ（本文の代わりにハッシュ値を渡す。304 で本文がないキャッシュのページなど）"""
+        if not body_hash:
+            return None
+        with self._lock:
+            duplicate_of = self.body_hashes.get(body_hash)
+            if duplicate_of is not None and duplicate_of != url:
+                self.body_duplicates += 1
+                _DEDUP_HITS.inc(kind="body")
+                return duplicate_of
+            self._pending_bodies[url] = body_hash
+        return None
+
+    def discard_body(self, url):
+        """note_body で記録した本文のハッシュ値を破棄する（ページを保存しなかった場合）"""
+        with self._lock:
+            self._pending_bodies.pop(url, None)
+
+    def check_text(self, url, text):
+        """テキストが既に登録したページと重複していればそのURLを返し、なければ登録して None を返す"""
+        key = text_hash(text)
+        with self._lock:
+            body_hash = self._pending_bodies.pop(url, None)
+            duplicate_of = self.page_hashes.get(key)
+            if duplicate_of is not None:
+                self.exact_duplicates += 1
+                _DEDUP_HITS.inc(kind="exact")
+                return duplicate_of
+            value = None
+            if self.index is not None:
+                value = simhash(text)
+                duplicate_of = self.index.find(value)
+                if duplicate_of is not None:
+                    self.near_duplicates += 1
+                    _DEDUP_HITS.inc(kind="near")
+                    return duplicate_of
+            self.page_hashes[key] = url
+            if body_hash is not None:
+                self.body_hashes[body_hash] = url
+            if value is not None:
+                self.index.add(value, url)
+        return None
+
+    def check_page(self, url, page_info):
+        return self.check_text(url, page_text(page_info))
+
+    def unique_sections(self, page_info):
+        """既に登録したセクションと同じ内容のセクションを除いた page_info を返す"""
+        sections = []
+        for section in page_info["sections"]:
+            content = normalize_text(section["content"])
+            if len(content) >= self.min_section_length:
+                key = text_hash(content)
+                with self._lock:
+                    if key in self.section_hashes:
+                        self.duplicate_sections += 1
+                        _DEDUP_HITS.inc(kind="section")
+                        continue
+                    self.section_hashes.add(key)
+            sections.append(section)
+        if len(sections) == len(page_info["sections"]):
+            return page_info
+        return dict(page_info, sections=sections)
+
+    def format_summary(self):
+        return (f"重複ページ {self.exact_duplicates + self.near_duplicates + self.body_duplicates} "
+                f"（完全一致 {self.exact_duplicates}、類似 {self.near_duplicates}、"
+                f"解析前に検出 {self.body_duplicates}）、重複セクション {self.duplicate_sections}")
@@ -0,0 +1,369 @@
+"""crawler.py のクロールを複数のワーカー（プロセス・マシン）に分散する
+
+URLはホスト名のハッシュ値でシャードに分け、1つのホストのURLは常に同じワーカーが担当する。
+robots.txt のキャッシュ・ホストごとの待機時間（HostScheduler）・フロンティア（SQLite）は
+ワーカーごとに持つため、ワーカー間で共有する必要がない。
+
+コーディネーターは次の役割だけを持つ:
+- 他のシャードのリンクの転送（ワーカーはリンクをまとめて送り、コーディネーターは
+  登録済みのURLを除いて担当のワーカーの受信箱に入れる）
+- 同じ内容のページの判定（ページのテキストのハッシュ値をワーカー間で共有する）
+- 終了の判定（すべてのワーカーが空で、受信箱も空になったら終了する）
+
+通信は multiprocessing.connection（TCP、authkey による認証）なので、1台で複数のプロセスとしても、
+複数のマシンでも実行できる。
+
+    python distributed_crawl.py --urls urls.txt --workers 4                      # 1台で4プロセス
+    python distributed_crawl.py --role coordinator --listen 0.0.0.0:7070 --workers 4 --urls urls.txt
+    python distributed_crawl.py --role worker --connect coordinator-host:7070 --shard 0   # 各マシンで
+"""
+import argparse
+import glob
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+from urllib.parse import urlparse
+
+import crawler
+from crawl_frontier import CrawlFrontier
+from dedup import text_hash
+from host_scheduler import HostScheduler, PolitenessPolicy
+from robots import RobotsCache
+from seen_set import FingerprintSet
+from url_utils import normalize_url
+
+BATCH_SIZE = 200 # 他のシャードへのリンクをこの件数ごとにまとめて送る
+FLUSH_SECONDS = 0.5 # 件数に満たなくても、この秒数ごとに送る
+POLL_SECONDS = 0.1 # 担当のURLがないワーカーがコーディネーターに問い合わせる間隔
+
+
+def shard_for_host(host, shards):
+    """ホスト名を担当するシャードの番号（プロセスやマシンが変わっても同じ値になる）"""
+    return int.from_bytes(hashlib.blake2b(host.encode("utf-8"), digest_size=8).digest(), "big") % shards
+
+
+def shard_for_url(url, shards):
+    return shard_for_host(urlparse(url).netloc, shards)
+
+
+def parse_address(address):
+    """"host:port" を (host, port) にする"""
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class CrawlCoordinator:
+    """シャード間のリンクの転送・ページの重複判定・終了判定を行うコーディネーター"""
+
+    def __init__(self, shards, allowed_hosts=()):
+        self.shards = shards
+        self.allowed_hosts = sorted(allowed_hosts)
+        self.inboxes = [[] for _ in range(shards)]
+        self.idle = [False] * shards  # 最後の問い合わせで担当のURLがなかったか
+        self.connected = [False] * shards
+        self.worker_stats = [{} for _ in range(shards)]
+        self.seen = FingerprintSet()  # 転送したURL（同じURLを何度も転送しない）
+        self.page_hashes = {}  # ページのテキストのハッシュ値 → 最初に保存したURL
+        self.forwarded = 0
+        self.duplicate_links = 0
+        self.duplicate_pages = 0
+        self.finished = threading.Event()
+        self.listener = None
+        self._lock = threading.Lock()
+
+    def seed(self, urls):
+        """初期URLを担当のシャードに振り分ける"""
+        with self._lock:
+            self._route([(url, 0) for url in urls])
+
+    def _route(self, links):
+        for url, depth in links:
+            if url in self.seen:
+                self.duplicate_links += 1
+                continue
+            self.seen.add(url)
+            self.inboxes[shard_for_url(url, self.shards)].append((url, depth))
+
+    def handle(self, message):
+        """ワーカーからのメッセージを処理し、返信を返す"""
+        kind = message[0]
+        with self._lock:
+            if kind == "hello":
+                shard = message[1]
+                if not 0 <= shard < self.shards:
+                    return ValueError(f"shard {shard} is out of range (0-{self.shards - 1})")
+                self.connected[shard] = True
+                return {"shards": self.shards, "allowed_hosts": self.allowed_hosts}
+            if kind == "links":
+                self.forwarded += len(message[1])
+                self._route(message[1])
+                return None
+            if kind == "page":
+                _, url, key = message
+                duplicate_of = self.page_hashes.setdefault(key, url)
+                if duplicate_of == url:
+                    return None
+                self.duplicate_pages += 1
+                return duplicate_of
+            if kind == "poll":
+                _, shard, idle, stats = message
+                self.worker_stats[shard] = stats
+                urls, self.inboxes[shard] = self.inboxes[shard], []
+                self.idle[shard] = idle and not urls
+                if all(self.idle) and not any(self.inboxes):
+                    self.finished.set()
+                return urls, self.finished.is_set()
+            return ValueError(f"unknown message: {kind}")
+
+    def _serve_connection(self, connection):
+        with connection:
+            while True:
+                try:
+                    message = connection.recv()
+                except (EOFError, OSError):
+                    return
+                connection.send(self.handle(message))
+
+    def _accept(self):
+        while not self.finished.is_set():
+            try:
+                connection = self.listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve_connection, args=(connection,), daemon=True).start()
+
+    def serve(self, address, authkey):
+        """別スレッドで接続を受け付け、実際に待ち受けているアドレスを返す（ポート 0 なら空いているポート）"""
+        self.listener = Listener(address, authkey=authkey)
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self.listener.address
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+
+    def format_stats(self):
+        """シャードごとのホスト数・取得件数・失敗件数・転送したリンク数を表形式の文字列にする"""
+        lines = [f"{'shard':>5} {'hosts':>6} {'pages':>7} {'failed':>7} {'sent':>8}"]
+        for shard, stats in enumerate(self.worker_stats):
+            lines.append(f"{shard:>5} {stats.get('hosts', 0):>6,} {stats.get('pages', 0):>7,} "
+                         f"{stats.get('failed', 0):>7,} {stats.get('sent', 0):>8,}")
+        lines.append(f"forwarded links {self.forwarded:,} (already seen {self.duplicate_links:,}), "
+                     f"duplicate pages {self.duplicate_pages:,}")
+        return "\n".join(lines)
+
+
+class CoordinatorClient:
+    """ワーカーからコーディネーターへの接続"""
+
+    def __init__(self, address, authkey, shard):
+        self.shard = shard
+        self.connection = Client(address, authkey=authkey)
+        self.config = self.request(("hello", shard))
+
+    def request(self, message):
+        self.connection.send(message)
+        reply = self.connection.recv()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def close(self):
+        self.connection.close()
+
+
+class RemoteDeduplicator:
+    """ページのテキストのハッシュ値をコーディネーターで判定する（crawler.deduplicator の代わりに使う）"""
+
+    def __init__(self, client):
+        self.client = client
+        self.duplicates = 0
+
+    def check_text(self, url, text):
+        duplicate_of = self.client.request(("page", url, text_hash(text)))
+        self.duplicates += duplicate_of is not None
+        return duplicate_of
+
+    def format_summary(self):
+        return f"重複ページ {self.duplicates}"
+
+
+def run_worker(address, authkey, shard, output_dir=None, max_depth=None, wait_time=None,
+               batch_size=BATCH_SIZE, flush_seconds=FLUSH_SECONDS):
+    """1つのシャードを担当するワーカー（コーディネーターが終了を伝えるまでクロールする）"""
+    output_dir = output_dir or crawler.OUTPUT_DIR
+    max_depth = crawler.MAX_DEPTH if max_depth is None else max_depth
+    wait_time = crawler.WAIT_TIME if wait_time is None else wait_time
+    os.makedirs(output_dir, exist_ok=True)
+
+    client = CoordinatorClient(address, authkey, shard)
+    shards = client.config["shards"]
+    allowed_hosts = set(client.config["allowed_hosts"])
+    crawler.deduplicator = RemoteDeduplicator(client)
+
+    frontier = CrawlFrontier(os.path.join(output_dir, f"frontier-{shard}.sqlite"),
+                             checkpoint_every=crawler.CHECKPOINT_EVERY)
+    robots = RobotsCache(os.path.join(output_dir, f"robots_cache-{shard}.json"), crawler.http_client)
+    scheduler = HostScheduler(frontier, PolitenessPolicy(wait_time, crawler.HOST_WAIT_TIMES, robots))
+    outbox = []  # 他のシャードに送るリンク (URL, 深さ)
+    stats = {"pages": 0, "failed": 0, "sent": 0}
+    last_flush = last_poll = time.monotonic()
+
+    def flush():
+        nonlocal last_flush
+        if outbox:
+            client.request(("links", outbox[:]))
+            stats["sent"] += len(outbox)
+            del outbox[:]
+        last_flush = time.monotonic()
+
+    try:
+        while True:
+            if outbox and (len(outbox) >= batch_size or time.monotonic() - last_flush >= flush_seconds):
+                flush()
+
+            # 今すぐ取得できるURLがなければ（または一定時間ごとに）コーディネーターに問い合わせる
+            ready_in = scheduler.ready_in()
+            if ready_in is None or ready_in > 0 or time.monotonic() - last_poll >= flush_seconds:
+                if ready_in is None:
+                    flush() # 空になったと伝える前に、送っていないリンクを送る
+                stats["hosts"] = len(scheduler.stats)
+                urls, stop = client.request(("poll", shard, ready_in is None, dict(stats)))
+                last_poll = time.monotonic()
+                if stop:
+                    break
+                for url, depth in urls:
+                    if robots.is_allowed(url):
+                        frontier.add(url, depth)
+                if not urls and ready_in != 0:
+                    time.sleep(POLL_SECONDS if ready_in is None else min(ready_in, POLL_SECONDS))
+                continue
+
+            item = scheduler.next(block=False)
+            if item is None:
+                continue
+            url, depth = item
+            if depth > max_depth:
+                print(f"Skipping {url} (depth exceeded)")
+                frontier.mark_done(url)
+                continue
+
+            found_links = crawler.process_url(frontier, scheduler, url, depth, output_dir, max_depth)
+            if found_links is None:
+                stats["failed"] += 1
+                continue
+            stats["pages"] += 1
+            if depth >= max_depth:
+                continue
+            # 担当のホストのリンクはフロンティアに追加し、他のシャードのリンクは転送する
+            for link in crawler.links_in_scope(url, found_links, allowed_hosts):
+                if shard_for_url(link, shards) != shard:
+                    outbox.append((link, depth + 1))
+                elif robots.is_allowed(link):
+                    frontier.add(link, depth + 1)
+    finally:
+        print(f"[shard {shard}] Frontier: {frontier.format_counts()}")
+        frontier.close()
+        robots.save()
+        client.close()
+
+
+def run_distributed(initial_urls, workers, output_dir=None, max_depth=None, wait_time=None,
+                    follow_seed_hosts=False):
+    """1台でコーディネーターと workers 個のワーカープロセスを起動してクロールし、コーディネーターを返す"""
+    urls = [normalize_url(url) for url in initial_urls if urlparse(url).netloc]
+    allowed_hosts = {urlparse(url).netloc for url in urls} if follow_seed_hosts else ()
+    coordinator = CrawlCoordinator(workers, allowed_hosts)
+    coordinator.seed(urls)
+    authkey = os.urandom(16)
+    address = coordinator.serve(("127.0.0.1", 0), authkey)
+
+    processes = [
+        multiprocessing.Process(target=run_worker, args=(address, authkey, shard, output_dir, max_depth, wait_time))
+        for shard in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        while any(process.is_alive() for process in processes):
+            for process in processes:
+                process.join(POLL_SECONDS)
+                if process.exitcode:
+                    # 異常終了したワーカーがあれば、他のワーカーも終了させる（再実行で再開できる）
+                    print(f"Worker {processes.index(process)} exited with code {process.exitcode}")
+                    coordinator.finished.set()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+        coordinator.close()
+    return coordinator
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URLをホストごとにシャードに分け、複数のワーカーでクロールする")
+    parser.add_argument("--role", choices=("local", "coordinator", "worker"), default="local",
+                        help="local: 1台でコーディネーターとワーカーを起動する / coordinator / worker: 複数のマシンで実行する")
+    parser.add_argument("--urls", default=crawler.URL_LIST_FILE, help="初期URLのリストファイル")
+    parser.add_argument("--output-dir", default=crawler.OUTPUT_DIR, help="抽出したテキストの保存先")
+    parser.add_argument("--max-depth", type=int, default=crawler.MAX_DEPTH, help="リンクを辿る最大の深さ")
+    parser.add_argument("--wait", type=float, default=crawler.WAIT_TIME, help="同じホストへのページ取得間の待機時間（秒）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="シャード（ワーカー）の数")
+    parser.add_argument("--listen", default="127.0.0.1:7070", help="coordinator が待ち受けるアドレス")
+    parser.add_argument("--connect", default="127.0.0.1:7070", help="worker が接続するコーディネーターのアドレス")
+    parser.add_argument("--shard", type=int, default=0, help="worker が担当するシャードの番号")
+    parser.add_argument("--authkey", default=os.environ.get("CRAWL_AUTHKEY", ""),
+                        help="コーディネーターとワーカーの認証キー（既定: 環境変数 CRAWL_AUTHKEY、"
+                             "coordinator / worker では必須）")
+    parser.add_argument("--follow-seed-hosts", action="store_true",
+                        help="同一ドメインに加えて、初期URLの他のホストへのリンクも辿る")
+    parser.add_argument("--fresh", action="store_true", help="保存済みのクロール状態を破棄して最初からクロールする")
+    args = parser.parse_args()
+
+    if args.fresh:
+        for path in glob.glob(os.path.join(args.output_dir, "frontier-*.sqlite*")):
+            os.remove(path)
+
+    # 空の認証キーでは Listener が認証を行わず（Client は認証を待ち続ける）、
+    # 誰からでも pickle を受け付けてしまうため、複数のマシンで実行する場合は必須にする
+    authkey = args.authkey.encode("utf-8")
+    if args.role != "local" and not authkey:
+        print("エラー: --authkey または環境変数 CRAWL_AUTHKEY で認証キーを指定してください。")
+        return
+
+    if args.role == "worker":
+        run_worker(parse_address(args.connect), authkey, args.shard,
+                   args.output_dir, args.max_depth, args.wait)
+        return
+
+    try:
+        initial_urls = crawler.load_url_list(args.urls)
+    except FileNotFoundError:
+        print(f"エラー: URLリストファイル '{args.urls}' が見つかりません。ファイルを作成してください。")
+        return
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    started = time.monotonic()
+    if args.role == "local":
+        coordinator = run_distributed(initial_urls, args.workers, args.output_dir, args.max_depth, args.wait,
+                                      args.follow_seed_hosts)
+    else:
+        urls = [normalize_url(url) for url in initial_urls if urlparse(url).netloc]
+        coordinator = CrawlCoordinator(args.workers, {urlparse(url).netloc for url in urls}
+                                       if args.follow_seed_hosts else ())
+        coordinator.seed(urls)
+        print(f"Listening on {args.listen} for {args.workers} workers...")
+        coordinator.serve(parse_address(args.listen), authkey)
+        coordinator.finished.wait()
+        time.sleep(POLL_SECONDS * 5) # ワーカーが終了の返信を受け取るまで待つ
+        coordinator.close()
+
+    print(f"Crawling finished in {time.monotonic() - started:.1f} s")
+    print(coordinator.format_stats())
+
+
+if __name__ == "__main__":
+    main()
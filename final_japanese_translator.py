@@ -1,328 +1,458 @@
+import argparse
+import glob
+import hashlib
+import json
 import os
-import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from glossary import GLOSSARY_DIR, MATCHER_CACHE_DIR, FIXES_TIER, load_glossary_and_matcher
+from markdown_segments import BLANK, iter_segments, iter_spans
+from metrics import METRICS, MetricsReporter, add_metrics_arguments
+from profiling import profiled
+from translation_engine import RewriteEngine
+from translation_memory import TranslationMemory
+
+# 翻訳メモリの既定の保存先
+TRANSLATION_MEMORY_PATH = ".translation_memory.sqlite"
+# 翻訳・後処理の手順を変更した場合はこの値を上げる（翻訳メモリの記録が使われなくなる）
+TRANSLATION_PIPELINE_VERSION = 3
+
+# 最終版のタイトルと説明（翻訳・修正の後に置き換える）
+TITLE_REPLACEMENTS = [
+    (
+        "# Cursor 完全ドキュメント（日本語版）",
+        "# Cursor 完全ドキュメント（最終日本語版）"
+    ),
+    (
+        "このドキュメントは、Cursorの公式ドキュメントサイトから収集した情報を日本語で整理したものです。",
+        "このドキュメントは、Cursorの公式ドキュメントサイトから収集した情報を完全に日本語化し、自然で読みやすい形に整理した最終版です。"
+    ),
+]
+
+# --profile で計測するメソッド（バッチモードのワーカープロセスでの呼び出しは計測されない）
+PROFILED_METHODS = ("translate_stream", "translate_with_memory", "translate_in_memory",
+                    "comprehensive_translate", "translate_segment", "clean_artifacts")
+
+# 計測値（metrics.METRICS）
+_FILE_SECONDS = METRICS.histogram("translation_file_seconds", "1ファイルの翻訳にかかった時間")
+_TRANSLATION_BYTES = METRICS.counter("translation_bytes_total", "翻訳したファイルのバイト数（direction: in / out）")
+_REPLACEMENTS = METRICS.counter("translation_replacements_total", "用語集による置換の回数（rule: 置換した英語の語）")
+_MEMORY_LOOKUPS = METRICS.counter("translation_memory_lookups_total", "翻訳メモリの検索（result: hit / miss）")
+
+
+def _record_translation_metrics(stats, seconds):
+    """1ファイルの翻訳の統計情報（translate_stream などの戻り値）を計測値に加える"""
+    _FILE_SECONDS.observe(seconds)
+    _TRANSLATION_BYTES.inc(stats["bytes_in"], direction="in")
+    _TRANSLATION_BYTES.inc(stats["bytes_out"], direction="out")
+    for english, count in stats["replacements"].items():
+        _REPLACEMENTS.inc(count, rule=english)
+    if "memory_hits" in stats:
+        _MEMORY_LOOKUPS.inc(stats["memory_hits"], result="hit")
+        _MEMORY_LOOKUPS.inc(stats["memory_misses"], result="miss")
 
 class FinalJapaneseTranslator:
-    def __init__(self):
+    def __init__(self, glossary_dir=GLOSSARY_DIR, extra_glossaries=(), cache_dir=MATCHER_CACHE_DIR,
+                 fixed_point_fixes=False):
         self.input_file = "Cursor完全ドキュメント_日本語版.md"
         self.output_file = "Cursor完全ドキュメント_最終日本語版.md"
+        self.glossary_dir = glossary_dir
+        self.extra_glossaries = tuple(extra_glossaries)
+        self.cache_dir = cache_dir
+        # True の場合、修正ルールを変化がなくなるまで繰り返し適用する
+        self.fixed_point_fixes = fixed_point_fixes
+        self.glossary = None
+        self.engine = None
+        self.rewriter = None
+        self.startup_stats = None
         
-    def comprehensive_translate(self, content):
-        """包括的な日本語翻訳"""
-        
-        # 1. 基本的な英単語を日本語に置換
-        basic_translations = {
-            # 基本用語
-            "Welcome": "ようこそ",
-            "Installation": "インストール", 
-            "Getting Started": "はじめに",
-            "Get Started": "はじめに",
-            "Features": "機能",
-            "Overview": "概要",
-            "Introduction": "はじめに",
-            "Dashboard": "ダッシュボード",
-            "Settings": "設定",
-            "Account": "アカウント",
-            "Billing": "請求",
-            "Support": "サポート",
-            "Documentation": "ドキュメント",
-            "Members": "メンバー",
-            "Roles": "役割",
-            "Plans": "プラン",
-            "Usage": "使用状況",
-            "Custom": "カスタム",
-            "Advanced": "高度な",
-            "Basic": "基本",
-            "Quick": "クイック",
-            "Manual": "手動",
-            "Auto": "自動",
-            "Background": "バックグラウンド",
-            "Context": "コンテキスト",
-            "Files": "ファイル",
-            "Folders": "フォルダ",
-            "Code": "コード",
-            "Terminal": "ターミナル",
-            "Keyboard": "キーボード",
-            "Shortcuts": "ショートカット",
-            "Commands": "コマンド",
-            "Tools": "ツール",
-            "Models": "モデル",
-            "API": "API",
-            "Keys": "キー",
-            "Rules": "ルール",
-            "Definitions": "定義",
-            "Changes": "変更",
-            "Recent": "最近の",
-            "Past": "過去の",
-            "Chats": "チャット",
-            "Mode": "モード",
-            "Agent": "エージェント",
-            "Ask": "質問",
-            "Max": "最大",
-            "Managing": "管理",
-            "Indexing": "インデックス",
-            "Codebase": "コードベース",
-            "Large": "大規模",
-            "Codebases": "コードベース",
-            "Working": "作業",
-            "Import": "インポート",
-            "Modes": "モード",
-            "Notepads": "ノートパッド",
-            "Beta": "ベータ",
-            "Web": "ウェブ",
-            "Development": "開発",
-            "JavaScript": "JavaScript",
-            "TypeScript": "TypeScript",
-            "iOS": "iOS",
-            "macOS": "macOS",
-            "Swift": "Swift",
-            "Python": "Python",
-            "Java": "Java",
-            "Common": "よくある",
-            "Issues": "問題",
-            "FAQ": "よくある質問",
-            "Troubleshooting": "トラブルシューティング",
-            "Guide": "ガイド",
-            "Getting": "取得",
-            "Request": "リクエスト",
-            "Apply": "適用",
-            "Git": "Git",
-            "Lint": "Lint",
-            "Errors": "エラー",
-            "Ignore": "無視",
-            "Links": "リンク",
-            "SSO": "SSO",
-            "Commit": "コミット",
-            "Message": "メッセージ",
-            "AI": "AI",
-            "Agents": "エージェント",
-            "Preview": "プレビュー",
-            "Protocol": "プロトコル",
-            "Architectural": "アーキテクチャ",
-            "Diagrams": "図",
-            "VS Code": "VS Code",
-            "JetBrains": "JetBrains",
-            "Early": "早期",
-            "Access": "アクセス",
-            "Program": "プログラム",
-            "Selecting": "選択",
-            "Cmd": "Cmd",
-            "Tab": "Tab"
-        }
-        
-        # 2. 複合語の翻訳
-        compound_translations = {
-            "Getting Started": "はじめに",
-            "Early Access Program": "早期アクセスプログラム",
-            "Custom API Keys": "カスタムAPIキー",
-            "Codebase Indexing": "コードベースインデックス",
-            "Model Context Protocol": "モデルコンテキストプロトコル",
-            "Architectural Diagrams": "アーキテクチャ図",
-            "Keyboard Shortcuts": "キーボードショートカット",
-            "Terminal Cmd K": "ターミナル Cmd+K",
-            "Common Issues": "よくある問題",
-            "Troubleshooting Guide": "トラブルシューティングガイド",
-            "Large Codebases": "大規模コードベース",
-            "Custom Modes": "カスタムモード",
-            "Auto-Import": "自動インポート",
-            "Background Agents": "バックグラウンドエージェント",
-            "Past Chats": "過去のチャット",
-            "Agent Mode": "エージェントモード",
-            "Ask mode": "質問モード",
-            "Manual Mode": "手動モード",
-            "Max Mode": "最大モード",
-            "Managing Context": "コンテキスト管理",
-            "Plans & Usage": "プラン・使用状況",
-            "Members + Roles": "メンバー・役割",
-            "JavaScript & TypeScript": "JavaScript・TypeScript",
-            "iOS & macOS (Swift)": "iOS・macOS（Swift）",
-            "Web Development": "ウェブ開発",
-            "AI Commit Message": "AIコミットメッセージ",
-            "Working with Context": "コンテキストでの作業"
-        }
+    def load_glossary(self):
+        """用語集とコンパイル済みマッチャーを読み込む（初回のみ）"""
+        if self.glossary is None:
+            self.glossary, self.engine, self.startup_stats = load_glossary_and_matcher(
+                self.glossary_dir, self.extra_glossaries, self.cache_dir
+            )
+            self.rewriter = RewriteEngine(self.glossary.tables[FIXES_TIER])
+        return self.glossary
         
-        # 3. 文章の翻訳
-        sentence_translations = {
-            "Cursor is an AI code editor": "Cursorは、AIを活用したコードエディタです",
-            "used by millions of engineers": "世界中の数百万人のエンジニアに利用されています",
-            "powered by a series of custom models": "独自開発されたモデル群により動作し",
-            "generate more code than almost any other LLMs in the world": "世界中のほぼ全てのLLMを上回るコード生成能力を持っています",
-            "Tab predicts your next series of edits": "Tab機能は、あなたの次の編集操作を予測します",
-            "Your AI pair programmer": "あなたのAIペアプログラマー",
-            "for complex code changes": "複雑なコード変更に対応",
-            "Make large-scale edits": "大規模な編集を実行し",
-            "with context control": "コンテキスト制御機能と",
-            "and automatic fixes": "自動修正機能を提供",
-            "Quick inline code editing": "素早いインライン編集",
-            "and generation": "およびコード生成",
-            "Perfect for making precise changes": "正確な変更を行うのに最適で",
-            "without breaking your flow": "作業の流れを中断しません",
-            "Get started with Cursor": "Cursorを始めましょう",
-            "in minutes": "わずか数分で",
-            "by downloading and installing": "ダウンロードとインストールを行うことで",
-            "for your platform": "お使いのプラットフォーム向けの",
-            "You can download Cursor": "Cursorは以下からダウンロードできます",
-            "from the Cursor website": "Cursor公式ウェブサイト",
-            "for your platform of choice": "お好みのプラットフォーム用を",
-            "You'll have the option to import": "以下をインポートするオプションがあります",
-            "VS Code extensions and settings": "VS Codeの拡張機能と設定",
-            "in one-click": "ワンクリックで",
-            "To help you try Cursor": "Cursorをお試しいただけるよう",
-            "we have a 14-day free trial": "14日間の無料トライアルを提供しています",
-            "of our Pro plan": "Proプランの",
-            "Learn about Cursor's core features": "Cursorの主要機能について学ぶ",
-            "and concepts": "と概念",
-            "Cursor has a number of core features": "Cursorには多くの主要機能があります",
-            "that will seamlessly integrate": "シームレスに統合される",
-            "with your workflow": "あなたのワークフローと",
-            "Use the links below": "以下のリンクを使用して",
-            "to learn more about": "詳細を学んでください",
-            "what Cursor can do": "Cursorができること"
-        }
+    def get_engine(self):
+        """用語集から作成した TranslationEngine を返す"""
+        self.load_glossary()
+        return self.engine
         
-        translated = content
+    def translation_version(self):
+        """翻訳結果を決める要素（用語集・後処理・タイトルの置換）から作るバージョン文字列"""
+        replacements = json.dumps(TITLE_REPLACEMENTS, ensure_ascii=False).encode("utf-8")
+        return (
+            f"{self.load_glossary().version}/p{TRANSLATION_PIPELINE_VERSION}"
+            f"{'f' if self.fixed_point_fixes else ''}-{hashlib.sha256(replacements).hexdigest()[:8]}"
+        )
         
-        # 複合語から先に翻訳（より長いフレーズを優先）
-        for english, japanese in sorted(compound_translations.items(), key=len, reverse=True):
-            pattern = re.compile(re.escape(english), re.IGNORECASE)
-            translated = pattern.sub(japanese, translated)
+    def format_startup_stats(self):
+        """用語集の読み込みにかかった時間を1行の文字列にする"""
+        self.load_glossary()
+        stats = self.startup_stats
+        return (
+            f"{stats['version']}（{stats['entries']}項目） 読み込み {stats['load_ms']:.1f} ms / "
+            f"マッチャー {stats['matcher_ms']:.1f} ms（{stats['matcher_source']}）"
+        )
         
-        # 文章の翻訳
-        for english, japanese in sorted(sentence_translations.items(), key=len, reverse=True):
-            pattern = re.compile(re.escape(english), re.IGNORECASE)
-            translated = pattern.sub(japanese, translated)
+    def comprehensive_translate(self, content, counts=None):
+        """包括的な日本語翻訳
         
-        # 基本単語の翻訳
-        for english, japanese in basic_translations.items():
-            # 単語境界を考慮した置換
-            pattern = re.compile(r'\b' + re.escape(english) + r'\b', re.IGNORECASE)
-            translated = pattern.sub(japanese, translated)
+        3つの辞書をまとめた1つのマッチャーで、文書を1回だけ走査して置換する。
+        コードブロック・インラインコード・URL・**URL:** の行は翻訳しない。
+        counts に辞書を渡すと、英語の語ごとの置換回数を加算する。
+        """
+        return "".join(
+            self.translate_segment(kind, segment, counts, finalize=False)
+            for kind, segment in iter_segments(content.splitlines(True))
+        )
+    
+    def translate_segment(self, kind, segment, counts=None, finalize=True):
+        """1つのセグメント（markdown_segments.iter_segments の結果）を翻訳する
         
-        return translated
+        翻訳する部分だけをマッチャーに渡し、コードやURLは原文のまま残す。
+        finalize=True の場合は、翻訳した部分に後処理（finalize_text）も適用する。
+        """
+        engine = self.get_engine()
+        parts = []
+        for translatable, start, end in iter_spans(kind, segment):
+            if not translatable:
+                parts.append(segment[start:end])
+                continue
+            # 直前の1文字は単語境界の判定にだけ使う
+            context = 1 if start else 0
+            text = segment[start - context:end]
+            translated = engine.translate(text, counts=counts, start=context)
+            parts.append(self.finalize_text(translated) if finalize else translated)
+        return "".join(parts)
     
     def clean_artifacts(self, content):
-        """翻訳の不自然な部分を修正"""
+        """翻訳の不自然な部分を修正
         
-        # 不自然な翻訳を修正
-        fixes = {
-            # 目次の修正
-            "ようこそ to Cursor": "Cursorへようこそ",
-            "はじめにed": "はじめに",
-            "取得 Started": "はじめに",
-            "取得 a リクエスト ID": "リクエストID取得",
-            
-            # 複数形の修正
-            "ファイルs": "ファイル",
-            "フォルダs": "フォルダ",
-            "メンバーs": "メンバー",
-            "問題s": "問題",
-            "変更s": "変更",
-            "エラーs": "エラー",
-            "ショートカットs": "ショートカット",
-            "コマンドs": "コマンド",
-            "図s": "図",
-            "リンクs": "リンク",
-            "モードs": "モード",
-            "エージェントs": "エージェント",
-            
-            # 接頭辞・接尾辞の修正
-            "自動-インポート": "自動インポート",
-            "バックグラウンド エージェント": "バックグラウンドエージェント",
-            "過去の チャット": "過去のチャット",
-            "よくある 問題": "よくある問題",
-            "トラブルシューティング ガイド": "トラブルシューティングガイド",
-            "大規模 コードベース": "大規模コードベース",
-            "カスタム モード": "カスタムモード",
-            "早期 アクセス プログラム": "早期アクセスプログラム",
-            "キーボード ショートカット": "キーボードショートカット",
-            "ターミナル Cmd K": "ターミナル Cmd+K",
-            "アーキテクチャ 図": "アーキテクチャ図",
-            "AIコミット メッセージ": "AIコミットメッセージ",
-            "カスタム API キー": "カスタムAPIキー",
-            "コードベース インデックス": "コードベースインデックス",
-            "モデル コンテキスト プロトコル": "モデルコンテキストプロトコル",
-            "ウェブ 開発": "ウェブ開発",
-            "作業 での コンテキスト": "コンテキストでの作業",
-            
-            # @記号付きの修正
-            "@過去の チャット": "@過去のチャット",
-            "@ファイル": "@ファイル",
-            "@フォルダ": "@フォルダ",
-            "@Cursor ルール": "@Cursorルール",
-            "@定義": "@定義",
-            "@最近の 変更": "@最近の変更",
-            "@Lint エラー": "@Lintエラー",
-            "@無視 ファイル": "@無視ファイル",
-            "@リンク": "@リンク",
-            "@ノートパッド": "@ノートパッド",
-            
-            # その他の修正
-            "プラン & 使用状況": "プラン・使用状況",
-            "メンバー + 役割": "メンバー・役割",
-            "JavaScript & TypeScript": "JavaScript・TypeScript",
-            "iOS & macOS (Swift)": "iOS・macOS（Swift）",
-            "モデル &": "モデル・",
-            "/コマンド": "/コマンド",
-            "#ファイル": "#ファイル",
-            
-            # 不自然な語順の修正
-            "作業 での": "での作業",
-            "管理 コンテキスト": "コンテキスト管理",
-            "選択 モデル": "モデル選択",
-            "無視 ファイル": "無視ファイル"
-        }
+        用語集の fixes 階層のルールを1回の走査でまとめて適用する。
+        同じ位置で複数のルールが一致する場合は最も長いものを優先する（RewriteEngine を参照）。
+        """
+        self.load_glossary()
+        return self.rewriter.rewrite(content, fixed_point=self.fixed_point_fixes)
+    
+    def finalize_text(self, content):
+        """翻訳後の修正と、タイトル・説明の更新を行う
         
-        for wrong, correct in fixes.items():
-            content = content.replace(wrong, correct)
+        修正ルールはどれも改行を含まないため、行単位で分割した一部分に
+        適用しても文書全体に適用した場合と同じ結果になる。
+        """
+        content = self.clean_artifacts(content)
+        
+        # タイトルと説明を更新
+        for old, new in TITLE_REPLACEMENTS:
+            content = content.replace(old, new)
         
         return content
     
-    def process_file(self):
-        """ファイルを処理して最終日本語版を作成"""
-        print(f"ファイルを読み込み中: {self.input_file}")
+    def translate_stream(self, input_path, output_path):
+        """入力ファイルをセグメントごとに読み込みながら翻訳・書き込みし、統計情報を返す
         
-        if not os.path.exists(self.input_file):
-            print(f"エラー: {self.input_file} が見つかりません。")
-            return False
+        メモリに保持するのは読み込み中の1セグメント（段落やコードブロック）だけで、
+        その長さは最大で markdown_segments.MAX_SEGMENT_CHARS 文字と1行分なので、入力のサイズによらず
+        使用量には上限がある。語の一致は空行をまたがず、後処理の規則も改行を含まないため、
+        出力は文書全体を一度に翻訳した場合と同じになる（MAX_SEGMENT_CHARS を超えて
+        分けた段落では、分けた位置をまたぐ語は一致しない）。
+        """
+        counts = {}
+        stats = {"lines_in": 0, "lines_out": 0, "replacements": counts}
         
-        with open(self.input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+        with open(input_path, 'r', encoding='utf-8') as src, \
+                open(output_path, 'w', encoding='utf-8') as dst:
+            for kind, segment in iter_segments(src):
+                translated = self.translate_segment(kind, segment, counts)
+                dst.write(translated)
+                stats["lines_in"] += _line_count(segment)
+                stats["lines_out"] += _line_count(translated)
         
-        print("包括的な日本語翻訳を実行中...")
-        translated_content = self.comprehensive_translate(content)
+        stats["bytes_in"] = os.path.getsize(input_path)
+        stats["bytes_out"] = os.path.getsize(output_path)
+        return stats
+    
+    def translate_with_memory(self, input_path, output_path, memory):
+        """翻訳メモリを使い、変更のあったセグメントだけを翻訳して統計情報を返す
         
-        print("翻訳の不自然な部分を修正中...")
-        translated_content = self.clean_artifacts(translated_content)
+        見出し・段落・リスト・コードブロックのセグメントごとに、原文と翻訳バージョンの
+        ハッシュ値で memory を引き、見つかればその翻訳をそのまま使う。
+        出力は translate_stream() と同じになる。
+        """
+        version = self.translation_version()
+        counts = {}
+        stats = {"lines_in": 0, "lines_out": 0, "replacements": counts,
+                 "memory_hits": 0, "memory_misses": 0}
         
-        # タイトルと説明を更新
-        translated_content = translated_content.replace(
-            "# Cursor 完全ドキュメント（日本語版）",
-            "# Cursor 完全ドキュメント（最終日本語版）"
-        )
+        with open(input_path, 'r', encoding='utf-8') as src, \
+                open(output_path, 'w', encoding='utf-8') as dst:
+            for kind, segment in iter_segments(src):
+                stats["lines_in"] += _line_count(segment)
+                if kind == BLANK:
+                    dst.write(segment)
+                    stats["lines_out"] += _line_count(segment)
+                    continue
+                translated = memory.get(segment, version)
+                if translated is None:
+                    translated = self.translate_segment(kind, segment, counts)
+                    memory.put(segment, version, translated)
+                    stats["memory_misses"] += 1
+                else:
+                    stats["memory_hits"] += 1
+                dst.write(translated)
+                stats["lines_out"] += _line_count(translated)
+        memory.commit()
         
-        translated_content = translated_content.replace(
-            "このドキュメントは、Cursorの公式ドキュメントサイトから収集した情報を日本語で整理したものです。",
-            "このドキュメントは、Cursorの公式ドキュメントサイトから収集した情報を完全に日本語化し、自然で読みやすい形に整理した最終版です。"
+        stats["bytes_in"] = os.path.getsize(input_path)
+        stats["bytes_out"] = os.path.getsize(output_path)
+        return stats
+    
+    def translate_in_memory(self, input_path, output_path):
+        """入力ファイル全体を読み込んで翻訳・書き込みし、統計情報を返す"""
+        with open(input_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        counts = {}
+        translated_content = "".join(
+            self.translate_segment(kind, segment, counts)
+            for kind, segment in iter_segments(content.splitlines(True))
         )
         
-        print(f"最終日本語版ファイルを保存中: {self.output_file}")
-        with open(self.output_file, 'w', encoding='utf-8') as f:
+        with open(output_path, 'w', encoding='utf-8') as f:
             f.write(translated_content)
         
+        return {
+            "lines_in": len(content.splitlines()),
+            "lines_out": len(translated_content.splitlines()),
+            "replacements": counts,
+            "bytes_in": os.path.getsize(input_path),
+            "bytes_out": os.path.getsize(output_path),
+        }
+    
+    def process_file(self, streaming=True, memory_path=None):
+        """ファイルを処理して最終日本語版を作成
+        
+        streaming=True（既定）の場合は、入力を少しずつ読み込みながら翻訳する。
+        memory_path を指定すると、翻訳メモリを使って変更のあったセグメントだけを翻訳する。
+        """
+        print(f"ファイルを読み込み中: {self.input_file}")
+        
+        if not os.path.exists(self.input_file):
+            print(f"エラー: {self.input_file} が見つかりません。")
+            return False
+        
+        print(f"用語集: {self.format_startup_stats()}")
+        
+        print("包括的な日本語翻訳と不自然な部分の修正を実行中...")
+        print(f"最終日本語版ファイルを保存中: {self.output_file}")
+        start = time.perf_counter()
+        if memory_path:
+            with TranslationMemory(memory_path) as memory:
+                stats = self.translate_with_memory(self.input_file, self.output_file, memory)
+                print(f"翻訳メモリ: {memory.format_summary()}")
+        elif streaming:
+            stats = self.translate_stream(self.input_file, self.output_file)
+        else:
+            stats = self.translate_in_memory(self.input_file, self.output_file)
+        _record_translation_metrics(stats, time.perf_counter() - start)
+        
         # 統計情報
-        file_size = os.path.getsize(self.output_file) / 1024  # KB
-        with open(self.output_file, 'r', encoding='utf-8') as f:
-            line_count = len(f.readlines())
+        file_size = stats["bytes_out"] / 1024  # KB
+        replacements = stats["replacements"]
         
         print(f"最終翻訳完了!")
-        print(f"ファイルサイズ: {file_size:.1f} KB")
-        print(f"総行数: {line_count:,} 行")
+        print(f"ファイルサイズ: {file_size:.1f} KB（入力 {stats['bytes_in'] / 1024:.1f} KB）")
+        print(f"総行数: {stats['lines_out']:,} 行（入力 {stats['lines_in']:,} 行）")
+        print(f"置換数: {sum(replacements.values()):,} 件 / {len(replacements)} 語")
+        for english, count in sorted(replacements.items(), key=lambda item: -item[1])[:10]:
+            print(f"  {english}: {count:,}")
         
         return True
 
+def _line_count(text):
+    """テキストの行数（末尾に改行のない最後の行も1行と数える）"""
+    return text.count("\n") + (1 if text and not text.endswith("\n") else 0)
+
+
+def file_hash(path):
+    """ファイル内容のハッシュ値を返す"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def resolve_inputs(source):
+    """ディレクトリ（直下の *.md）または glob パターンから入力ファイルの一覧を返す"""
+    if os.path.isdir(source):
+        paths = glob.glob(os.path.join(source, "*.md"))
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if os.path.isfile(path))
+
+
+# ワーカープロセスごとの翻訳器（初期化時に1回だけ用語集とマッチャーを読み込む）
+_worker_translator = None
+# ワーカープロセスごとの翻訳メモリの接続（使わない場合は None）
+_worker_memory = None
+
+
+def _init_batch_worker(glossary_dir, extra_glossaries, cache_dir, memory_path=None, fixed_point_fixes=False):
+    global _worker_translator, _worker_memory
+    _worker_translator = FinalJapaneseTranslator(glossary_dir, extra_glossaries, cache_dir, fixed_point_fixes)
+    _worker_translator.load_glossary()
+    _worker_memory = TranslationMemory(memory_path) if memory_path else None
+
+
+def _translate_file_worker(input_path, output_path):
+    """1ファイルを翻訳し、一時ファイル経由で出力先を置き換える"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp{os.getpid()}"
+    start = time.perf_counter()
+    try:
+        if _worker_memory is not None:
+            stats = _worker_translator.translate_with_memory(input_path, tmp_path, _worker_memory)
+        else:
+            stats = _worker_translator.translate_stream(input_path, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    stats["seconds"] = time.perf_counter() - start
+    return stats
+
+
+def translate_batch(source, output_dir, workers=None, force=False,
+                    glossary_dir=GLOSSARY_DIR, extra_glossaries=(), cache_dir=MATCHER_CACHE_DIR,
+                    memory_path=None, fixed_point_fixes=False):
+    """複数のマークダウンファイルをプロセスプールで並列に翻訳する
+    
+    source はディレクトリ（例: cursor_docs_clean）または glob パターン。
+    出力は output_dir 以下に同じファイル名で書き込む。前回の実行から内容と
+    翻訳バージョン（用語集・後処理の内容）が変わっていないファイルは翻訳をスキップする
+    （記録は output_dir/.translation_manifest.json）。
+    memory_path を指定すると、翻訳するファイルでも変更のないセグメントは翻訳メモリから取り出す。
+    fixed_point_fixes は FinalJapaneseTranslator と同じ（翻訳バージョンが変わるため、切り替えると全ファイルを翻訳し直す）。
+    """
+    # 親プロセスで用語集とマッチャーを読み込んでおく（fork 時はワーカーにそのまま引き継がれる）
+    translator = FinalJapaneseTranslator(glossary_dir, extra_glossaries, cache_dir, fixed_point_fixes)
+    version = translator.translation_version()
+    print(f"用語集: {translator.format_startup_stats()}")
+    
+    inputs = resolve_inputs(source)
+    if os.path.isdir(source):
+        base_dir = source
+    else:
+        # glob の場合は、一致したファイルに共通する親ディレクトリを基準にする
+        base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in inputs] or ["."])
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, ".translation_manifest.json")
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    
+    jobs = []
+    skipped = 0
+    for input_path in inputs:
+        relative = os.path.relpath(os.path.abspath(input_path), os.path.abspath(base_dir))
+        output_path = os.path.join(output_dir, relative)
+        source_hash = file_hash(input_path)
+        entry = manifest.get(relative)
+        if (not force and entry and os.path.exists(output_path)
+                and entry.get("source_hash") == source_hash
+                and entry.get("translation_version") == version):
+            skipped += 1
+            continue
+        jobs.append((relative, input_path, output_path, source_hash))
+    
+    print(f"入力: {len(inputs)} ファイル（翻訳 {len(jobs)} / スキップ {skipped}）")
+    
+    start = time.perf_counter()
+    totals = {"files": 0, "bytes_in": 0, "lines_in": 0, "replacements": 0,
+              "memory_hits": 0, "memory_misses": 0}
+    failed = 0
+    if jobs:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_batch_worker,
+            initargs=(glossary_dir, tuple(extra_glossaries), cache_dir, memory_path, fixed_point_fixes),
+        ) as executor:
+            futures = {
+                executor.submit(_translate_file_worker, input_path, output_path): (relative, source_hash)
+                for relative, input_path, output_path, source_hash in jobs
+            }
+            for future in as_completed(futures):
+                relative, source_hash = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"エラー: {relative} - {e}")
+                    continue
+                manifest[relative] = {"source_hash": source_hash, "translation_version": version}
+                _record_translation_metrics(stats, stats["seconds"])
+                totals["files"] += 1
+                totals["bytes_in"] += stats["bytes_in"]
+                totals["lines_in"] += stats["lines_in"]
+                totals["replacements"] += sum(stats["replacements"].values())
+                totals["memory_hits"] += stats.get("memory_hits", 0)
+                totals["memory_misses"] += stats.get("memory_misses", 0)
+    elapsed = time.perf_counter() - start
+    
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    
+    megabytes = totals["bytes_in"] / (1024 * 1024)
+    print(f"翻訳完了: {totals['files']} ファイル / {megabytes:.1f} MB / {totals['lines_in']:,} 行 / "
+          f"置換 {totals['replacements']:,} 件 / {elapsed:.2f} 秒"
+          + (f"（{megabytes / elapsed:.1f} MB/s）" if elapsed > 0 and megabytes else ""))
+    if memory_path:
+        segments = totals["memory_hits"] + totals["memory_misses"]
+        rate = totals["memory_hits"] / segments * 100 if segments else 0.0
+        print(f"翻訳メモリ: ヒット {totals['memory_hits']:,} / {segments:,} セグメント（{rate:.1f}%）")
+    if failed:
+        print(f"失敗: {failed} ファイル")
+    totals.update({"skipped": skipped, "failed": failed, "seconds": elapsed})
+    return totals
+
+
 def main():
-    translator = FinalJapaneseTranslator()
+    parser = argparse.ArgumentParser(description="Cursorドキュメントの最終日本語版を作成する")
+    parser.add_argument("--batch", metavar="INPUT",
+                        help="ディレクトリまたは glob パターンで指定した複数ファイルを並列に翻訳する")
+    parser.add_argument("--output-dir", default="cursor_docs_ja", help="バッチモードの出力ディレクトリ")
+    parser.add_argument("--workers", type=int, default=None, help="バッチモードのプロセス数（既定: CPU数）")
+    parser.add_argument("--force", action="store_true", help="変更のないファイルも翻訳し直す")
+    parser.add_argument("--memory", nargs="?", const=TRANSLATION_MEMORY_PATH, default=None, metavar="PATH",
+                        help=f"翻訳メモリを使い、変更のあったセグメントだけを翻訳する（既定: {TRANSLATION_MEMORY_PATH}）")
+    parser.add_argument("--fixed-point-fixes", action="store_true",
+                        help="翻訳後の修正ルールを、変化がなくなるまで繰り返し適用する")
+    add_metrics_arguments(parser)
+    args = parser.parse_args()
+    
+    with MetricsReporter(port=args.metrics_port, snapshot_path=args.metrics_file, interval=args.metrics_interval), \
+            profiled(args.profile, [(FinalJapaneseTranslator, name) for name in PROFILED_METHODS]):
+        run(args)
+
+
+def run(args):
+    """main のコマンドライン引数で翻訳を実行する"""
+    if args.batch:
+        translate_batch(args.batch, args.output_dir, workers=args.workers, force=args.force,
+                        memory_path=args.memory, fixed_point_fixes=args.fixed_point_fixes)
+        return
+    
+    translator = FinalJapaneseTranslator(fixed_point_fixes=args.fixed_point_fixes)
     
-    if translator.process_file():
+    if translator.process_file(memory_path=args.memory):
         print("\n🎉 最終日本語版の作成が完了しました!")
         print(f"📄 ファイル: {translator.output_file}")
         print("💡 このファイルは完全に日本語化され、自然で読みやすくなっています。")
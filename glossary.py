@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import time
+
+from translation_engine import TranslationEngine
+
+# 同梱の用語集ディレクトリ
+GLOSSARY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "glossaries")
+# 構築済みマッチャーのキャッシュ保存先（GLOSSARY_DIR と同じく、このモジュールの場所を基準にする）
+MATCHER_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".glossary_cache")
+
+# 翻訳に使う階層（優先度の高い順）と、単語境界を要求するか
+TRANSLATION_TIERS = (
+    ("compound", False),
+    ("sentence", False),
+    ("basic", True),
+)
+# 翻訳後の修正ルールの階層
+FIXES_TIER = "fixes"
+TIER_NAMES = tuple(name for name, _ in TRANSLATION_TIERS) + (FIXES_TIER,)
+
+# マッチャーの保存形式を変更した場合はこの値を上げる（古いキャッシュは使われなくなる）
+MATCHER_FORMAT_VERSION = 2
+
+# プロセス内で構築済みのマッチャー（用語集のダイジェスト -> TranslationEngine）
+_matcher_cache = {}
+
+
+def read_table(path):
+    """用語集ファイル（TSV または JSON）を読み込み、英語 -> 日本語 の辞書を返す
+
+    TSV は1行に「英語<TAB>日本語」を書く。空行と、タブを含まない # で始まる行
+    （コメント）は無視する（"#ファイル<TAB>#ファイル" のような項目は書ける）。
+    JSON は {"英語": "日本語", ...} 形式のオブジェクト。
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            return dict(json.load(f))
+
+    table = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.rstrip("\r\n")
+            if not line.strip():
+                continue
+            if "\t" not in line:
+                if line.lstrip().startswith("#"):
+                    continue
+                raise ValueError(f"{path}:{line_number}: タブ区切りになっていません: {line!r}")
+            english, japanese = line.split("\t", 1)
+            table[english] = japanese
+    return table
+
+
+class Glossary:
+    """manifest.json で定義された用語集（階層ごとの辞書とバージョン）
+
+    manifest.json の形式:
+
+        {"name": "cursor-docs", "version": 1,
+         "tiers": {"compound": ["compound.tsv"], "basic": ["basic.tsv"], ...}}
+
+    追加の用語集ディレクトリ（分野別の用語集など）を渡すと、
+    同じ階層の辞書に後から読み込んだ項目が上書き・追加される。
+    """
+
+    def __init__(self, tables, names, digest):
+        self.tables = tables
+        self.names = names
+        self.digest = digest
+
+    @property
+    def version(self):
+        """用語集の内容から決まるバージョン文字列"""
+        return f"{'+'.join(self.names)}-{self.digest[:12]}"
+
+    def __len__(self):
+        return sum(len(table) for table in self.tables.values())
+
+    @classmethod
+    def load(cls, glossary_dir=GLOSSARY_DIR, extra_dirs=()):
+        """用語集ディレクトリを読み込む"""
+        tables = {name: {} for name in TIER_NAMES}
+        names = []
+        for directory in [glossary_dir, *extra_dirs]:
+            with open(os.path.join(directory, "manifest.json"), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            names.append(f"{manifest.get('name', os.path.basename(directory))}@{manifest.get('version', 0)}")
+            for tier, files in manifest.get("tiers", {}).items():
+                if tier not in tables:
+                    raise ValueError(f"{directory}: 不明な階層です: {tier}")
+                for filename in files:
+                    tables[tier].update(read_table(os.path.join(directory, filename)))
+
+        # コメントや並び替えだけの変更ではバージョンが変わらないよう、読み込んだ内容から計算する
+        payload = json.dumps([MATCHER_FORMAT_VERSION, names, tables], ensure_ascii=False)
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return cls(tables, names, digest)
+
+    def build_engine(self):
+        """翻訳用の TranslationEngine を作成する"""
+        return TranslationEngine([
+            (name, self.tables[name], word_boundary) for name, word_boundary in TRANSLATION_TIERS
+        ])
+
+
+def load_matcher(glossary, cache_dir=MATCHER_CACHE_DIR):
+    """用語集のマッチャーを返す（プロセス内 → ディスクのキャッシュの順に再利用する）
+
+    ディスクのキャッシュで省略できるのは辞書の正規化とトライ木の構築だけで、
+    正規表現のコンパイル（起動コストの大部分）はプロセスごとに行う。
+    戻り値は (TranslationEngine, 取得元) で、取得元は "memory" / "disk" / "built"。
+    """
+    engine = _matcher_cache.get(glossary.digest)
+    if engine is not None:
+        return engine, "memory"
+
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, f"matcher-{glossary.digest}.json")
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    engine = TranslationEngine.from_state(json.load(f))
+                _matcher_cache[glossary.digest] = engine
+                return engine, "disk"
+            except (OSError, ValueError, KeyError) as e:
+                print(f"警告: マッチャーのキャッシュを読み込めません: {cache_path} - {e}")
+
+    engine = glossary.build_engine()
+    _matcher_cache[glossary.digest] = engine
+    if cache_path:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(engine.to_state(), f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    return engine, "built"
+
+
+def load_glossary_and_matcher(glossary_dir=GLOSSARY_DIR, extra_dirs=(), cache_dir=MATCHER_CACHE_DIR):
+    """用語集とマッチャーを読み込み、起動コストの計測値と一緒に返す"""
+    start = time.perf_counter()
+    glossary = Glossary.load(glossary_dir, extra_dirs)
+    loaded = time.perf_counter()
+    engine, source = load_matcher(glossary, cache_dir)
+    end = time.perf_counter()
+    stats = {
+        "version": glossary.version,
+        "entries": len(glossary),
+        "load_ms": (loaded - start) * 1000,
+        "matcher_ms": (end - loaded) * 1000,
+        "matcher_source": source,
+    }
+    return glossary, engine, stats
@@ -0,0 +1,129 @@
+"""ホストごとの待機時間（ポライトネス）を守りながらURLを選ぶスケジューラー
+
+ページを取得するたびに全体で待機する代わりに、ホストごとに「次にアクセスしてよい時刻」を
+記録し、その時刻を過ぎたホストのURLから取り出す。あるホストが待機している間も
+他のホストのクロールは進むため、複数サイトのクロールはサイト数に応じて速くなり、
+各サイトへのアクセス間隔は PolitenessPolicy の待機時間以上に保たれる。
+
+    scheduler = HostScheduler(frontier, PolitenessPolicy(default_delay=1.0, robots=robots))
+    while True:
+        item = scheduler.next()
+        if item is None:
+            break
+        url, depth = item
+        started = time.monotonic()
+        ...  # ページを取得する
+        scheduler.record(url, started, ok=True)
+    print(scheduler.format_stats())
+"""
+import time
+from urllib.parse import urlsplit
+
+
+class PolitenessPolicy:
+    """ホストごとの待機時間（前回の取得が終わってから次の取得を始めるまでの秒数）
+
+    host_delays でホストごとに指定でき、指定のないホストは default_delay を使う。
+    robots（RobotsCache）を渡すと、robots.txt の Crawl-delay の方が長い場合はそちらに従う。
+    """
+
+    def __init__(self, default_delay=1.0, host_delays=None, robots=None):
+        self.default_delay = default_delay
+        self.host_delays = dict(host_delays or {})
+        self.robots = robots
+
+    def delay(self, url):
+        host = urlsplit(url).netloc
+        delay = self.host_delays.get(host, self.default_delay)
+        if self.robots is not None:
+            delay = max(delay, self.robots.crawl_delay(url) or 0)
+        return delay
+
+
+class HostStats:
+    """ホストごとの取得件数と所要時間"""
+
+    def __init__(self):
+        self.pages = 0
+        self.failures = 0
+        self.fetch_time = 0.0
+        self.first_start = None
+        self.last_end = None
+
+    def throughput(self):
+        """最初の取得開始から最後の取得終了までの、1秒あたりのページ数"""
+        if not self.pages or self.last_end <= self.first_start:
+            return 0.0
+        return self.pages / (self.last_end - self.first_start)
+
+
+class HostScheduler:
+    """CrawlFrontier からアクセス可能なホストのURLを選んで取り出すスケジューラー
+
+    キューにURLがあるホストのうち、次にアクセスしてよい時刻が最も早いホストを選ぶ
+    （待機中でないホストが複数あれば、最も長く待っているホストが先になる）。
+    すべてのホストが待機中なら、最も早いホストの時刻まで待つ。
+    """
+
+    def __init__(self, frontier, policy, clock=time.monotonic, sleep=time.sleep):
+        self.frontier = frontier
+        self.policy = policy
+        self.clock = clock
+        self.sleep = sleep
+        self.ready_at = {}  # ホスト → 次にアクセスしてよい時刻
+        self.stats = {}  # ホスト → HostStats
+
+    def next(self, block=True, exclude=()):
+        """次に取得する (URL, 深さ) を返す（キューが空なら None）
+
+        exclude のホスト（取得中のホストなど）は選ばない。block=False の場合は待機せず、
+        すぐにアクセスできるホストがなければ None を返す。
+        """
+        while True:
+            hosts = [host for host in self.frontier.queued_hosts() if host not in exclude]
+            if not hosts:
+                return None
+            ready_at = self.ready_at
+            host = min(hosts, key=lambda host: ready_at.get(host, 0.0))
+            wait = ready_at.get(host, 0.0) - self.clock()
+            if wait > 0:
+                if not block:
+                    return None
+                self.sleep(wait)
+            item = self.frontier.next(host)
+            if item is not None:
+                return item
+
+    def ready_in(self, exclude=()):
+        """exclude 以外のホストのURLを取得できるまでの秒数（キューが空なら None）"""
+        hosts = [host for host in self.frontier.queued_hosts() if host not in exclude]
+        if not hosts:
+            return None
+        return max(0.0, min(self.ready_at.get(host, 0.0) for host in hosts) - self.clock())
+
+    def record(self, url, started, ok=True, finished=None):
+        """URLの取得が終わったことを記録し、ホストの次にアクセスしてよい時刻を更新する
+
+        started は取得を始めた時刻、finished は終えた時刻（clock の値。None なら現在時刻）。
+        """
+        now = self.clock() if finished is None else finished
+        host = urlsplit(url).netloc
+        stats = self.stats.get(host)
+        if stats is None:
+            stats = self.stats[host] = HostStats()
+        stats.pages += 1
+        stats.failures += not ok
+        stats.fetch_time += now - started
+        if stats.first_start is None:
+            stats.first_start = started
+        stats.last_end = max(stats.last_end or now, now)
+        self.ready_at[host] = max(self.ready_at.get(host, 0.0), now + self.policy.delay(url))
+
+    def format_stats(self):
+        """ホストごとの取得件数・失敗件数・平均取得時間・スループットを表形式の文字列にする"""
+        lines = [f"{'host':<40} {'pages':>7} {'failed':>7} {'avg fetch':>10} {'pages/s':>8}"]
+        for host, stats in sorted(self.stats.items(), key=lambda item: -item[1].pages):
+            average = stats.fetch_time / stats.pages * 1000 if stats.pages else 0.0
+            lines.append(f"{host:<40} {stats.pages:>7,} {stats.failures:>7,} "
+                         f"{average:>7.0f} ms {stats.throughput():>8.2f}")
+        return "\n".join(lines)
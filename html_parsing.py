@@ -0,0 +1,59 @@
+import importlib.util
+
+from bs4 import BeautifulSoup
+
+from metrics import METRICS
+
+# BeautifulSoup のツリービルダー名 -> 必要なモジュール（速い順）
+PARSER_BACKENDS = {
+    "lxml": "lxml",
+    "html.parser": None,
+    "html5lib": "html5lib",
+}
+
+
+def available_parsers():
+    """インストール済みのパーサーバックエンド名を速い順に返す"""
+    return [
+        name for name, module in PARSER_BACKENDS.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+
+
+# 既定のバックエンド（lxml がなければ標準ライブラリの html.parser）
+DEFAULT_PARSER = available_parsers()[0]
+
+
+def response_charset(response):
+    """Content-Type ヘッダーで明示された文字コードを返す（なければ None）
+
+    requests の response.encoding は charset のない text/html を ISO-8859-1 とみなすため、
+    ヘッダーに charset がある場合だけ使い、それ以外は本文（BOM・meta タグ）から判定させる。
+    """
+    content_type = response.headers.get("Content-Type", "")
+    for param in content_type.split(";")[1:]:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "charset" and value.strip():
+            return value.strip().strip("\"'")
+    return None
+
+
+_PARSE_SECONDS = METRICS.histogram("parse_seconds", "HTMLの解析（BeautifulSoup の構築）にかかった時間")
+
+
+def parse_html(content, parser=None, encoding=None):
+    """HTML（bytes または str）を解析して BeautifulSoup を返す
+
+    bytes を渡した場合は、encoding（HTTPヘッダーの charset）、BOM、meta タグ、
+    文字コード推定の順に文字コードを判定してから解析する。
+    """
+    parser = parser or DEFAULT_PARSER
+    with _PARSE_SECONDS.time(parser=parser):
+        if isinstance(content, bytes):
+            return BeautifulSoup(content, parser, from_encoding=encoding)
+        return BeautifulSoup(content, parser)
+
+
+def parse_response(response, parser=None):
+    """レスポンスの本文（デコード前の bytes）を解析して BeautifulSoup を返す"""
+    return parse_html(response.content, parser, response_charset(response))
@@ -0,0 +1,257 @@
+import socket
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util import connection as urllib3_connection
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+from metrics import METRICS
+
+# リトライ対象のステータスコード（429 と一時的なサーバーエラー）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# プロセス内のすべての HttpClient のリクエストの計測値（metrics.METRICS）
+_REQUEST_SECONDS = METRICS.histogram("http_request_seconds", "HTTPリクエストの所要時間（本文の読み込みまで）")
+_TTFB_SECONDS = METRICS.histogram("http_ttfb_seconds", "HTTPリクエストの最初のバイトまでの時間")
+_RESPONSE_BYTES = METRICS.counter("http_response_bytes_total", "受信した本文のバイト数（展開後）")
+_NEW_CONNECTIONS = METRICS.counter("http_new_connections_total", "新たに確立した接続の数")
+
+# 現在のスレッドで実行中のリクエストの計測値（接続クラスから書き込む）
+_timing_context = threading.local()
+
+
+def _current_timing():
+    return getattr(_timing_context, "timing", None)
+
+
+class _TimedSocketModule:
+    """urllib3.util.connection から参照する socket モジュールの代わり
+
+    getaddrinfo（DNS解決）の時間を、実行中のリクエストの計測値に加算する。
+    それ以外の属性は socket モジュールのものをそのまま返すため、接続の処理は urllib3 のまま変わらない。
+    """
+
+    def __getattr__(self, name):
+        return getattr(socket, name)
+
+    @staticmethod
+    def getaddrinfo(*args, **kwargs):
+        timing = _current_timing()
+        if timing is None:
+            return socket.getaddrinfo(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return socket.getaddrinfo(*args, **kwargs)
+        finally:
+            timing["dns"] += time.perf_counter() - start
+
+
+urllib3_connection.socket = _TimedSocketModule()
+
+
+class _ConnectTimingMixin:
+    """DNS解決とTCP接続の時間を計測する接続クラス用のミックスイン"""
+
+    def _new_conn(self):
+        timing = _current_timing()
+        if timing is None:
+            return super()._new_conn()
+
+        # 名前解決・複数のアドレスへの接続の試行・タイムアウトは urllib3 に任せ、
+        # 全体の時間から DNS解決（_TimedSocketModule で計測）を除いたものを接続の時間とする
+        dns_before = timing["dns"]
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        elapsed = time.perf_counter() - start
+        timing["connect"] += max(0.0, elapsed - (timing["dns"] - dns_before))
+        timing["new_connections"] += 1
+        return sock
+
+
+class TimedHTTPConnection(_ConnectTimingMixin, HTTPConnection):
+    """DNS解決とTCP接続の時間を計測する HTTPConnection"""
+
+
+class TimedHTTPSConnection(_ConnectTimingMixin, HTTPSConnection):
+    """DNS解決・TCP接続・TLSハンドシェイクの時間を計測する HTTPSConnection"""
+
+    def connect(self):
+        timing = _current_timing()
+        if timing is None:
+            return super().connect()
+
+        before = timing["dns"] + timing["connect"]
+        start = time.perf_counter()
+        super().connect()
+        elapsed = time.perf_counter() - start
+        timing["tls"] += max(0.0, elapsed - (timing["dns"] + timing["connect"] - before))
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """計測用の接続クラスを使うコネクションプールを作成する HTTPAdapter"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+
+class HttpClient:
+    """crawler.py とドキュメントスクレイパーで共有するHTTP取得レイヤー
+
+    - ホストごとのコネクションプールと keep-alive による接続の再利用
+    - gzip / br（brotli がインストールされている場合）の圧縮転送
+    - 429 / 5xx に対する指数バックオフ付きリトライ（Retry-After を尊重）
+    - リクエストごとの計測値（DNS / 接続 / TLS / TTFB / ダウンロード）
+
+    get() が返すレスポンスには response.timing（辞書）が付与される。
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=16, retries=3,
+                 backoff_factor=0.5, timeout=10, user_agent=None, headers=None):
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["Accept-Encoding"] = ACCEPT_ENCODING
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        if headers:
+            self.session.headers.update(headers)
+
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset(["GET", "HEAD"]),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._lock = threading.Lock()
+        self._mount_adapter()
+
+        self.request_count = 0
+        self.totals = {
+            "dns": 0.0, "connect": 0.0, "tls": 0.0, "ttfb": 0.0,
+            "download": 0.0, "total": 0.0, "bytes": 0, "new_connections": 0,
+        }
+
+    def _mount_adapter(self):
+        adapter = TimedHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=self.retry,
+        )
+        old = self.session.adapters.get("https://")
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if old is not None:
+            old.close()
+
+    def ensure_pool_size(self, size):
+        """ホストごとのコネクションプールの大きさを size 以上にする（クロールを始める前に呼ぶ）
+
+        同じホストに同時に送るリクエストの数がプールより多いと、urllib3 は返却された接続を
+        捨てる（Connection pool is full）ため、keep-alive で再利用されなくなる。
+        並行取得のエンジンは、取得するスレッドの数を渡して呼び出す。
+        """
+        with self._lock:
+            if size <= self.pool_maxsize:
+                return
+            self.pool_maxsize = size
+            self._mount_adapter()
+
+    def get(self, url, timeout=None, headers=None):
+        """GETリクエストを送信し、本文を読み込んだレスポンスを返す"""
+        timing = {
+            "url": url, "status": None, "dns": 0.0, "connect": 0.0, "tls": 0.0,
+            "ttfb": 0.0, "download": 0.0, "total": 0.0, "bytes": 0, "new_connections": 0,
+        }
+        _timing_context.timing = timing
+        start = time.perf_counter()
+        try:
+            response = self.session.get(
+                url, timeout=timeout or self.timeout, headers=headers, stream=True
+            )
+            headers_received = time.perf_counter()
+            response.content  # 本文を読み込む（圧縮はここで展開される）
+        finally:
+            _timing_context.timing = None
+        end = time.perf_counter()
+
+        setup = timing["dns"] + timing["connect"] + timing["tls"]
+        timing["status"] = response.status_code
+        timing["ttfb"] = max(0.0, headers_received - start - setup)
+        timing["download"] = end - headers_received
+        timing["total"] = end - start
+        timing["bytes"] = len(response.content)
+        response.timing = timing
+        self._record(timing)
+        return response
+
+    def _record(self, timing):
+        with self._lock:
+            self.request_count += 1
+            for key in self.totals:
+                self.totals[key] += timing[key]
+        _REQUEST_SECONDS.observe(timing["total"], status=timing["status"])
+        _TTFB_SECONDS.observe(timing["ttfb"])
+        _RESPONSE_BYTES.inc(timing["bytes"])
+        if timing["new_connections"]:
+            _NEW_CONNECTIONS.inc(timing["new_connections"])
+
+    def summary(self):
+        """これまでのリクエストの平均計測値を返す（時間はミリ秒）"""
+        with self._lock:
+            count = self.request_count
+            totals = dict(self.totals)
+        if not count:
+            return {"requests": 0}
+        summary = {"requests": count, "bytes": totals["bytes"], "new_connections": totals["new_connections"]}
+        for key in ("dns", "connect", "tls", "ttfb", "download", "total"):
+            summary[f"avg_{key}_ms"] = round(totals[key] / count * 1000, 2)
+        return summary
+
+    def format_summary(self):
+        """summary() を1行の文字列にする"""
+        summary = self.summary()
+        if not summary["requests"]:
+            return "requests=0"
+        return (
+            f"requests={summary['requests']} new_connections={summary['new_connections']} "
+            f"bytes={summary['bytes']:,} dns={summary['avg_dns_ms']}ms "
+            f"connect={summary['avg_connect_ms']}ms tls={summary['avg_tls_ms']}ms "
+            f"ttfb={summary['avg_ttfb_ms']}ms download={summary['avg_download_ms']}ms "
+            f"total={summary['avg_total_ms']}ms"
+        )
+
+    def close(self):
+        self.session.close()
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_default_client():
+    """プロセス内で共有する HttpClient を返す"""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            _default_client = HttpClient()
+        return _default_client
@@ -0,0 +1,123 @@
+"""マークダウン文書をセグメント（見出し・段落・リスト・コードブロック）に分割する
+
+CleanCursorDocsScraper.extract_structured_content が出力するマークダウンは、
+各要素の間に空行が1つ入る。ここでは空行で区切られたまとまりを1つのセグメントとし、
+``` で囲まれたコードブロックは中に空行があっても1つのセグメントとして扱う。
+1つのセグメントが MAX_SEGMENT_CHARS 文字を超える場合は、行の区切りで分けて返す。
+最後まで閉じられなかったコードブロックは、長さによらず文書の終わりまでを CODE とする。
+さらに iter_spans() で、セグメントを翻訳する部分と原文のまま残す部分
+（コードブロック、インラインコード、URL、**URL:** の行）に分ける。
+"""
+import re
+
+BLANK = "blank"
+HEADING = "heading"
+CODE = "code"
+TEXT = "text"
+
+FENCE = "```"
+
+# セグメントの最大の長さ（文字数）。これを超えたまとまりは行の区切りで分けて返すため、
+# iter_segments が保持するのは最大でこの長さと1行分になる
+MAX_SEGMENT_CHARS = 1 << 20
+
+# 翻訳せずに残す行内の部分: **URL:** の行、インラインコード、URL
+PROTECTED_SPAN = re.compile(
+    r"^\*\*URL:\*\*.*$"
+    r"|(`+)[^\n]*?\1"
+    r"|https?://[^\s<>()\[\]`]+",
+    re.MULTILINE,
+)
+
+
+def _block_kind(lines):
+    first = lines[0].lstrip()
+    if first.startswith(FENCE):
+        return CODE
+    if first.startswith("#") and len(lines) == 1:
+        return HEADING
+    return TEXT
+
+
+def iter_segments(lines, max_chars=MAX_SEGMENT_CHARS):
+    """行のイテラブル（ファイルオブジェクトなど）から (種類, テキスト) を順に返す
+
+    テキストは改行を含む元の文字列そのままで、すべてのセグメントを連結すると
+    入力と完全に一致する。空行の並びは種類 BLANK のセグメントになる。
+    max_chars 文字を超えたまとまりは、その時点までを1つのセグメントとして返す
+    （コードブロックの続きは CODE、段落の続きは同じ種類のセグメントになる）。
+    最後まで閉じられなかったコードブロックも、分けて返したかどうかによらず CODE とする
+    （閉じられたかどうかは文書の終わりまで分からず、それまで保持すると使用量に上限がなくなるため）。
+    """
+    block = []
+    block_chars = 0
+    blanks = []
+    in_fence = False
+
+    for line in lines:
+        if in_fence:
+            block.append(line)
+            block_chars += len(line)
+            if line.lstrip().startswith(FENCE):
+                # コードブロックの終了
+                yield CODE, "".join(block)
+                block = []
+                block_chars = 0
+                in_fence = False
+            elif block_chars > max_chars:
+                yield CODE, "".join(block)
+                block = []
+                block_chars = 0
+            continue
+
+        if not line.strip():
+            if block:
+                yield _block_kind(block), "".join(block)
+                block = []
+                block_chars = 0
+            blanks.append(line)
+            continue
+
+        if blanks:
+            yield BLANK, "".join(blanks)
+            blanks = []
+
+        stripped = line.strip()
+        if stripped.startswith(FENCE) and stripped.count(FENCE) == 1:
+            # コードブロックの開始（直前のまとまりとは別のセグメントにする）
+            if block:
+                yield _block_kind(block), "".join(block)
+                block = []
+                block_chars = 0
+            in_fence = True
+        elif block and block_chars > max_chars:
+            yield _block_kind(block), "".join(block)
+            block = []
+            block_chars = 0
+        block.append(line)
+        block_chars += len(line)
+
+    if block:
+        yield (CODE if in_fence else _block_kind(block)), "".join(block)
+    if blanks:
+        yield BLANK, "".join(blanks)
+
+
+def iter_spans(kind, text):
+    """セグメントを (翻訳するか, 開始位置, 終了位置) の部分に分けて順に返す
+
+    空行とコードブロックは全体を、見出し・段落ではインラインコード・URL・
+    **URL:** の行を翻訳しない部分とする。
+    """
+    if kind in (BLANK, CODE):
+        yield False, 0, len(text)
+        return
+    last = 0
+    for match in PROTECTED_SPAN.finditer(text):
+        start, end = match.span()
+        if start > last:
+            yield True, last, start
+        yield False, start, end
+        last = end
+    if last < len(text):
+        yield True, last, len(text)
@@ -0,0 +1,317 @@
+"""クロール・翻訳の実行中の計測値（カウンター・ヒストグラム）
+
+プロセス内で共有するレジストリ METRICS に、HTTP 取得の時間と転送量、解析・抽出の時間、
+ページあたりのセクション数、重複除去の件数、翻訳の規則ごとの置換数などを記録する。
+記録は1回あたりロックを取って辞書を更新するだけなので、常に有効にしている。
+
+- to_prometheus(): Prometheus のテキスト形式（MetricsReporter で http://host:port/metrics として公開する）
+- snapshot(): JSON にできる辞書（MetricsReporter で一定間隔でファイルに書き出す）
+
+ページの処理に関する計測値は、同じプロセスで crawler.py とスクレイパーを使っても
+混ざらないよう、crawler_ / docs_ を付けた名前でそれぞれ登録する。
+
+ワーカープロセス（crawler.py --pipeline の解析プロセス、翻訳のバッチモードのワーカーなど）で
+記録した値は、そのプロセスのレジストリに残り、親プロセスには集計されない。
+
+    from metrics import METRICS
+    METRICS.counter("crawler_pages_total").inc(result="saved")
+    with METRICS.histogram("parse_seconds").time():
+        ...
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 時間（秒）のヒストグラムの既定のバケット
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 件数（ページあたりのセクション数など）のヒストグラムのバケット
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """増加だけする値（ラベルの組み合わせごとに集計する）"""
+
+    kind = "counter"
+
+    def __init__(self, name, help=""):
+        self.name = name
+        self.help = help
+        self.values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self.values.get(_label_key(labels), 0)
+
+    def collect(self):
+        """Prometheus のテキスト形式の行"""
+        with self._lock:
+            items = sorted(self.values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_number(value)}" for key, value in items]
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted(self.values.items())
+        return [{"labels": dict(key), "value": value} for key, value in items]
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram:
+    """値の分布（バケットごとの件数・合計・件数をラベルの組み合わせごとに集計する）"""
+
+    kind = "histogram"
+
+    def __init__(self, name, help="", buckets=TIME_BUCKETS):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.series = {}  # ラベル → [バケットごとの件数（最後は上限なし）, 合計, 件数]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # value 以上の最小の上限のバケット
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, **labels):
+        """with 文のブロックの所要時間（秒）を記録する"""
+        return _Timer(self, labels)
+
+    def _cumulative(self, counts):
+        total = 0
+        for count in counts:
+            total += count
+            yield total
+
+    def quantile(self, q, **labels):
+        """分位点の推定値（その分位点を含むバケットの上限）"""
+        with self._lock:
+            series = self.series.get(_label_key(labels))
+            if series is None or not series[2]:
+                return 0.0
+            counts, _, total = series[0][:], series[1], series[2]
+        for bound, cumulative in zip(self.buckets + (float("inf"),), self._cumulative(counts)):
+            if cumulative >= q * total:
+                return bound
+        return float("inf")
+
+    def collect(self):
+        """Prometheus のテキスト形式の行"""
+        with self._lock:
+            items = sorted((key, (series[0][:], series[1], series[2])) for key, series in self.series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            for bound, cumulative in zip(self.buckets + (float("inf"),), self._cumulative(counts)):
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', _format_number(bound)),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_number(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def snapshot(self):
+        with self._lock:
+            items = sorted((key, (series[0][:], series[1], series[2])) for key, series in self.series.items())
+        result = []
+        for key, (counts, total, count) in items:
+            labels = dict(key)
+            result.append({
+                "labels": labels,
+                "count": count,
+                "sum": total,
+                "p50": self.quantile(0.5, **labels),
+                "p99": self.quantile(0.99, **labels),
+                "buckets": {_format_number(bound): cumulative for bound, cumulative
+                            in zip(self.buckets + (float("inf"),), self._cumulative(counts))},
+            })
+        return result
+
+
+class MetricsRegistry:
+    """名前 → カウンター・ヒストグラム（同じ名前で取得すると同じオブジェクトを返す）"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args)
+            elif not isinstance(metric, cls):
+                raise TypeError(f"{name} は {metric.kind} として登録されています")
+        return metric
+
+    def counter(self, name, help=""):
+        return self._get(Counter, name, help)
+
+    def histogram(self, name, help="", buckets=TIME_BUCKETS):
+        return self._get(Histogram, name, help, buckets)
+
+    def to_prometheus(self):
+        """すべての計測値を Prometheus のテキスト形式にする"""
+        lines = []
+        with self._lock:
+            metrics = sorted(self.metrics.items())
+        for name, metric in metrics:
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """すべての計測値を JSON にできる辞書にする"""
+        with self._lock:
+            metrics = sorted(self.metrics.items())
+        now = time.time()
+        return {
+            "time": round(now, 3),
+            "uptime_seconds": round(now - self.started, 3),
+            "metrics": {name: {"type": metric.kind, "help": metric.help, "series": metric.snapshot()}
+                        for name, metric in metrics},
+        }
+
+    def write_snapshot(self, path):
+        """snapshot() を一時ファイル経由で path に書き出す（読み手が途中までのファイルを見ないようにする）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+
+# プロセス内で共有するレジストリ
+METRICS = MetricsRegistry()
+
+
+class MetricsReporter:
+    """計測値の公開（HTTP の /metrics と /metrics.json）と、JSON スナップショットの定期的な書き出し
+
+    port と snapshot_path のどちらも指定しなければ何もしない。with 文を抜けると（close()）
+    サーバーを止め、スナップショットを最後にもう一度書き出す。
+    """
+
+    def __init__(self, registry=METRICS, port=None, snapshot_path=None, interval=30.0, host="127.0.0.1"):
+        self.registry = registry
+        self.snapshot_path = snapshot_path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._server = None
+        self._threads = []
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), self._make_handler())
+            self._server.daemon_threads = True
+            self._threads.append(threading.Thread(target=self._server.serve_forever, daemon=True))
+        if snapshot_path:
+            self._threads.append(threading.Thread(target=self._write_periodically, daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def url(self):
+        """/metrics の URL（HTTP で公開していなければ None）"""
+        if self._server is None:
+            return None
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def _make_handler(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/metrics":
+                    body = registry.to_prometheus().encode("utf-8")
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif path == "/metrics.json":
+                    body = json.dumps(registry.snapshot(), ensure_ascii=False).encode("utf-8")
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _write_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_snapshot(self.snapshot_path)
+
+    def close(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.snapshot_path:
+            self.registry.write_snapshot(self.snapshot_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def add_metrics_arguments(parser):
+    """計測値の公開とプロファイルのコマンドライン引数を追加する（MetricsReporter / profiling.profiled に渡す）"""
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="計測値を http://127.0.0.1:PORT/metrics（Prometheus 形式）と /metrics.json で公開する")
+    parser.add_argument("--metrics-file", default=None,
+                        help="計測値の JSON スナップショットを一定間隔で書き出すファイル（終了時にも書き出す）")
+    parser.add_argument("--metrics-interval", type=float, default=30.0, help="--metrics-file の書き出し間隔（秒）")
+    parser.add_argument("--profile", nargs="?", const="profile", default=None, metavar="DIR",
+                        help="主な処理を cProfile / tracemalloc で計測し、DIR（既定: profile）にレポートを書き出す")
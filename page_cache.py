@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+import threading
+
+# 抽出ロジックを変更してキャッシュ済みの page_info を無効にしたい場合はこの値を上げる
+CACHE_FORMAT_VERSION = 2
+
+
+def content_hash(data):
+    """レスポンス本文（bytes）のハッシュ値を返す"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class PageMetadataCache:
+    """条件付きリクエスト用のHTTPメタデータキャッシュ
+
+    URL ごとに ETag / Last-Modified / 本文のハッシュ値と、前回抽出した
+    page_info・リンク一覧をJSONファイルに保存する。次回のクロールでは
+    If-None-Match / If-Modified-Since を送信し、304 が返ったページや
+    本文が変わっていないページは保存済みの page_info をそのまま再利用する。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        """キャッシュファイルを読み込む（形式が古い場合は破棄する）"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: キャッシュファイルを読み込めません: {self.path} - {e}")
+            return
+        if data.get("version") == CACHE_FORMAT_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        """キャッシュファイルを書き出す（一時ファイル経由で置き換える）"""
+        with self._lock:
+            data = {"version": CACHE_FORMAT_VERSION, "entries": self.entries}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def conditional_headers(self, url):
+        """URLに対する条件付きリクエストのヘッダーを返す"""
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def lookup(self, url, response):
+        """レスポンスが前回から変わっていなければ (page_info, links) を返す
+
+        304 の場合と、200 でも本文のハッシュ値が一致する場合に再利用する。
+        再利用できない場合は None を返す。
+        """
+        entry = self.entries.get(url)
+        if entry is not None:
+            if response.status_code == 304 or entry.get("content_hash") == content_hash(response.content):
+                with self._lock:
+                    self.hits += 1
+                    # 200 で新しい検証子が返っていれば更新しておく
+                    if response.status_code != 304:
+                        entry["etag"] = response.headers.get("ETag")
+                        entry["last_modified"] = response.headers.get("Last-Modified")
+                return entry.get("page_info"), entry.get("links", [])
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def update(self, url, response, page_info, links):
+        """ページの取得・解析結果を記録する"""
+        with self._lock:
+            self.entries[url] = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_hash": content_hash(response.content),
+                "page_info": page_info,
+                "links": list(links),
+            }
@@ -0,0 +1,77 @@
+import json
+import os
+
+
+class PageStore:
+    """スクレイピングしたページ情報を追記専用のJSONLファイルに保存するストア
+
+    ページ情報（page_info）は1ページ1行でファイルに追記し、メモリにはタイトル・
+    アンカー・ファイル内の位置だけを保持する。ページ数が数万になってもメモリ使用量は
+    目次の分しか増えず、統合ドキュメントはファイルから1ページずつ読み出して作成できる。
+    追記のたびにフラッシュするため、クロールが途中で止まっても保存済みのページは残る。
+
+        store = PageStore("cursor_docs_clean/pages.jsonl")
+        store.append(page_info, anchor)
+        for page_info in store:
+            ...
+    """
+
+    def __init__(self, path, truncate=True):
+        """truncate=False の場合は既存のファイルを読み込んで続きから追記する"""
+        self.path = path
+        self.index = []  # (タイトル, アンカー, 位置, 長さ) をページの順に保持する
+        if truncate or not os.path.exists(path):
+            open(path, "wb").close()
+        else:
+            self._load_index()
+        self._file = open(path, "ab")
+
+    def _load_index(self):
+        """既存のファイルから目次を作り直す（途中で途切れた最後の行は切り捨てる）"""
+        offset = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                self.index.append((record["page"]["title"], record.get("anchor", ""), offset, len(line)))
+                offset += len(line)
+        with open(self.path, "r+b") as f:
+            f.truncate(offset)
+
+    def append(self, page_info, anchor=""):
+        """ページ情報を追記する"""
+        line = json.dumps({"anchor": anchor, "page": page_info}, ensure_ascii=False).encode("utf-8") + b"\n"
+        offset = self._file.tell()
+        self._file.write(line)
+        self._file.flush()
+        self.index.append((page_info["title"], anchor, offset, len(line)))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, position):
+        """position 番目のページ情報をファイルから読み出す"""
+        _, _, offset, length = self.index[position]
+        self._file.flush()
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.read(length))["page"]
+
+    def __iter__(self):
+        """ページ情報を保存した順に1ページずつ読み出す"""
+        self._file.flush()
+        count = len(self.index)
+        with open(self.path, "rb") as f:
+            for _ in range(count):
+                yield json.loads(f.readline())["page"]
+
+    def toc(self):
+        """(タイトル, アンカー) を保存した順に返す"""
+        return [(title, anchor) for title, anchor, _, _ in self.index]
+
+    def close(self):
+        self._file.close()
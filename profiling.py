@@ -0,0 +1,196 @@
+"""主な処理（ホットパス）の関数を cProfile と tracemalloc で計測し、レポートを書き出す（--profile）
+
+wrap() した関数の呼び出しの間だけ cProfile を有効にし、関数ごとの呼び出し回数・所要時間と、
+1回の呼び出しで増えたメモリ確保量のピーク（tracemalloc）を集計する。stop() で次のファイルを書き出す。
+
+- profile.txt: 関数ごとの集計と、累積時間・自身の時間の上位の関数（pstats）
+- profile.pstats: pstats 形式（snakeviz などで開ける）
+- memory.txt: メモリ確保量の多い行（tracemalloc）
+- metrics.json: 終了時の計測値（metrics.METRICS）
+
+Python 3.11 までは cProfile をスレッドごとに1つのプロファイラーで計測し、レポートの作成時にまとめる。
+Python 3.12 以降の cProfile は sys.monitoring（インタープリター全体で1つ）を使い、複数のスレッドで
+有効にできないため、start() から stop() までプロセス全体を1つのプロファイラーで計測する
+（wrap() した関数以外の呼び出しもレポートに含まれる）。
+メモリのピークはプロセス全体の値なので、複数のスレッドで同時に呼ばれた場合は目安になる。
+ワーカープロセスでの呼び出しは計測されない。
+
+    with profiled("profile", [(CleanCursorDocsScraper, "scrape_page")]):
+        scraper.scrape_docs()
+"""
+import contextlib
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+
+from metrics import METRICS
+
+# cProfile がインタープリター全体で1つしか有効にできない（sys.monitoring を使う）バージョン
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+class Profiler:
+    """wrap() した関数の呼び出しを計測する（start() で開始し、stop() でレポートを書き出す）"""
+
+    def __init__(self, output_dir, memory=True, top=40):
+        self.output_dir = output_dir
+        self.memory = memory
+        self.top = top
+        self.calls = {}  # 関数名 → {"calls", "seconds", "max_seconds", "peak_bytes"}
+        self.peak_bytes = 0  # 計測中のメモリ確保量のピーク（呼び出しごとに reset_peak するため別に記録する）
+        self._profiles = []  # スレッドごとの cProfile.Profile（PROCESS_WIDE_PROFILER ならプロセス全体の1つ）
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wrapped = []  # (オブジェクト, 属性名, 元の関数)
+        self._started_tracemalloc = False
+
+    def wrap(self, owner, name):
+        """owner（クラスまたはモジュール）の関数 name を計測する関数に置き換える"""
+        function = getattr(owner, name)
+        label = f"{owner.__name__}.{name}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return self._call(label, function, args, kwargs)
+
+        setattr(owner, name, wrapper)
+        self._wrapped.append((owner, name, function))
+
+    def _call(self, label, function, args, kwargs):
+        local = self._local
+        profile = None
+        if not PROCESS_WIDE_PROFILER:
+            profile = getattr(local, "profile", None)
+            if profile is None:
+                profile = local.profile = cProfile.Profile()
+                with self._lock:
+                    self._profiles.append(profile)
+        # 計測する関数の中で別の計測する関数が呼ばれた場合、cProfile とメモリは一番外側の呼び出しで計測する
+        outermost = not getattr(local, "depth", 0)
+        memory = outermost and self.memory and tracemalloc.is_tracing()
+        if memory:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        if outermost and profile is not None:
+            profile.enable()
+        local.depth = getattr(local, "depth", 0) + 1
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            local.depth -= 1
+            if outermost and profile is not None:
+                profile.disable()
+            peak = tracemalloc.get_traced_memory()[1] if memory else None
+            with self._lock:
+                stats = self.calls.setdefault(label, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "peak_bytes": None})
+                stats["calls"] += 1
+                stats["seconds"] += elapsed
+                stats["max_seconds"] = max(stats["max_seconds"], elapsed)
+                if peak is not None:
+                    # 内側の呼び出しのメモリは外側の呼び出しに含める
+                    stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak - baseline)
+                    self.peak_bytes = max(self.peak_bytes, peak)
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        if PROCESS_WIDE_PROFILER:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as e:  # 別のプロファイラーが有効になっている
+                print(f"警告: cProfile を開始できません（関数ごとの集計とメモリだけを記録します）: {e}")
+            else:
+                self._profiles.append(profile)
+
+    def format_summary(self):
+        """関数ごとの呼び出し回数・所要時間・メモリのピークの表"""
+        lines = [f"{'function':<48} {'calls':>8} {'total s':>10} {'avg ms':>10} {'max ms':>10} {'peak KB':>10}"]
+        with self._lock:
+            items = sorted(self.calls.items(), key=lambda item: -item[1]["seconds"])
+        for label, stats in items:
+            peak = "-" if stats["peak_bytes"] is None else f"{stats['peak_bytes'] / 1024:,.1f}"
+            lines.append(f"{label:<48} {stats['calls']:>8,} {stats['seconds']:>10.3f} "
+                         f"{stats['seconds'] / stats['calls'] * 1000:>10.3f} {stats['max_seconds'] * 1000:>10.3f} "
+                         f"{peak:>10}")
+        return "\n".join(lines)
+
+    def stop(self):
+        """関数を元に戻してレポートを書き出し、書き出したファイルのパスのリストを返す"""
+        for owner, name, function in reversed(self._wrapped):
+            setattr(owner, name, function)
+        self._wrapped = []
+        if PROCESS_WIDE_PROFILER:
+            for profile in self._profiles:
+                profile.disable()
+        os.makedirs(self.output_dir, exist_ok=True)
+        paths = []
+
+        snapshot = None
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            peak = max(self.peak_bytes, tracemalloc.get_traced_memory()[1])
+            if self._started_tracemalloc:
+                tracemalloc.stop()
+
+        report = io.StringIO()
+        report.write(self.format_summary() + "\n\n")
+        with self._lock:
+            profiles = list(self._profiles)
+        if profiles:
+            stats = pstats.Stats(profiles[0], stream=report)
+            for profile in profiles[1:]:
+                stats.add(profile)
+            stats_path = os.path.join(self.output_dir, "profile.pstats")
+            stats.dump_stats(stats_path)
+            paths.append(stats_path)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            stats.sort_stats("tottime").print_stats(self.top)
+        report_path = os.path.join(self.output_dir, "profile.txt")
+        with open(report_path, "w", encoding="utf-8") as f:
+            f.write(report.getvalue())
+        paths.insert(0, report_path)
+
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                               tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")])
+            memory_path = os.path.join(self.output_dir, "memory.txt")
+            with open(memory_path, "w", encoding="utf-8") as f:
+                f.write(f"メモリ確保量のピーク: {peak / (1024 * 1024):,.1f} MB\n\n")
+                f.write(f"終了時に確保されているメモリの上位 {self.top} 行:\n")
+                for statistic in snapshot.statistics("lineno")[:self.top]:
+                    f.write(f"{statistic}\n")
+            paths.append(memory_path)
+
+        metrics_path = os.path.join(self.output_dir, "metrics.json")
+        METRICS.write_snapshot(metrics_path)
+        paths.append(metrics_path)
+        return paths
+
+
+@contextlib.contextmanager
+def profiled(output_dir, targets):
+    """output_dir が指定されていれば targets（(クラスまたはモジュール, 関数名) のリスト）を計測し、
+    ブロックを抜けるときにレポートを書き出す（output_dir が None なら何もしない）"""
+    if not output_dir:
+        yield None
+        return
+    profiler = Profiler(output_dir)
+    for owner, name in targets:
+        profiler.wrap(owner, name)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        paths = profiler.stop()
+        print(profiler.format_summary())
+        print(f"プロファイル: {', '.join(paths)}")
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """トークンバケット方式のレート制御
+
+    rate は1秒あたりに補充されるトークン数、capacity は一度に溜められる上限。
+    reserve() はトークンを先に予約して「あと何秒待てばよいか」を返すため、
+    同期・非同期のどちらの呼び出し側からも同じロジックで使える。
+    """
+
+    def __init__(self, rate, capacity=1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    def reserve(self):
+        """トークンを1つ予約し、利用可能になるまでの待ち時間（秒）を返す"""
+        if not self.rate:
+            return 0.0
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        # 予約済みのトークンで負になった分だけ待つ（同時に呼ばれても順番に間隔が空く）
+        return -self.tokens / self.rate
+
+    def acquire(self):
+        """トークンが利用可能になるまでブロックする"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """トークンが利用可能になるまで非同期に待機する"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class HostBudget:
+    """ホストごとのリクエスト予算（毎秒リクエスト数と最大同時接続数）
+
+    async with で使用する:
+
+        async with budget:
+            ...  # この中でリクエストを送信する
+    """
+
+    def __init__(self, requests_per_second=None, max_concurrency=4):
+        self.bucket = TokenBucket(requests_per_second) if requests_per_second else None
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.bucket is not None:
+            await self.bucket.acquire_async()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._semaphore.release()
+        return False
@@ -0,0 +1,250 @@
+"""robots.txt の解析・判定とディスクキャッシュ
+
+ホストごとの Allow / Disallow ルールを1つの正規表現にまとめて、リンク1件あたり
+1回の照合で判定する。ルールの優先順位は Google のクローラーと RFC 9309 に合わせ、
+一致したルールのうちパスが最も長いものを採用する（同じ長さなら Allow を優先）。
+User-agent ごとのグループと Crawl-delay にも対応する。
+
+    robots = RobotsCache("scraped_text/robots_cache.json")
+    if robots.is_allowed(url):
+        ...
+    delay = robots.crawl_delay(url)  # 指定がなければ None
+"""
+import json
+import os
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from http_client import get_default_client
+
+# robots.txt をキャッシュする期間（秒）
+ROBOTS_CACHE_TTL = 24 * 60 * 60
+# 取得に失敗した robots.txt を再取得するまでの期間（秒）
+ROBOTS_RETRY_TTL = 10 * 60
+
+
+def parse_robots_txt(text):
+    """robots.txt を解析し、(User-agent のリスト, ルール, Crawl-delay) のグループのリストを返す
+
+    ルールは (allow, パス) のリスト。連続する User-agent 行は1つのグループにまとめる。
+    """
+    groups = []
+    agents = []
+    rules = []
+    crawl_delay = None
+    in_rules = False
+    for line in text.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if ":" not in line:
+            continue
+        field, value = line.split(":", 1)
+        field = field.strip().lower()
+        value = value.strip()
+        if field == "user-agent":
+            if in_rules:
+                groups.append((agents, rules, crawl_delay))
+                agents, rules, crawl_delay, in_rules = [], [], None, False
+            agents.append(value.lower())
+        elif field in ("allow", "disallow"):
+            in_rules = True
+            if value:  # 空の Disallow は「すべて許可」なのでルールにしない
+                rules.append((field == "allow", value))
+        elif field == "crawl-delay":
+            in_rules = True
+            try:
+                crawl_delay = float(value)
+            except ValueError:
+                pass
+    if agents:
+        groups.append((agents, rules, crawl_delay))
+    return groups
+
+
+def _rule_pattern(path):
+    """robots.txt のパスを正規表現に変換する（* は任意の文字列、末尾の $ はパスの終端）"""
+    anchored = path.endswith("$")
+    if anchored:
+        path = path[:-1]
+    pattern = ".*".join(re.escape(part) for part in path.split("*"))
+    return pattern + (r"\Z" if anchored else "")
+
+
+class RobotsRules:
+    """1つのホストの robots.txt のルール（User-agent のグループを選択済み）
+
+    ルールを優先順位（パスの長い順、同じ長さなら Allow が先）に並べて1つの
+    正規表現の選択（|）にまとめる。照合は先頭に固定されているため、最初に
+    一致した選択肢が最も優先されるルールになる。
+    """
+
+    def __init__(self, rules=(), crawl_delay=None):
+        self.rules = sorted(rules, key=lambda rule: (-len(rule[1]), not rule[0]))
+        self.crawl_delay = crawl_delay
+        self._allows = [allow for allow, _ in self.rules]
+        self._matcher = None
+        if not self.rules:
+            return
+        if not any(self._allows):
+            # Disallow だけなら、どれかに一致するかだけを調べればよい
+            self._matcher = re.compile("|".join(_rule_pattern(path) for _, path in self.rules))
+        else:
+            # 各選択肢の末尾に空のグループを置き、lastindex で一致したルールを求める
+            self._matcher = re.compile("|".join(f"{_rule_pattern(path)}()" for _, path in self.rules))
+
+    @classmethod
+    def from_text(cls, text, user_agent="*"):
+        """robots.txt の本文から、user_agent に適用されるルールを作成する
+
+        製品名（user_agent の / より前）と大文字・小文字を区別せずに一致する User-agent の
+        グループを使い、該当がなければ * のグループを使う（RFC 9309。部分一致では選ばないため、
+        User-agent: python が python-requests に適用されることはない）。同じ User-agent の
+        グループが複数ある場合はまとめる。
+        """
+        token = user_agent.split("/", 1)[0].strip().lower()
+        groups = parse_robots_txt(text)
+        selected = "*"
+        for agents, _, _ in groups:
+            if token != "*" and token in agents:
+                selected = token
+                break
+        rules = []
+        crawl_delay = None
+        for agents, group_rules, group_delay in groups:
+            if selected in agents:
+                rules.extend(group_rules)
+                if group_delay is not None:
+                    crawl_delay = group_delay
+        return cls(rules, crawl_delay)
+
+    def is_allowed(self, path):
+        """パス（クエリを含む）へのアクセスが許可されているかを返す"""
+        if self._matcher is None:
+            return True
+        match = self._matcher.match(path)
+        if match is None:
+            return True
+        if match.lastindex is None:
+            return False
+        return self._allows[match.lastindex - 1]
+
+
+ALLOW_ALL = RobotsRules()
+
+
+class RobotsCache:
+    """ホストごとの robots.txt を取得・解析し、本文をJSONファイルにキャッシュする
+
+    キャッシュは ttl 秒の間有効で、次回の実行でも再取得しない。robots.txt が
+    存在しない（4xx）場合はすべて許可する。取得に失敗した場合もすべて許可して続行し、
+    ROBOTS_RETRY_TTL 秒後に再取得する。
+    """
+
+    def __init__(self, path=None, http_client=None, user_agent=None, ttl=ROBOTS_CACHE_TTL, verbose=False):
+        self.path = path
+        self.http_client = http_client = http_client or get_default_client()
+        self.user_agent = user_agent or http_client.session.headers.get("User-Agent", "*")
+        self.ttl = ttl
+        self.verbose = verbose
+        self.entries = {}  # オリジン → {"fetched", "status", "body"}
+        self.rules = {}  # オリジン → RobotsRules
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"警告: robots.txt のキャッシュを読み込めません: {self.path} - {e}")
+
+    def save(self):
+        """キャッシュファイルを書き出す（一時ファイル経由で置き換える）"""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def _fetch(self, origin):
+        """robots.txt を取得して (ステータス, 本文) を返す（取得できなければステータスは None）"""
+        robots_url = f"{origin}/robots.txt"
+        if self.verbose:
+            print(f"Attempting to load robots.txt from {robots_url}...")
+        try:
+            response = self.http_client.get(robots_url, timeout=5)
+        except requests.exceptions.RequestException as e:
+            print(f"Warning: Could not fetch robots.txt from {robots_url}: {e}")
+            return None, ""
+        if response.status_code >= 400:
+            return response.status_code, ""
+        # UTF-8でデコードできない場合は他のエンコーディングも試す
+        try:
+            body = response.content.decode("utf-8")
+        except UnicodeDecodeError:
+            try:
+                body = response.content.decode("shift_jis")
+            except UnicodeDecodeError:
+                body = response.text  # requests に自動判定させる
+        return response.status_code, body
+
+    def rules_for_origin(self, origin):
+        """オリジン（scheme://host[:port]）の RobotsRules を返す（必要なら取得する）"""
+        rules = self.rules.get(origin)
+        if rules is not None:
+            return rules
+        with self._lock:
+            rules = self.rules.get(origin)
+            if rules is not None:
+                return rules
+            entry = self.entries.get(origin)
+            now = time.time()
+            if entry is not None:
+                ttl = self.ttl if entry["status"] is not None and entry["status"] < 500 else ROBOTS_RETRY_TTL
+                if now - entry["fetched"] > ttl:
+                    entry = None
+            if entry is None:
+                status, body = self._fetch(origin)
+                entry = {"fetched": now, "status": status, "body": body}
+                self.entries[origin] = entry
+                self._dirty = True
+            if entry["status"] is not None and entry["status"] < 400:
+                rules = RobotsRules.from_text(entry["body"], self.user_agent)
+            else:
+                rules = ALLOW_ALL
+            self.rules[origin] = rules
+            return rules
+
+    def is_loaded(self, url):
+        """URLのオリジンの robots.txt を読み込み済みか（is_allowed / crawl_delay が取得を行わないか）を返す"""
+        parts = urlsplit(url)
+        return not parts.netloc or f"{parts.scheme}://{parts.netloc}" in self.rules
+
+    def is_allowed(self, url):
+        """URLへのアクセスが robots.txt で許可されているかを返す"""
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return True
+        rules = self.rules.get(f"{parts.scheme}://{parts.netloc}")
+        if rules is None:
+            rules = self.rules_for_origin(f"{parts.scheme}://{parts.netloc}")
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        return rules.is_allowed(path)
+
+    def crawl_delay(self, url):
+        """URLのホストに指定された Crawl-delay（秒）を返す（指定がなければ None）"""
+        parts = urlsplit(url)
+        if not parts.netloc:
+            return None
+        return self.rules_for_origin(f"{parts.scheme}://{parts.netloc}").crawl_delay
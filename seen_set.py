@@ -0,0 +1,224 @@
+"""訪問済みURLの集合（seen-set）のバックエンド
+
+数百万URLのクロールでは、URL文字列の set は1件あたり100バイト以上を使う。
+ここでは次の3種類のバックエンドを同じインターフェース（add・in・len）で提供する。
+
+    set          URL文字列の set（既定。正確だがメモリを最も使う）
+    fingerprint  64ビットのフィンガープリントを array に保持するオープンアドレス法のハッシュ表
+                 （1件あたり約11〜23バイト。異なるURLの衝突は 2^-64 程度で無視できる）
+    bloom        スケーラブルなブルームフィルタ（1件あたり数バイト。error_rate の割合で
+                 未訪問のURLを訪問済みと誤判定する＝そのURLはクロールされない）
+
+fingerprint と bloom はフィンガープリントを直接追加・検索できるため（add_fingerprint・
+contains_fingerprint）、CrawlFrontier の圧縮済みURL（done_fingerprints）も読み込める。
+exact 属性が False のバックエンド（bloom）は「含まれない」という判定だけが確実。
+"""
+from array import array
+import math
+
+from url_utils import url_fingerprint
+
+SEEN_SET_KINDS = ("set", "fingerprint", "bloom")
+
+_MASK64 = (1 << 64) - 1
+
+
+class FingerprintSet:
+    """64ビットのフィンガープリントを array('q') に保持するオープンアドレス法（線形探索）のハッシュ表
+
+    空きスロットは 0 で表すため、フィンガープリントが 0 のURLは 1 として扱う。
+    使用率が max_load を超えると表の大きさを2倍にする。
+    """
+
+    exact = True
+
+    def __init__(self, capacity=1 << 16, max_load=0.7):
+        self.max_load = max_load
+        self._count = 0
+        self._allocate(max(16, int(capacity / max_load) + 1))
+
+    def _allocate(self, slots):
+        size = 1 << (slots - 1).bit_length()
+        self._table = array("q", bytes(8 * size))
+        self._mask = size - 1
+        self._limit = int(size * self.max_load)
+
+    def add_fingerprint(self, fingerprint):
+        """フィンガープリントを追加し、新しく追加したかどうかを返す"""
+        fingerprint = fingerprint or 1
+        table = self._table
+        mask = self._mask
+        index = fingerprint & mask
+        while True:
+            value = table[index]
+            if value == fingerprint:
+                return False
+            if not value:
+                break
+            index = (index + 1) & mask
+        table[index] = fingerprint
+        self._count += 1
+        if self._count > self._limit:
+            self._grow()
+        return True
+
+    def contains_fingerprint(self, fingerprint):
+        fingerprint = fingerprint or 1
+        table = self._table
+        mask = self._mask
+        index = fingerprint & mask
+        while True:
+            value = table[index]
+            if value == fingerprint:
+                return True
+            if not value:
+                return False
+            index = (index + 1) & mask
+
+    def _grow(self):
+        old = self._table
+        self._allocate(len(old) * 2)
+        table = self._table
+        mask = self._mask
+        for fingerprint in old:
+            if fingerprint:
+                index = fingerprint & mask
+                while table[index]:
+                    index = (index + 1) & mask
+                table[index] = fingerprint
+
+    def add(self, url):
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return self._table.itemsize * len(self._table)
+
+
+def _double_hashes(fingerprint):
+    """二重ハッシュ法に使う2つのハッシュ値をフィンガープリントから作る"""
+    h1 = fingerprint & _MASK64
+    # splitmix64 の攪拌で2つ目のハッシュを作る
+    h2 = (h1 + 0x9E3779B97F4A7C15) & _MASK64
+    h2 = ((h2 ^ (h2 >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    h2 = ((h2 ^ (h2 >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return h1, h2 ^ (h2 >> 31)
+
+
+class BloomFilter:
+    """固定容量のブルームフィルタ（capacity 件まで追加したときの誤判定率が error_rate）
+
+    ビット位置は2つのハッシュ値から二重ハッシュ法（h1 + i * h2）で求める。
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.num_bits + 7) // 8)
+
+    def add_hashes(self, h1, h2):
+        """ビットを立て、新しく追加したか（追加前に含まれていなかったか）を返す"""
+        bits = self._bits
+        num_bits = self.num_bits
+        position = h1 % num_bits
+        step = h2 % num_bits or 1
+        added = False
+        for _ in range(self.num_hashes):
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                added = True
+            position = (position + step) % num_bits
+        if added:
+            self.count += 1
+        return added
+
+    def contains_hashes(self, h1, h2):
+        bits = self._bits
+        num_bits = self.num_bits
+        position = h1 % num_bits
+        step = h2 % num_bits or 1
+        for _ in range(self.num_hashes):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+            position = (position + step) % num_bits
+        return True
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """容量を超えると新しいフィルタを追加していくスケーラブルなブルームフィルタ
+
+    追加するフィルタは容量を growth 倍、誤判定率を tightening 倍にするため、
+    全体の誤判定率は件数によらず error_rate 以下に保たれる。
+    """
+
+    exact = False
+
+    def __init__(self, initial_capacity=1 << 20, error_rate=0.001, growth=2, tightening=0.5):
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+        self._count = 0
+        # 各フィルタの誤判定率の合計（等比級数）が error_rate になるようにする
+        self.filters = [BloomFilter(initial_capacity, error_rate * (1 - tightening))]
+
+    def add_fingerprint(self, fingerprint):
+        h1, h2 = _double_hashes(fingerprint)
+        if self._contains_hashes(h1, h2):
+            return False
+        current = self.filters[-1]
+        if current.count >= current.capacity:
+            current = BloomFilter(current.capacity * self.growth, current.error_rate * self.tightening)
+            self.filters.append(current)
+        current.add_hashes(h1, h2)
+        self._count += 1
+        return True
+
+    def contains_fingerprint(self, fingerprint):
+        return self._contains_hashes(*_double_hashes(fingerprint))
+
+    def _contains_hashes(self, h1, h2):
+        for bloom in reversed(self.filters):
+            if bloom.contains_hashes(h1, h2):
+                return True
+        return False
+
+    def add(self, url):
+        return self.add_fingerprint(url_fingerprint(url))
+
+    def __contains__(self, url):
+        return self.contains_fingerprint(url_fingerprint(url))
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return sum(bloom.nbytes for bloom in self.filters)
+
+
+def make_seen_set(kind="set", capacity=1 << 16, error_rate=0.001):
+    """kind（set / fingerprint / bloom）に対応する訪問済みURLの集合を作成する
+
+    capacity は想定するURL数（fingerprint は表の初期サイズ、bloom は最初のフィルタの容量）。
+    """
+    if kind == "set":
+        return set()
+    if kind == "fingerprint":
+        return FingerprintSet(capacity)
+    if kind == "bloom":
+        return ScalableBloomFilter(capacity, error_rate)
+    raise ValueError(f"未対応の seen-set です: {kind}（{', '.join(SEEN_SET_KINDS)} のいずれか）")
@@ -0,0 +1,164 @@
+"""不要な要素（ヘッダー・ナビゲーション・スクリプトなど）の除去ルール
+
+セレクタのリストを StripRuleSet にまとめておくと、ルールごとに soup.select で
+文書全体を走査する代わりに、1回の走査ですべてのルールを判定して要素を削除できる。
+対応する形式は次の単純なセレクタで、それ以外（子孫結合子や複合セレクタなど）は
+soup.select で個別に処理する。
+
+    tag  .class  #id  [attr]  [attr="v"]  [attr*="v"]  [attr^="v"]  [attr$="v"]
+"""
+import re
+
+from bs4 import Tag
+
+# CleanCursorDocsScraper が docs.cursor.com から除去する要素
+CURSOR_DOCS_SELECTORS = (
+    'header', 'footer', 'nav', 'aside',
+    '.sidebar', '.navigation', '.nav',
+    'script', 'style', '.search', '.breadcrumb',
+    '.header', '.footer', '[class*="nav"]',
+    '[class*="menu"]', '[class*="sidebar"]',
+    '[id*="nav"]', '[id*="menu"]', '[id*="sidebar"]',
+    '.cursor-home-page', '.search-container',
+    '.page-navigation', '.table-of-contents',
+)
+
+# crawler.py が既定で除去する要素
+GENERIC_SELECTORS = (
+    'header', 'footer', 'nav', 'aside', '.sidebar', '#header', '#footer', '#nav',
+    'script', 'style',
+)
+
+_SIMPLE_SELECTOR = re.compile(
+    r"""^(?:
+        (?P<tag>[a-zA-Z][\w-]*)
+      | \.(?P<cls>[\w-]+)
+      | \#(?P<id>[\w-]+)
+      | \[\s*(?P<attr>[\w-]+)\s*(?:(?P<op>[*^$]?=)\s*(?P<quote>["']?)(?P<value>.*?)(?P=quote)\s*)?\]
+    )$""",
+    re.VERBOSE,
+)
+
+
+class StripRuleSet:
+    """除去ルールをまとめて、1回の走査で一致する要素を削除する
+
+    ルールのいずれかに一致した要素は子孫ごと削除されるため、結果は
+    セレクタごとに soup.select して decompose した場合と同じになる。
+    """
+
+    def __init__(self, selectors):
+        self.selectors = tuple(selectors)
+        self.tags = set()
+        self.classes = set()
+        self.ids = set()
+        self.attr_exists = set()
+        self.attr_equals = {}
+        self.fallback = []  # 1回の走査で判定できないセレクタ
+        substring_rules = {}
+
+        for selector in self.selectors:
+            match = _SIMPLE_SELECTOR.match(selector.strip())
+            if not match:
+                self.fallback.append(selector)
+            elif match.group("tag"):
+                self.tags.add(match.group("tag").lower())
+            elif match.group("cls"):
+                self.classes.add(match.group("cls"))
+            elif match.group("id"):
+                self.ids.add(match.group("id"))
+            else:
+                attr = match.group("attr").lower()
+                op = match.group("op")
+                value = match.group("value")
+                if op is None:
+                    self.attr_exists.add(attr)
+                elif op == "=":
+                    self.attr_equals.setdefault(attr, set()).add(value)
+                elif value:
+                    # 部分一致・前方一致・後方一致は属性ごとに1つの正規表現にまとめる
+                    escaped = re.escape(value)
+                    pattern = {"*=": escaped, "^=": "^" + escaped, "$=": escaped + "$"}[op]
+                    substring_rules.setdefault(attr, []).append(pattern)
+
+        self.attr_patterns = {
+            attr: re.compile("|".join(patterns)) for attr, patterns in substring_rules.items()
+        }
+        self.class_pattern = self.attr_patterns.pop("class", None)
+        self.id_pattern = self.attr_patterns.pop("id", None)
+
+    def matches(self, element):
+        """要素がいずれかのルールに一致するかを返す"""
+        if element.name in self.tags:
+            return True
+        attrs = element.attrs
+        if not attrs:
+            return False
+
+        classes = attrs.get("class")
+        if classes:
+            if isinstance(classes, str):
+                classes = classes.split()
+            if self.classes and not self.classes.isdisjoint(classes):
+                return True
+            if self.class_pattern is not None and self.class_pattern.search(" ".join(classes)):
+                return True
+
+        element_id = attrs.get("id")
+        if element_id:
+            if element_id in self.ids:
+                return True
+            if self.id_pattern is not None and self.id_pattern.search(element_id):
+                return True
+
+        for attr in self.attr_exists:
+            if attr in attrs:
+                return True
+        for attr, values in self.attr_equals.items():
+            if attr in attrs and _attr_string(attrs[attr]) in values:
+                return True
+        for attr, pattern in self.attr_patterns.items():
+            if attr in attrs and pattern.search(_attr_string(attrs[attr])):
+                return True
+        return False
+
+    def apply(self, soup):
+        """一致する要素をすべて削除し、削除した要素の数を返す"""
+        to_remove = []
+        stack = [soup]
+        while stack:
+            for child in stack.pop().contents:
+                if not isinstance(child, Tag):
+                    continue
+                if self.matches(child):
+                    # 子孫ごと削除するので、子孫は判定しない
+                    to_remove.append(child)
+                else:
+                    stack.append(child)
+
+        for element in to_remove:
+            element.decompose()
+
+        removed = len(to_remove)
+        for selector in self.fallback:
+            for element in soup.select(selector):
+                element.decompose()
+                removed += 1
+        return removed
+
+
+def _attr_string(value):
+    return " ".join(value) if isinstance(value, list) else value
+
+
+_compiled = {}
+
+
+def compile_strip_rules(selectors):
+    """セレクタのリストから StripRuleSet を作成する（同じリストは再利用する）"""
+    key = tuple(selectors)
+    rules = _compiled.get(key)
+    if rules is None:
+        rules = StripRuleSet(key)
+        _compiled[key] = rules
+    return rules
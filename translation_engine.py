@@ -0,0 +1,201 @@
+import re
+
+# 語の間の空白: 空白・タブの連続と、折り返しによる改行1つまでを許す
+# （空行をまたいだ一致はしない）
+WRAPPED_SPACE = r"(?:[ \t]+\n?[ \t]*|\n[ \t]*)"
+
+
+def _trie_to_regex(node, space_pattern):
+    """トライ木のノードを正規表現に変換する（長い一致を優先する）"""
+    is_end = "" in node
+    branches = [
+        (space_pattern if ch == " " and space_pattern else re.escape(ch)) + _trie_to_regex(child, space_pattern)
+        for ch, child in sorted(node.items()) if ch
+    ]
+    if not branches:
+        return ""
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    body = "(?:" + "|".join(branches) + ")"
+    # 語の終端でもある場合は、続きを貪欲に試してから短い一致に戻る
+    return body + "?" if is_end else body
+
+
+def build_trie_pattern(words, space_pattern=None):
+    """単語リストから1つの正規表現（トライ木の形の選択）を作成する
+
+    "Code", "Codebase", "Codebases" のような共通の接頭辞を持つ語は1つの枝にまとめられ、
+    同じ位置では常に最長の語から一致を試す。space_pattern を指定すると、
+    語中の半角スペースをそのパターンに置き換える。
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return _trie_to_regex(trie, space_pattern)
+
+
+class TranslationEngine:
+    """複数の辞書を1つのマッチャーにまとめ、1回の走査で置換する翻訳エンジン
+
+    tiers は (名前, 辞書, 単語境界を要求するか) のリストで、先頭ほど優先度が高い。
+    置換は文書を先頭から1回だけ走査し、次の規則で一致を選ぶ:
+
+    1. 最も左で始まる一致を採用する（leftmost）
+    2. 同じ位置で複数の辞書が一致する場合は、優先度の高い辞書を採用する
+    3. 同じ辞書の中では最も長い一致を採用する（longest）
+
+    大文字・小文字は区別しない。語の間の空白は、空白の連続や折り返しによる
+    改行1つにも一致する（"Early Access\nProgram" も1つの語として扱う）。
+    置換結果を再走査しないため、置換後の文字列が別の語に再び一致して
+    二重に置換されることはない。
+    """
+
+    def __init__(self, tiers):
+        self.tiers = []
+        self.lookup = {}
+        alternatives = []
+        first_chars = set()
+
+        for index, (name, table, word_boundary) in enumerate(tiers):
+            group = f"t{index}"
+            lookup = {}
+            for english, japanese in table.items():
+                # 大文字・小文字違いの重複は辞書内で先に定義されたものを優先する
+                lookup.setdefault(_normalize_key(english), (english, japanese))
+            lookup.pop("", None)
+            if not lookup:
+                continue
+            pattern = build_trie_pattern(sorted(lookup), WRAPPED_SPACE)
+            if word_boundary:
+                pattern = r"\b" + pattern + r"\b"
+            alternatives.append(f"(?P<{group}>{pattern})")
+            first_chars.update(key[0] for key in lookup)
+            self.tiers.append(name)
+            self.lookup[group] = lookup
+
+        self.source = "|".join(alternatives)
+        # 先頭文字の先読みで、どの語も始まらない位置をすぐに読み飛ばす
+        self.first = "[" + "".join(re.escape(ch) for ch in sorted(first_chars)) + "]"
+        self._compile()
+
+    def _compile(self):
+        self.pattern = None
+        self._ignorecase_pattern = None
+        if self.source:
+            self.pattern = re.compile(f"(?={self.first})(?:{self.source})")
+
+    @property
+    def ignorecase_pattern(self):
+        """小文字化で長さが変わる文字を含むテキスト用のパターン
+
+        ほとんどの文書では使わず、コンパイルにはマッチャーと同じくらいの時間がかかるため、
+        最初に必要になったときにコンパイルする。
+        """
+        if self._ignorecase_pattern is None and self.source:
+            self._ignorecase_pattern = re.compile(self.source, re.IGNORECASE)
+        return self._ignorecase_pattern
+
+    def to_state(self):
+        """キャッシュ保存用に、構築済みのマッチャーをJSON化できる辞書にする"""
+        return {
+            "tiers": self.tiers,
+            "lookup": self.lookup,
+            "source": self.source,
+            "first": self.first,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """to_state() の結果からトライ木を作り直さずにエンジンを復元する"""
+        engine = cls.__new__(cls)
+        engine.tiers = state["tiers"]
+        engine.lookup = {
+            group: {key: tuple(value) for key, value in lookup.items()}
+            for group, lookup in state["lookup"].items()
+        }
+        engine.source = state["source"]
+        engine.first = state["first"]
+        engine._compile()
+        return engine
+
+    def translate(self, text, counts=None, start=0):
+        """text[start:] を翻訳して返す
+
+        start より前の文字は単語境界の判定にだけ使う（結果には含めない）。
+        counts に辞書を渡すと、置換された英語の語ごとの回数を加算する。
+        """
+        if self.pattern is None:
+            return text[start:]
+
+        # 小文字化した文字列に対して大文字・小文字を区別せずに照合する
+        # （IGNORECASE より高速）。小文字化で長さが変わる文字を含む場合のみ
+        # 位置がずれるため IGNORECASE のパターンで照合する。
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.pattern.finditer(lowered, start)
+        else:
+            matches = self.ignorecase_pattern.finditer(text, start)
+
+        lookup = self.lookup
+        parts = []
+        last = start
+        for match in matches:
+            match_start, match_end = match.span()
+            table = lookup[match.lastgroup]
+            entry = table.get(match.group())
+            if entry is None:
+                # 大文字を含む一致（IGNORECASE 照合時）や、空白・改行をまたいだ一致
+                entry = table[_normalize_key(match.group())]
+            english, japanese = entry
+            parts.append(text[last:match_start])
+            parts.append(japanese)
+            last = match_end
+            if counts is not None:
+                counts[english] = counts.get(english, 0) + 1
+        if not parts and start == 0:
+            return text
+        parts.append(text[last:])
+        return "".join(parts)
+
+
+class RewriteEngine:
+    """翻訳後の修正ルール（修正前 -> 修正後）を1回の走査でまとめて適用する
+
+    ルールごとに文書全体を str.replace する方式と異なり、文書のコピーは1回しか作らない。
+    一致の選び方は次の通りで、辞書の順序には依存しない:
+
+    1. 最も左で始まる一致を採用する（leftmost）
+    2. 同じ位置で複数のルールが一致する場合は、最も長いものを採用する（longest）
+
+    置換結果は再走査しないため、ある修正の結果が別のルールに一致しても適用されない。
+    修正結果にもルールを適用したい場合は fixed_point=True を指定すると、
+    変化がなくなるまで（最大 max_passes 回）走査を繰り返す。
+    大文字・小文字や空白は区別する。
+    """
+
+    def __init__(self, rules, max_passes=10):
+        self.rules = {wrong: correct for wrong, correct in rules.items() if wrong}
+        self.max_passes = max_passes
+        self.pattern = re.compile(build_trie_pattern(self.rules)) if self.rules else None
+
+    def _replace(self, match):
+        return self.rules[match.group()]
+
+    def rewrite(self, text, fixed_point=False):
+        """text にルールを適用して返す"""
+        if self.pattern is None:
+            return text
+        for _ in range(self.max_passes if fixed_point else 1):
+            rewritten = self.pattern.sub(self._replace, text)
+            if rewritten == text:
+                break
+            text = rewritten
+        return text
+
+
+def _normalize_key(text):
+    """照合用のキー（小文字化し、空白の連続や改行を半角スペース1つにまとめる）"""
+    return " ".join(text.lower().split())
@@ -0,0 +1,114 @@
+import hashlib
+import os
+import sqlite3
+import time
+
+# 記録の形式を変更した場合はこの値を上げる（古い翻訳メモリは使われなくなる）
+MEMORY_FORMAT_VERSION = 1
+
+
+def make_key(segment, version):
+    """(原文セグメント, 翻訳バージョン) から16バイトのキーを作る"""
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(segment.encode("utf-8"))
+    return digest.digest()[:16]
+
+
+class TranslationMemory:
+    """セグメント単位の翻訳結果を保存するSQLiteの翻訳メモリ
+
+    キーは原文セグメントと翻訳バージョン（用語集・後処理の内容から決まる文字列）の
+    ハッシュ値なので、用語集を変更すると古い記録は自然に使われなくなる。
+    ヒット・ミスの件数を数え、format_summary() でヒット率を表示できる。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._touched = []
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA busy_timeout=30000")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS segments ("
+            " key BLOB PRIMARY KEY,"
+            " translation TEXT NOT NULL,"
+            " last_used INTEGER NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self.connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        row = self.connection.execute("SELECT value FROM meta WHERE name = 'format'").fetchone()
+        if row is None or row[0] != str(MEMORY_FORMAT_VERSION):
+            self.connection.execute("DELETE FROM segments")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('format', ?)",
+                (str(MEMORY_FORMAT_VERSION),),
+            )
+        self.connection.commit()
+
+    def get(self, segment, version):
+        """保存済みの翻訳を返す（なければ None）"""
+        key = make_key(segment, version)
+        row = self.connection.execute("SELECT translation FROM segments WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        return row[0]
+
+    def put(self, segment, version, translation):
+        """翻訳結果を保存する（commit() を呼ぶまで確定しない）"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO segments (key, translation, last_used) VALUES (?, ?, ?)",
+            (make_key(segment, version), translation, int(time.time())),
+        )
+
+    def commit(self):
+        """追加した翻訳と、ヒットした記録の最終使用日時をまとめて書き込む"""
+        if self._touched:
+            now = int(time.time())
+            self.connection.executemany(
+                "UPDATE segments SET last_used = ? WHERE key = ?",
+                ((now, key) for key in self._touched),
+            )
+            self._touched = []
+        self.connection.commit()
+
+    def prune(self, max_age_days):
+        """max_age_days 日以上使われていない記録を削除し、削除件数を返す"""
+        self.commit()
+        cutoff = int(time.time()) - int(max_age_days * 86400)
+        deleted = self.connection.execute("DELETE FROM segments WHERE last_used < ?", (cutoff,)).rowcount
+        self.connection.commit()
+        if deleted:
+            self.connection.execute("VACUUM")
+        return deleted
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM segments").fetchone()[0]
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def format_summary(self):
+        """ヒット率を1行の文字列にする"""
+        total = self.hits + self.misses
+        return f"ヒット {self.hits:,} / {total:,} セグメント（{self.hit_rate() * 100:.1f}%）、保存数 {len(self):,}"
+
+    def close(self):
+        self.commit()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
@@ -0,0 +1,45 @@
+import hashlib
+from urllib.parse import urlsplit, urlunsplit
+
+# 省略できる既定のポート
+DEFAULT_PORTS = {"http": ":80", "https": ":443"}
+
+
+def normalize_url(url):
+    """重複の判定に使う正規化したURLを返す
+
+    フラグメント（#...）を除去し、スキームとホスト名を小文字にそろえ、既定のポートを省略する。
+    パス末尾の / は除去し（ルートは / にそろえる）、クエリパラメータは名前の順に並べ替える
+    （同じ名前のパラメータは元の順序を保つ）。パスとクエリの大文字・小文字やエンコードは変更しない。
+
+        >>> normalize_url("HTTPS://Docs.Cursor.com:443/context/?b=2&a=1#top")
+        'https://docs.cursor.com/context?a=1&b=2'
+    """
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc
+    path = parts.path
+    if netloc:
+        userinfo, at, host = netloc.rpartition("@")
+        host = host.lower()
+        default_port = DEFAULT_PORTS.get(scheme)
+        if default_port and host.endswith(default_port):
+            host = host[:-len(default_port)]
+        netloc = userinfo + at + host
+        if not path:
+            path = "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/") or "/"
+    query = parts.query
+    if query:
+        params = [param for param in query.split("&") if param]
+        params.sort(key=lambda param: param.split("=", 1)[0])
+        query = "&".join(params)
+    if not netloc:
+        return urlunsplit((scheme, netloc, path, query, ""))
+    return f"{scheme}://{netloc}{path}?{query}" if query else f"{scheme}://{netloc}{path}"
+
+
+def url_fingerprint(url):
+    """URLの64ビットのフィンガープリント（SQLite の INTEGER に収まる符号付き整数）"""
+    return int.from_bytes(hashlib.blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
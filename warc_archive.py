@@ -0,0 +1,253 @@
+"""取得したレスポンス（ヘッダーとデコード前の本文）を保存する WARC 形式のアーカイブ
+
+抽出のロジック（不要な要素の除去、構造化コンテンツの抽出など）を変更したときに、
+サイトに再アクセスせずにアーカイブから出力を作り直せるようにする。
+
+- レコードは WARC/1.1 の response レコードで、1レコードごとに独立した gzip のメンバーとして
+  セグメントファイル（pages-00000.warc.gz, ...）に追記する。ファイル全体は通常の .warc.gz として
+  他のツールでも読めるうえ、位置と長さが分かれば1レコードだけを展開して読み出せる。
+- セグメントが segment_size バイトを超えると次のセグメントに切り替える。
+- 索引（index.jsonl）には URL → (セグメント, 位置, 長さ) を1レコード1行で追記する。
+  同じURLを再取得した場合は後のレコードが有効になる。
+- map_records は最新のレコードをセグメント（とその中のレコードの範囲）ごとにプロセスに分けて
+  処理し、結果をアーカイブの順に返す。
+
+本文は requests がデコードした後（Content-Encoding を展開した後）のバイト列なので、
+Content-Encoding / Transfer-Encoding ヘッダーは保存せず、Content-Length は本文の長さにする。
+
+    archive = WarcArchive("cursor_docs_clean/archive")
+    archive.append(url, response)
+    for url, result in archive.map_records(extract, workers=4):
+        ...
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from http.client import responses as HTTP_REASONS
+
+from requests.structures import CaseInsensitiveDict
+
+SEGMENT_SIZE = 100 * 1024 * 1024 # セグメントファイルの最大サイズ（バイト）
+INDEX_FILE = "index.jsonl"
+
+# 本文をデコード済みで保存するため、記録しないヘッダー
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+
+class ArchivedResponse:
+    """アーカイブから読み出したレスポンス（requests.Response の代わりに解析処理に渡せる）"""
+
+    def __init__(self, url, status_code, reason, headers, content, date=None):
+        self.url = url
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.date = date
+
+    def raise_for_status(self):
+        pass
+
+
+def build_record(url, response, date=None):
+    """レスポンスを WARC の response レコード（展開後のバイト列）にする"""
+    date = date or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    body = response.content
+    reason = getattr(response, "reason", None) or HTTP_REASONS.get(response.status_code, "")
+    http_lines = [f"HTTP/1.1 {response.status_code} {reason}"]
+    for name, value in response.headers.items():
+        if name.lower() not in _DROPPED_HEADERS:
+            http_lines.append(f"{name}: {value}")
+    http_lines.append(f"Content-Length: {len(body)}")
+    block = ("\r\n".join(http_lines) + "\r\n\r\n").encode("iso-8859-1", "replace") + body
+
+    digest = base64.b32encode(hashlib.sha1(body).digest()).decode("ascii")
+    warc_headers = [
+        "WARC/1.1",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {date}",
+        f"WARC-Target-URI: {url}",
+        "Content-Type: application/http; msgtype=response",
+        f"WARC-Payload-Digest: sha1:{digest}",
+        f"Content-Length: {len(block)}",
+    ]
+    return ("\r\n".join(warc_headers) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+
+
+def _parse_headers(lines):
+    headers = CaseInsensitiveDict()
+    for line in lines:
+        name, _, value = line.partition(":")
+        headers[name.strip()] = value.strip()
+    return headers
+
+
+def parse_record(data):
+    """展開したレコードを ArchivedResponse にする"""
+    warc_part, _, rest = data.partition(b"\r\n\r\n")
+    warc_headers = _parse_headers(warc_part.decode("utf-8").split("\r\n")[1:])
+    block = rest[:int(warc_headers["Content-Length"])]
+    http_part, _, body = block.partition(b"\r\n\r\n")
+    status_line, *header_lines = http_part.decode("iso-8859-1").split("\r\n")
+    _, status, reason = (status_line.split(" ", 2) + [""])[:3]
+    return ArchivedResponse(warc_headers["WARC-Target-URI"], int(status), reason,
+                            _parse_headers(header_lines), body, warc_headers.get("WARC-Date"))
+
+
+def read_record(path, offset, length):
+    """セグメントファイルの位置 offset から1レコードを読み出す"""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        return parse_record(gzip.decompress(f.read(length)))
+
+
+def _map_segment(path, entries, function):
+    """セグメントのレコード（(位置, 長さ) のリスト）を順に function で処理する（プロセスプールで実行する）"""
+    results = []
+    with open(path, "rb") as f:
+        for offset, length in entries:
+            f.seek(offset)
+            record = parse_record(gzip.decompress(f.read(length)))
+            results.append((record.url, function(record)))
+    return results
+
+
+class WarcArchive:
+    """セグメントに分けた .warc.gz ファイルと URL の索引からなるアーカイブ"""
+
+    def __init__(self, directory, segment_size=SEGMENT_SIZE, compresslevel=6):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.compresslevel = compresslevel
+        self.index = {}  # URL → (セグメント名, 位置, 長さ)
+        self.bytes_in = 0  # 圧縮前のレコードの合計サイズ（このセッションで追記した分）
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index_path = os.path.join(directory, INDEX_FILE)
+        ends = self._load_index()
+        self._segment_number = self._last_segment_number()
+        # 索引に記録される前に中断したレコードを、最後のセグメントの末尾から切り捨てる
+        path = self._segment_path(self._segment_number)
+        end = ends.get(self._segment_name(self._segment_number), 0)
+        if os.path.exists(path) and os.path.getsize(path) > end:
+            with open(path, "r+b") as f:
+                f.truncate(end)
+        self._segment = open(self._segment_path(self._segment_number), "ab")
+        self._index_file = open(self._index_path, "a", encoding="utf-8")
+
+    def _segment_name(self, number):
+        return f"pages-{number:05d}.warc.gz"
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, self._segment_name(number))
+
+    def _last_segment_number(self):
+        numbers = [int(name[6:11]) for name in os.listdir(self.directory)
+                   if name.startswith("pages-") and name.endswith(".warc.gz")]
+        return max(numbers, default=0)
+
+    def _load_index(self):
+        """索引を読み込み、セグメント名 → 索引にあるレコードの末尾の位置を返す（途中で途切れた行は切り捨てる）"""
+        ends = {}
+        if not os.path.exists(self._index_path):
+            return ends
+        valid = 0
+        with open(self._index_path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                entry = json.loads(line)
+                self.index[entry["url"]] = (entry["segment"], entry["offset"], entry["length"])
+                ends[entry["segment"]] = max(ends.get(entry["segment"], 0), entry["offset"] + entry["length"])
+                valid += len(line)
+        with open(self._index_path, "r+b") as f:
+            f.truncate(valid)
+        return ends
+
+    def append(self, url, response):
+        """レスポンスをレコードとして追記する"""
+        record = build_record(url, response)
+        data = gzip.compress(record, compresslevel=self.compresslevel)
+        with self._lock:
+            if self._segment.tell() and self._segment.tell() + len(data) > self.segment_size:
+                self._segment.close()
+                self._segment_number += 1
+                self._segment = open(self._segment_path(self._segment_number), "ab")
+            segment = self._segment_name(self._segment_number)
+            offset = self._segment.tell()
+            self._segment.write(data)
+            self._segment.flush()
+            # レコードを書き終えてから索引に追記する（索引は途中までのレコードを指さない）
+            self._index_file.write(json.dumps({"url": url, "segment": segment, "offset": offset,
+                                               "length": len(data), "status": response.status_code},
+                                              ensure_ascii=False) + "\n")
+            self._index_file.flush()
+            self.index[url] = (segment, offset, len(data))
+            self.bytes_in += len(record)
+            self.bytes_out += len(data)
+
+    def __contains__(self, url):
+        return url in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def get(self, url):
+        """URLの最新のレコードを読み出す（なければ None）"""
+        entry = self.index.get(url)
+        if entry is None:
+            return None
+        segment, offset, length = entry
+        return read_record(os.path.join(self.directory, segment), offset, length)
+
+    def segments(self):
+        """セグメント名 → 最新のレコードの (位置, 長さ) のリスト（位置の順）"""
+        segments = {}
+        for segment, offset, length in self.index.values():
+            segments.setdefault(segment, []).append((offset, length))
+        return {segment: sorted(entries) for segment, entries in sorted(segments.items())}
+
+    def map_records(self, function, workers=None, initializer=None, initargs=()):
+        """最新のレコードごとに function(ArchivedResponse) を実行し、(URL, 結果) をアーカイブの順に返す
+
+        workers 個のプロセスで並列に処理する（既定はCPU数）。レコードは1件ずつ展開できるため、
+        セグメントをさらにレコードの範囲に分けて各プロセスに割り当てる。workers=1 の場合は
+        このプロセスで処理する。function と initializer はモジュールの関数であること
+        （initializer はワーカープロセスの起動時に1回だけ呼ばれる）。
+        """
+        with self._lock:
+            self._segment.flush()
+        workers = workers or os.cpu_count() or 1
+        segments = self.segments()
+        chunk_size = max(1, -(-len(self.index) // (workers * 4)))
+        tasks = []
+        for segment, entries in segments.items():
+            path = os.path.join(self.directory, segment)
+            for start in range(0, len(entries), chunk_size):
+                tasks.append((path, entries[start:start + chunk_size]))
+        if workers == 1:
+            for path, entries in tasks:
+                yield from _map_segment(path, entries, function)
+            return
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer, initargs=initargs) as pool:
+            futures = [pool.submit(_map_segment, path, entries, function) for path, entries in tasks]
+            for future in futures:
+                yield from future.result()
+
+    def format_summary(self):
+        ratio = self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+        return (f"{len(self.index):,} URL, {self._segment_number + 1} セグメント, "
+                f"追記 {self.bytes_in / 1024:,.0f} KB → {self.bytes_out / 1024:,.0f} KB（{ratio:.0%}）")
+
+    def close(self):
+        with self._lock:
+            self._segment.close()
+            self._index_file.close()